@@ -0,0 +1,108 @@
+"""Bandwidth and decode cost of following headers only, and their checks.
+
+First follows a finished `benchmarks.simulator.ChainSimulator` chain from
+genesis three ways: full blocks with `async_follow_tip`, and
+`async_follow_headers` without and with `HEADER_FIELD_MASK`, printing
+bytes received and blocks per second for each. Then follows a live chain
+with rollbacks into a `HeaderChain`, which raises `HeaderLinkError` if any
+header doesn't link to the previous one, and checks its tip against the
+simulator's. Exits with status 1 if a check fails.
+
+```sh
+python -m benchmarks.headers --blocks 5000 --txs-per-block 50
+```
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, AsyncIterable, Callable, Dict, List
+
+from benchmarks.simulator import ChainSimulator, Faults
+from utxorpc import CardanoSyncClient
+from utxorpc.generics.headers import HeaderChain, HeaderLinkError
+from utxorpc.generics.metrics import InMemoryMetrics, Metrics
+
+
+async def throughput(uri: str) -> Dict[str, Dict[str, float]]:
+    backend = InMemoryMetrics()
+    client = CardanoSyncClient(
+        uri, secure=False, interceptors=Metrics(backend).interceptors
+    )
+    modes: Dict[str, Callable[[], AsyncIterable[Any]]] = {
+        "follow_tip": lambda: client.async_follow_tip(intersect=[]),
+        "headers, no mask": lambda: client.async_follow_headers([], field_mask=None),
+        "headers": lambda: client.async_follow_headers([]),
+    }
+    results: Dict[str, Dict[str, float]] = {}
+    async with client.async_connect():
+        for mode, stream in modes.items():
+            backend.reset()
+            count = 0
+            start = time.perf_counter()
+            async for _ in stream():
+                count += 1
+            elapsed = time.perf_counter() - start
+            received = sum(m.response_bytes for m in backend.methods.values())
+            results[mode] = {"rate": count / elapsed, "bytes": received}
+    return results
+
+
+async def follow(uri: str, simulator: ChainSimulator, max_length: int) -> List[str]:
+    client = CardanoSyncClient(uri, secure=False)
+    headers = HeaderChain(max_length=max_length)
+    async with client.async_connect():
+        try:
+            async for _ in client.async_follow_headers([], headers=headers):
+                pass
+        except HeaderLinkError as error:
+            return [f"header chain broken: {error}"]
+    print(headers.stats(), headers.memory_stats())
+    expected = simulator.chain.tip.header
+    tip = headers.tip
+    if tip is None or tip.hash != expected.hash or tip.height != expected.height:
+        return [f"header chain tip {tip} != height {expected.height}"]
+    return []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=5000)
+    parser.add_argument("--txs-per-block", type=int, default=50)
+    parser.add_argument("--max-length", type=int, default=100)
+    args = parser.parse_args()
+
+    simulator = ChainSimulator(
+        Faults(blocks=args.blocks, txs_per_block=args.txs_per_block)
+    )
+    with simulator as uri:
+        while not simulator.chain.done:
+            time.sleep(0.05)
+        results = asyncio.run(throughput(uri))
+    full = results["follow_tip"]
+    print(f"{'mode':<18}{'blocks/s':>10}{'bytes':>14}{'of full':>9}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<18}{result['rate']:>10.0f}{result['bytes']:>14.0f}"
+            f"{result['bytes'] / full['bytes'] * 100:>8.1f}%"
+        )
+
+    simulator = ChainSimulator(
+        Faults(
+            blocks=500,
+            block_interval=0.002,
+            rollback_every=10,
+            rollback_depth=(1, 5),
+        )
+    )
+    with simulator as uri:
+        failures = asyncio.run(follow(uri, simulator, args.max_length))
+    print(f"simulator: {simulator.chain.rollbacks} rollbacks")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Import time of the package, per entry point, measured with `-X importtime`.
+
+Each statement runs in a fresh interpreter. The reported time is the sum of
+the cumulative times of its top-level imports, excluding those done by
+interpreter startup. `eager shim` reproduces the former startup, which imported every
+spec module up front and then all clients.
+
+```sh
+python -m benchmarks.imports --runs 5
+```
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+STATEMENTS: Dict[str, str] = {
+    "import utxorpc": "import utxorpc",
+    "query client": "from utxorpc import CardanoQueryClient",
+    "sync client": "from utxorpc import CardanoSyncClient",
+    "submit client": "from utxorpc import CardanoSubmitClient",
+    "watch client": "from utxorpc import CardanoWatchClient",
+    "all clients": (
+        "from utxorpc import CardanoSyncClient, CardanoQueryClient, "
+        "CardanoSubmitClient, CardanoWatchClient"
+    ),
+    "eager shim": (
+        "import utxorpc_spec.utxorpc.v1alpha.cardano.cardano_pb2, "
+        "utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2_grpc, "
+        "utxorpc_spec.utxorpc.v1alpha.query.query_pb2_grpc, "
+        "utxorpc_spec.utxorpc.v1alpha.submit.submit_pb2_grpc, "
+        "utxorpc_spec.utxorpc.v1alpha.watch.watch_pb2_grpc; "
+        "from utxorpc import CardanoSyncClient, CardanoQueryClient, "
+        "CardanoSubmitClient, CardanoWatchClient"
+    ),
+}
+
+
+def measure(statement: str) -> Dict[str, Tuple[int, int]]:
+    """Map each top-level import to `(cumulative us, modules)` for one fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports: Dict[str, Tuple[int, int]] = {}
+    nested = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        nested += 1
+        # Nested imports are printed, indented, before their parent
+        if not name.startswith("  ", 1):
+            imports[name.strip()] = (int(cumulative), nested)
+            nested = 0
+    return imports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Interpreter startup imports such as `site` are excluded by name
+    startup = set(measure("pass"))
+
+    print(f"{'entry point':<16}{'median ms':>12}{'min ms':>10}{'modules':>10}")
+    for name, statement in STATEMENTS.items():
+        measure(statement)  # warm the file system cache
+        times = []
+        modules = 0
+        for _ in range(args.runs):
+            imports = {
+                module: sample
+                for module, sample in measure(statement).items()
+                if module not in startup
+            }
+            times.append(sum(us for us, _ in imports.values()) / 1000)
+            modules = sum(count for _, count in imports.values())
+        print(
+            f"{name:<16}{statistics.median(times):>12.1f}"
+            f"{min(times):>10.1f}{modules:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""How fast `find_intersect` finds where a stale history meets the chain.
+
+Grows a chain with `benchmarks.simulator.ChainSimulator`, then builds
+histories a follower could have kept: every block up to some point behind
+the tip, followed by `depth` blocks of a fork the chain has since dropped.
+For each depth, the intersection is found through FollowTip and with
+`FetchBlock` probes only, and compared with what resuming from a single
+remembered point would replay (everything since the oldest checkpoint,
+once that point is gone). Exits with status 1 if an intersection is wrong.
+
+```sh
+python -m benchmarks.intersect --blocks 5000
+```
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import List
+
+from benchmarks.simulator import ChainSimulator, Faults
+from utxorpc import CardanoPoint, CardanoSyncClient
+from utxorpc.cardano import CardanoChain
+from utxorpc.points import PointArray
+
+DEPTHS = [0, 1, 2, 7, 30, 100, 1000]
+
+
+def forked(chain: PointArray, upto: int, depth: int, seed: int) -> PointArray:
+    """`chain[: upto + 1]` followed by `depth` points that are on no chain"""
+    rng = random.Random(seed)
+    history = chain[: upto + 1]
+    slot = history[-1].slot if len(history) else 0
+    for _ in range(depth):
+        slot += rng.randint(1, 40)
+        history.append(CardanoPoint(slot, rng.randbytes(32)))
+    return history
+
+
+async def run(uri: str, chain: PointArray, args: argparse.Namespace) -> List[str]:
+    failures: List[str] = []
+    client = CardanoSyncClient(uri, secure=False)
+    print(
+        f"{'depth':>6}{'follow_tip':>12}{'fetch_block':>13}{'ms':>8}"
+        f"{'replayed':>10}{'naive':>8}"
+    )
+    async with client.async_connect():
+        for depth in DEPTHS:
+            upto = len(chain) - 1 - args.behind
+            history = forked(chain, upto, depth, seed=depth)
+            round_trips = []
+            start = time.perf_counter()
+            for follow_tip in (True, False):
+                intersection = await client.async_find_intersect(
+                    history, follow_tip=follow_tip
+                )
+                round_trips.append(intersection.round_trips)
+                if intersection.index != upto or intersection.point != chain[upto]:
+                    failures.append(
+                        f"depth {depth}, follow_tip={follow_tip}: {intersection}"
+                    )
+            elapsed = (time.perf_counter() - start) / 2
+            # A single remembered point is gone for any depth, so a naive
+            # follower restarts from its oldest checkpoint
+            naive = upto if depth else 0
+            print(
+                f"{depth:>6}{round_trips[0]:>12}{round_trips[1]:>13}"
+                f"{elapsed * 1e3:>8.1f}{args.behind:>10}{naive + args.behind:>8}"
+            )
+
+        orphan = forked(chain, -1, 50, seed=1)
+        intersection = await client.async_find_intersect(orphan)
+        if intersection.point is not None:
+            failures.append(f"history off the chain: {intersection}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=5000)
+    parser.add_argument(
+        "--behind", type=int, default=20, help="blocks the history is behind"
+    )
+    args = parser.parse_args()
+
+    simulator = ChainSimulator(Faults(blocks=args.blocks, txs_per_block=1))
+    with simulator as uri:
+        while not simulator.chain.done:
+            time.sleep(0.05)
+        chain = PointArray(
+            CardanoChain.block_to_point(block) for block in simulator.chain.blocks
+        )
+        failures = asyncio.run(run(uri, chain, args))
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
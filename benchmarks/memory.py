@@ -0,0 +1,110 @@
+"""Memory held by streams, buffers and caches, and whether it grows.
+
+Runs rounds of buffered `async_follow_tip` and `async_watch_tx` streams,
+with a slow consumer so the buffers fill, against
+`benchmarks.server.FakeServer`, under `Metrics` interceptors and with
+`tracemalloc` on. Prints `memory_stats()` after the first round and the
+allocation growth by subsystem after the last one. Memory held after the
+first round should be reused by later rounds, so the script exits with
+status 1 if traced memory kept growing by more than `--max-growth` bytes.
+
+```sh
+python -m benchmarks.memory --rounds 5
+```
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.server import ChainData, FakeServer
+from utxorpc import CardanoSyncClient, CardanoWatchClient
+from utxorpc.generics.memory import (
+    allocation_stats,
+    memory_stats,
+    message_size,
+    start_tracing,
+)
+from utxorpc.generics.metrics import Metrics
+
+
+async def drain(stream: Any, delay: float) -> Dict[str, Any]:
+    count = 0
+    async for _ in stream:
+        count += 1
+        if count % 100 == 0:
+            # Let the buffer fill up behind a slow consumer
+            await asyncio.sleep(delay)
+    await stream.aclose()
+    return stream.memory_stats()
+
+
+async def round_trip(
+    uri: str, metrics: Metrics, args: argparse.Namespace
+) -> List[Dict[str, Any]]:
+    sync = CardanoSyncClient(uri, secure=False, interceptors=metrics.interceptors)
+    watch = CardanoWatchClient(uri, secure=False, interceptors=metrics.interceptors)
+    async with sync.async_connect(), watch.async_connect():
+        return list(
+            await asyncio.gather(
+                drain(
+                    sync.async_follow_tip_buffered(
+                        intersect=[], maxsize=args.maxsize, size_of=message_size
+                    ),
+                    args.delay,
+                ),
+                drain(
+                    watch.async_watch_tx_buffered(
+                        maxsize=args.maxsize, size_of=message_size
+                    ),
+                    args.delay,
+                ),
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--maxsize", type=int, default=512)
+    parser.add_argument("--delay", type=float, default=0.01)
+    parser.add_argument("--max-growth", type=int, default=1 << 20, help="bytes")
+    args = parser.parse_args()
+
+    metrics = Metrics()
+    traced: Dict[int, int] = {}
+    with FakeServer(ChainData(), events=args.events) as uri:
+        for number in range(args.rounds):
+            start = time.perf_counter()
+            buffers = asyncio.run(round_trip(uri, metrics, args))
+            gc.collect()
+            if number == 0:
+                # Buffers are gone by now, so they report on their own
+                print(json.dumps({**memory_stats(), "buffers": buffers}, indent=2))
+                # Measure growth from after the first round, once caches,
+                # interned strings and the channel's buffers exist
+                start_tracing()
+            else:
+                traced[number] = allocation_stats()["traced_bytes"]
+            print(
+                f"round {number}: {time.perf_counter() - start:.2f}s, "
+                f"rss {memory_stats()['process']['rss_bytes']} bytes",
+                file=sys.stderr,
+            )
+
+    allocations = allocation_stats()
+    print(json.dumps(allocations["subsystems"], indent=2))
+    for entry in allocations["top_growth"]:
+        print(f"{entry['growth_bytes']:>+10} {entry['location']}")
+    growth = max(traced.values(), default=0) - min(traced.values(), default=0)
+    print(f"traced memory varied by {growth} bytes across rounds")
+    sys.exit(1 if growth > args.max_growth else 0)
+
+
+if __name__ == "__main__":
+    main()
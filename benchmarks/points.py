@@ -0,0 +1,85 @@
+"""Memory per million points for the available point representations.
+
+Compares a list of plain objects with a per-instance `__dict__` (the old
+`CardanoPoint` layout), a list of slotted `CardanoPoint`s and a
+`PointArray`, measured with `tracemalloc`, and times slot lookups.
+
+```sh
+python -m benchmarks.points --points 1000000
+```
+"""
+
+import argparse
+import bisect
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+import spec_compatibility  # noqa: F401
+from utxorpc import CardanoPoint
+from utxorpc.points import PointArray
+
+
+class DictPoint:
+    """A point with a per-instance `__dict__`, as `CardanoPoint` used to be"""
+
+    def __init__(self, slot: int, hash: bytes) -> None:
+        self.slot = slot
+        self.hash = hash
+
+
+def allocated(build: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    slots = sorted(rng.sample(range(args.points * 20), args.points))
+
+    def hashes():
+        for slot in slots:
+            yield slot, rng.randbytes(32)
+
+    builds: Dict[str, Callable[[], Any]] = {
+        "list[dict object]": lambda: [DictPoint(s, h) for s, h in hashes()],
+        "list[CardanoPoint]": lambda: [CardanoPoint(s, h) for s, h in hashes()],
+        "PointArray": lambda: PointArray(CardanoPoint(s, h) for s, h in hashes()),
+    }
+
+    scale = 1_000_000 / args.points
+    print(f"{'representation':<22}{'MiB / 1M points':>16}{'bytes / point':>15}")
+    for name, build in builds.items():
+        size = allocated(build)
+        print(f"{name:<22}{size * scale / 2**20:>16.1f}{size / args.points:>15.1f}")
+
+    points = PointArray(CardanoPoint(s, rng.randbytes(32)) for s in slots)
+    listed = list(points)
+    probes = [rng.choice(slots) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    for slot in probes:
+        points.find(slot)
+    array_us = (time.perf_counter() - start) / args.lookups * 1e6
+
+    start = time.perf_counter()
+    for slot in probes:
+        listed[bisect.bisect_left(slots, slot)]
+    list_us = (time.perf_counter() - start) / args.lookups * 1e6
+
+    print(f"\nfind by slot: PointArray {array_us:.2f}us, sorted list {list_us:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Throughput of compiled predicates against the reference interpreter.
+
+Measures matches per second of `tx_matches` and `compile_tx_predicate`
+for a few typical predicate shapes, on random transactions, and of
+`AddressIndex` over a large watch list. `tests/test_predicate.py` checks
+that the compiled matchers agree with the reference on the same random
+workload, `tests/universe.py`.
+
+```sh
+python -m benchmarks.predicates --txs 2000
+```
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, Sequence
+
+import spec_compatibility  # noqa: F401
+from tests.universe import Universe
+from utxorpc.address_index import AddressIndex
+from utxorpc.predicate import (
+    compile_tx_predicate,
+    tx_matches,
+)
+from utxorpc_spec.utxorpc.v1alpha.cardano import cardano_pb2  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.watch.watch_pb2 import (  # type: ignore
+    AnyChainTxPattern,
+    TxPredicate,
+)
+
+
+def rate(match: Callable[[Any], bool], values: Sequence[Any], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for value in values:
+            match(value)
+    return len(values) * rounds / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--txs", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--watched", type=int, default=200_000, help="AddressIndex credentials"
+    )
+    args = parser.parse_args()
+
+    universe = Universe(random.Random(args.seed), size=2000)
+
+    def watching(count: int) -> TxPredicate:
+        """Union of `count` address subscriptions, as built by WatchHub"""
+        return TxPredicate(
+            any_of=[
+                TxPredicate(
+                    match=AnyChainTxPattern(
+                        cardano=cardano_pb2.TxPattern(
+                            has_address=cardano_pb2.AddressPattern(
+                                payment_part=universe.payments[i]
+                            )
+                        )
+                    )
+                )
+                for i in range(count)
+            ]
+        )
+
+    shapes: Dict[str, TxPredicate] = {
+        "single address": watching(1),
+        "any_of 10 addresses": watching(10),
+        "any_of 1000 addresses": watching(1000),
+        "nested random": universe.tx_predicate(),
+    }
+    txs = [universe.tx() for _ in range(args.txs)]
+
+    print(f"{'predicate':<24}{'reference/s':>14}{'compiled/s':>14}{'speedup':>9}")
+    for name, predicate in shapes.items():
+        reference = rate(lambda tx: tx_matches(predicate, tx), txs, args.rounds)
+        compiled = rate(compile_tx_predicate(predicate), txs, args.rounds)
+        print(
+            f"{name:<24}{reference:>14,.0f}{compiled:>14,.0f}"
+            f"{compiled / reference:>9.1f}"
+        )
+
+    # The universe's first 1000 payment credentials plus random ones nobody
+    # uses, so the index answers like the 1000-address union above
+    rng = random.Random(f"watched-{args.seed}")
+    watched = universe.payments[:1000] + [
+        rng.randbytes(28) for _ in range(args.watched - 1000)
+    ]
+    union = compile_tx_predicate(shapes["any_of 1000 addresses"])
+    print(f"\n{'address index':<24}{'keys':>14}{'matches/s':>14}")
+    for name, bloom_error_rate in (("hash sets", None), ("bloom + hash sets", 0.01)):
+        index = AddressIndex(payment_parts=watched, bloom_error_rate=bloom_error_rate)
+        assert all(index.matches(tx) == union(tx) for tx in txs)
+        print(
+            f"{name:<24}{len(index):>14,}{rate(index.matches, txs, args.rounds):>14,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
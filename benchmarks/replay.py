@@ -0,0 +1,128 @@
+"""Decode and consumer throughput replaying recorded traffic, without a network.
+
+Replays a `Recorder` file as fast as possible through the client methods
+that read it, on the blocking and asyncio paths, so the numbers only cover
+protobuf decoding, the client's wrappers and the consuming loop. Without
+`--recording`, traffic is first recorded from `benchmarks.server.FakeServer`.
+
+```sh
+python -m benchmarks.replay --rounds 5
+python -m benchmarks.replay --recording mainnet.rec
+```
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, AsyncIterable, Callable, Dict, Iterable
+
+from benchmarks.server import ChainData, FakeServer
+from utxorpc import (
+    CardanoPoint,
+    CardanoQueryClient,
+    CardanoSyncClient,
+    CardanoWatchClient,
+)
+from utxorpc.generics.replay import Recorder, Recording
+
+METHODS = {"FollowTip", "WatchTx", "DumpHistory", "SearchUtxos"}
+START = CardanoPoint(0, bytes(32))
+
+
+def record(path: str, args: argparse.Namespace) -> None:
+    data = ChainData(txs_per_block=args.txs_per_block)
+    with FakeServer(data, events=args.events, utxos_per_page=args.page) as uri:
+        with Recorder(path, methods=METHODS) as recorder:
+            sync = CardanoSyncClient(
+                uri, secure=False, interceptors=recorder.interceptors
+            )
+            query = CardanoQueryClient(
+                uri, secure=False, interceptors=recorder.interceptors
+            )
+            watch = CardanoWatchClient(
+                uri, secure=False, interceptors=recorder.interceptors
+            )
+            with sync.connect(), query.connect(), watch.connect():
+                for _ in sync.follow_tip(intersect=[]):
+                    pass
+                for _ in watch.watch_tx():
+                    pass
+                sync.dump_history(START, args.page)
+                query.search_utxos(None)
+
+
+def count(stream: Iterable[Any]) -> int:
+    return sum(1 for _ in stream)
+
+
+async def async_count(stream: AsyncIterable[Any]) -> int:
+    return sum([1 async for _ in stream])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording", help="replay this file instead of recording")
+    parser.add_argument("--rounds", type=int, default=3, help="replays per method")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--txs-per-block", type=int, default=10)
+    parser.add_argument("--page", type=int, default=100)
+    args = parser.parse_args()
+
+    path = args.recording
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".rec")
+        os.close(fd)
+        record(path, args)
+    recording = Recording.load(path)
+    if args.recording is None:
+        os.remove(path)
+
+    sync = CardanoSyncClient("replay", secure=False)
+    query = CardanoQueryClient("replay", secure=False)
+    watch = CardanoWatchClient("replay", secure=False)
+    blocking: Dict[str, Callable[[], int]] = {
+        "follow_tip": lambda: count(sync.follow_tip(intersect=[])),
+        "watch_tx": lambda: count(watch.watch_tx()),
+        "dump_history": lambda: len(sync.dump_history(START, None)),
+        "dump_history_raw": lambda: len(sync.dump_history_raw(START, None)),
+        "search_utxos": lambda: len(query.search_utxos(None)[0].items),
+    }
+    asynchronous: Dict[str, Callable[[], Any]] = {
+        "async_follow_tip": lambda: async_count(sync.async_follow_tip(intersect=[])),
+        "async_follow_tip_raw": lambda: async_count(
+            sync.async_follow_tip_raw(intersect=[])
+        ),
+        "async_watch_tx": lambda: async_count(watch.async_watch_tx()),
+        "async_watch_tx_raw": lambda: async_count(watch.async_watch_tx_raw()),
+    }
+
+    results: Dict[str, float] = {}
+    with recording.connect(sync, speed=None, loop=True):
+        with recording.connect(query, speed=None, loop=True):
+            with recording.connect(watch, speed=None, loop=True):
+                for name, run in blocking.items():
+                    start = time.perf_counter()
+                    items = sum(run() for _ in range(args.rounds))
+                    results[name] = items / (time.perf_counter() - start)
+
+    async def run_async() -> None:
+        async with recording.async_connect(sync, speed=None, loop=True):
+            async with recording.async_connect(watch, speed=None, loop=True):
+                for name, run in asynchronous.items():
+                    start = time.perf_counter()
+                    items = 0
+                    for _ in range(args.rounds):
+                        items += await run()
+                    results[name] = items / (time.perf_counter() - start)
+
+    asyncio.run(run_async())
+
+    print(f"{'method':<24}{'items/s':>12}")
+    for name, rate in results.items():
+        print(f"{name:<24}{rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
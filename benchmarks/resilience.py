@@ -0,0 +1,326 @@
+"""Follower correctness, recovery time and throughput under injected faults.
+
+Runs `follow_tip` and `watch_tx`, on the blocking and asyncio paths, against
+`benchmarks.simulator.ChainSimulator` in a set of fault scenarios. The
+followers here resume after stream resets from their most recent points,
+as an application would. Each run checks that:
+
+- the follower's final state matches the simulator's best chain,
+- reconnecting after a reset takes less than `--max-recovery` seconds,
+- fault-free scenarios reach `--min-rate` blocks per second.
+
+Exits with status 1 if any check fails.
+
+```sh
+python -m benchmarks.resilience
+python -m benchmarks.resilience --only resets rollbacks
+```
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import grpc
+
+from benchmarks.simulator import ChainSimulator, Faults, SimulatedChain
+from utxorpc import CardanoPoint, CardanoSyncClient, CardanoWatchClient
+from utxorpc.cardano import CardanoChain
+from utxorpc.generics.clients.sync import FollowTipResponseAction
+from utxorpc.generics.clients.watch import WatchTxResponseAction
+
+
+class Scenario:
+    faults: Callable[[], Faults]
+    consumer_delay: float
+    check_rate: bool
+
+    def __init__(
+        self,
+        faults: Callable[[], Faults],
+        consumer_delay: float = 0.0,
+        check_rate: bool = False,
+    ) -> None:
+        self.faults = faults
+        self.consumer_delay = consumer_delay
+        self.check_rate = check_rate
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "steady": Scenario(lambda: Faults(blocks=2000), check_rate=True),
+    "rollbacks": Scenario(
+        lambda: Faults(
+            blocks=600, block_interval=0.001, rollback_every=15, rollback_depth=(1, 5)
+        )
+    ),
+    "resets": Scenario(lambda: Faults(blocks=2000, reset_every=250)),
+    "latency_spikes": Scenario(lambda: Faults(blocks=1000, spike_every=250, spike=0.1)),
+    "slow_consumer": Scenario(
+        lambda: Faults(blocks=300, block_interval=0.001, rollback_every=25),
+        consumer_delay=0.002,
+    ),
+    "everything": Scenario(
+        lambda: Faults(
+            blocks=1000,
+            block_interval=0.0005,
+            rollback_every=20,
+            rollback_depth=(1, 6),
+            spike_every=300,
+            spike=0.05,
+            reset_every=200,
+        )
+    ),
+}
+
+
+class Run:
+    """What a follower saw; filled while it runs"""
+
+    def __init__(self, chain: SimulatedChain, consumer_delay: float) -> None:
+        self.chain = chain
+        self.consumer_delay = consumer_delay
+        self.events = 0
+        self.undos = 0
+        self.resets = 0
+        self.max_lag = 0
+        self.recoveries: List[float] = []
+        self._failed_at: Optional[float] = None
+
+    def received(self, height: int) -> None:
+        if self._failed_at is not None:
+            self.recoveries.append(time.monotonic() - self._failed_at)
+            self._failed_at = None
+        self.events += 1
+        self.max_lag = max(self.max_lag, self.chain.tip.header.height - height)
+
+    def failed(self, error: grpc.RpcError) -> None:
+        if error.code() != grpc.StatusCode.UNAVAILABLE:
+            raise error
+        self.resets += 1
+        self._failed_at = time.monotonic()
+
+
+class BlockFollower:
+    """Keeps the followed chain as a list of points, resuming from its tip"""
+
+    resume_points = 8
+
+    def __init__(self, run: Run) -> None:
+        self.run = run
+        self.points: List[CardanoPoint] = []
+
+    def intersect(self) -> List[CardanoPoint]:
+        return self.points[-self.resume_points :][::-1]
+
+    def handle(self, response: Any) -> None:
+        if response.action == FollowTipResponseAction.reset:
+            while self.points and self.points[-1] != response.point:
+                self.points.pop()
+            return
+        point = CardanoChain.block_to_point(response.block)
+        self.run.received(response.block.header.height)
+        if response.action == FollowTipResponseAction.apply:
+            self.points.append(point)
+        else:
+            assert self.points[-1] == point, "undo of a block that is not the tip"
+            self.points.pop()
+            self.run.undos += 1
+
+    def expected(self) -> List[CardanoPoint]:
+        return [CardanoChain.block_to_point(block) for block in self.run.chain.blocks]
+
+    def state(self) -> List[CardanoPoint]:
+        return self.points
+
+
+class TxFollower:
+    """Keeps the set of txs on the followed chain.
+
+    It resumes from the block before its last one, since a reset may cut a
+    block's txs short. `WatchTx` has no reset message, so the first block of
+    a resumed stream tells where the server found the intersection: blocks
+    kept at or above its height were either rolled back meanwhile or are
+    about to be sent again, and are dropped.
+    """
+
+    def __init__(self, run: Run) -> None:
+        self.run = run
+        self.txs: Set[bytes] = set()
+        # (height, point, tx hashes) of the blocks with txs seen so far
+        self.blocks: List[Tuple[int, CardanoPoint, List[bytes]]] = []
+        self._resumed = False
+
+    def intersect(self) -> List[CardanoPoint]:
+        self._resumed = True
+        return [point for _, point, _ in self.blocks[-2:-10:-1]]
+
+    def _truncate(self, height: int) -> None:
+        while self.blocks and self.blocks[-1][0] >= height:
+            self.txs.difference_update(self.blocks.pop()[2])
+
+    def handle(self, response: Any) -> None:
+        tx = response.tx.cardano
+        header = response.tx.block.cardano.header
+        point = CardanoPoint(header.slot, header.hash)
+        self.run.received(header.height)
+        if self._resumed:
+            self._truncate(header.height)
+            self._resumed = False
+        if response.action == WatchTxResponseAction.apply:
+            if not self.blocks or self.blocks[-1][1] != point:
+                self.blocks.append((header.height, point, []))
+            self.blocks[-1][2].append(tx.hash)
+            self.txs.add(tx.hash)
+        elif response.action == WatchTxResponseAction.undo:
+            assert self.blocks[-1][1] == point, "undo of a block that is not the tip"
+            self.blocks[-1][2].remove(tx.hash)
+            self.txs.discard(tx.hash)
+            self.run.undos += 1
+            if not self.blocks[-1][2]:
+                self.blocks.pop()
+
+    def expected(self) -> Set[bytes]:
+        return {tx.hash for block in self.run.chain.blocks for tx in block.body.tx}
+
+    def state(self) -> Set[bytes]:
+        return self.txs
+
+
+def follow_tip(uri: str, run: Run) -> BlockFollower:
+    follower = BlockFollower(run)
+    client = CardanoSyncClient(uri, secure=False)
+    with client.connect():
+        while True:
+            try:
+                for response in client.follow_tip(intersect=follower.intersect()):
+                    follower.handle(response)
+                    if run.consumer_delay:
+                        time.sleep(run.consumer_delay)
+                return follower
+            except grpc.RpcError as error:
+                run.failed(error)
+
+
+async def async_follow_tip(uri: str, run: Run) -> BlockFollower:
+    follower = BlockFollower(run)
+    client = CardanoSyncClient(uri, secure=False)
+    async with client.async_connect():
+        while True:
+            try:
+                async for response in client.async_follow_tip(
+                    intersect=follower.intersect()
+                ):
+                    follower.handle(response)
+                    if run.consumer_delay:
+                        await asyncio.sleep(run.consumer_delay)
+                return follower
+            except grpc.RpcError as error:
+                run.failed(error)
+
+
+def watch_tx(uri: str, run: Run) -> TxFollower:
+    follower = TxFollower(run)
+    client = CardanoWatchClient(uri, secure=False)
+    with client.connect():
+        while True:
+            try:
+                for response in client.watch_tx(intersect=follower.intersect()):
+                    follower.handle(response)
+                    if run.consumer_delay:
+                        time.sleep(run.consumer_delay)
+                return follower
+            except grpc.RpcError as error:
+                run.failed(error)
+
+
+async def async_watch_tx(uri: str, run: Run) -> TxFollower:
+    follower = TxFollower(run)
+    client = CardanoWatchClient(uri, secure=False)
+    async with client.async_connect():
+        while True:
+            try:
+                async for response in client.async_watch_tx(
+                    intersect=follower.intersect()
+                ):
+                    follower.handle(response)
+                    if run.consumer_delay:
+                        await asyncio.sleep(run.consumer_delay)
+                return follower
+            except grpc.RpcError as error:
+                run.failed(error)
+
+
+FOLLOWERS: Dict[str, Callable[[str, Run], Any]] = {
+    "follow_tip": follow_tip,
+    "async_follow_tip": lambda uri, run: asyncio.run(async_follow_tip(uri, run)),
+    "watch_tx": watch_tx,
+    "async_watch_tx": lambda uri, run: asyncio.run(async_watch_tx(uri, run)),
+}
+
+
+def check(
+    name: str, scenario: Scenario, method: str, args: argparse.Namespace
+) -> Dict[str, Any]:
+    simulator = ChainSimulator(scenario.faults())
+    run = Run(simulator.chain, scenario.consumer_delay)
+    with simulator as uri:
+        start = time.perf_counter()
+        follower = FOLLOWERS[method](uri, run)
+        elapsed = time.perf_counter() - start
+
+    chain = simulator.chain
+    failures = []
+    if follower.state() != follower.expected():
+        failures.append("state differs from the best chain")
+    if run.resets != simulator.servicer.resets:
+        failures.append(f"saw {run.resets} of {simulator.servicer.resets} resets")
+    recovery = max(run.recoveries, default=0.0)
+    if recovery > args.max_recovery:
+        failures.append(f"recovery took {recovery:.3f}s")
+    blocks_per_second = len(chain.blocks) / elapsed
+    if scenario.check_rate and blocks_per_second < args.min_rate:
+        failures.append(f"{blocks_per_second:.0f} blocks/s")
+
+    return {
+        "scenario": name,
+        "method": method,
+        "events": run.events,
+        "undos": run.undos,
+        "rollbacks": chain.rollbacks,
+        "resets": run.resets,
+        "max_recovery_ms": recovery * 1000,
+        "max_lag": run.max_lag,
+        "blocks_per_second": blocks_per_second,
+        "failures": failures,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), default=None)
+    parser.add_argument("--max-recovery", type=float, default=0.5, help="seconds")
+    parser.add_argument("--min-rate", type=float, default=500, help="blocks/s")
+    args = parser.parse_args()
+
+    print(
+        f"{'scenario':<16}{'method':<18}{'events':>8}{'undos':>7}{'resets':>8}"
+        f"{'recovery ms':>13}{'max lag':>9}{'blocks/s':>10}  result"
+    )
+    failed = False
+    for name in args.only or SCENARIOS:
+        for method in FOLLOWERS:
+            result = check(name, SCENARIOS[name], method, args)
+            failed = failed or bool(result["failures"])
+            print(
+                f"{name:<16}{method:<18}{result['events']:>8}{result['undos']:>7}"
+                f"{result['resets']:>8}{result['max_recovery_ms']:>13.1f}"
+                f"{result['max_lag']:>9}{result['blocks_per_second']:>10.0f}  "
+                + ("; ".join(result["failures"]) or "ok")
+            )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
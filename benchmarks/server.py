@@ -0,0 +1,320 @@
+"""In-process fake UTxO RPC server with synthetic Cardano data.
+
+`FakeServer` implements the Sync, Query, Submit and Watch services over a
+deterministic chain of synthetic blocks whose size is set by `ChainData`.
+Responses are built once and reused, so the server does as little work per
+message as possible; it still shares the interpreter with the clients, so
+results are best read as relative numbers between runs and commits.
+
+```python
+with FakeServer(ChainData(txs_per_block=50), events=10_000) as uri:
+    client = CardanoSyncClient(uri, secure=False)
+```
+"""
+
+import hashlib
+import random
+from concurrent import futures
+from typing import Iterator, List, Optional
+
+import grpc
+
+import utxorpc  # noqa: F401
+from utxorpc_spec.utxorpc.v1alpha.cardano import cardano_pb2  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.query import query_pb2, query_pb2_grpc  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.submit import submit_pb2, submit_pb2_grpc  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.sync import sync_pb2, sync_pb2_grpc  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.watch import watch_pb2, watch_pb2_grpc  # type: ignore
+
+SLOTS_PER_BLOCK = 20
+
+
+class ChainData:
+    """Deterministic synthetic blocks, txs and UTxOs of configurable size"""
+
+    def __init__(
+        self,
+        blocks: int = 256,
+        txs_per_block: int = 10,
+        outputs_per_tx: int = 2,
+        assets_per_output: int = 1,
+        datum_size: int = 0,
+        seed: int = 0,
+    ) -> None:
+        self.txs_per_block = txs_per_block
+        self.outputs_per_tx = outputs_per_tx
+        self.assets_per_output = assets_per_output
+        self.datum_size = datum_size
+        self.rng = random.Random(seed)
+        self.blocks: List[cardano_pb2.Block] = [
+            self.block(height) for height in range(blocks)
+        ]
+
+    def output(self) -> cardano_pb2.TxOutput:
+        output = cardano_pb2.TxOutput(
+            address=b"\x01" + self.rng.randbytes(56),
+            coin=cardano_pb2.BigInt(int=self.rng.randrange(1_000_000, 10**10)),
+            assets=[
+                cardano_pb2.Multiasset(
+                    policy_id=self.rng.randbytes(28),
+                    assets=[
+                        cardano_pb2.Asset(
+                            name=self.rng.randbytes(8),
+                            output_coin=cardano_pb2.BigInt(int=1),
+                        )
+                    ],
+                )
+                for _ in range(self.assets_per_output)
+            ],
+        )
+        if self.datum_size:
+            output.datum.hash = self.rng.randbytes(32)
+            output.datum.original_cbor = self.rng.randbytes(self.datum_size)
+        return output
+
+    def tx(self) -> cardano_pb2.Tx:
+        return cardano_pb2.Tx(
+            hash=self.rng.randbytes(32),
+            inputs=[
+                cardano_pb2.TxInput(tx_hash=self.rng.randbytes(32), output_index=0)
+            ],
+            outputs=[self.output() for _ in range(self.outputs_per_tx)],
+            fee=cardano_pb2.BigInt(int=self.rng.randrange(150_000, 500_000)),
+            successful=True,
+        )
+
+    def block(self, height: int) -> cardano_pb2.Block:
+        slot = (height + 1) * SLOTS_PER_BLOCK
+        return cardano_pb2.Block(
+            header=cardano_pb2.BlockHeader(
+                slot=slot, hash=self.rng.randbytes(32), height=height
+            ),
+            body=cardano_pb2.BlockBody(
+                tx=[self.tx() for _ in range(self.txs_per_block)]
+            ),
+            timestamp=1_700_000_000 + slot,
+        )
+
+    def txs(self) -> Iterator[cardano_pb2.Tx]:
+        for block in self.blocks:
+            yield from block.body.tx
+
+
+def tx_cbor(nonce: int, size: int = 0) -> bytes:
+    """A minimal Cardano tx `[{2: fee}, {}, true, aux]`, unique per `nonce`.
+
+    The fee carries the nonce so every tx has its own body hash; `size`
+    pads the auxiliary data with a byte string.
+    """
+    body = b"\xa1\x02\x1b" + nonce.to_bytes(8, "big")
+    if size <= 0:
+        aux = b"\xf6"
+    elif size < 24:
+        aux = bytes([0x40 | size]) + bytes(size)
+    else:
+        aux = b"\x5a" + size.to_bytes(4, "big") + bytes(size)
+    return b"\x84" + body + b"\xa0\xf5" + aux
+
+
+class FakeServicer(
+    sync_pb2_grpc.SyncServiceServicer,
+    query_pb2_grpc.QueryServiceServicer,
+    submit_pb2_grpc.SubmitServiceServicer,
+    watch_pb2_grpc.WatchServiceServicer,
+):
+    """Serves `data`; streaming methods send `events` messages and end"""
+
+    def __init__(self, data: ChainData, events: int, utxos_per_page: int) -> None:
+        self.data = data
+        self.events = events
+        self.utxos_per_page = utxos_per_page
+        self.any_blocks = [
+            sync_pb2.AnyChainBlock(cardano=block) for block in data.blocks
+        ]
+        tip = data.blocks[-1].header
+        self.tip = sync_pb2.BlockRef(slot=tip.slot, hash=tip.hash, height=tip.height)
+        self.chain_point = query_pb2.ChainPoint(
+            slot=tip.slot, hash=tip.hash, height=tip.height
+        )
+
+        self.follow_tip = [
+            sync_pb2.FollowTipResponse(apply=block) for block in self.any_blocks
+        ]
+        self.watch_tx = []
+        self.mempool = []
+        for block in data.blocks:
+            # Txs carry their block's header only, as a server would to
+            # avoid resending the body with every tx
+            header_only = watch_pb2.AnyChainBlock(
+                cardano=cardano_pb2.Block(header=block.header)
+            )
+            for tx in block.body.tx:
+                self.watch_tx.append(
+                    watch_pb2.WatchTxResponse(
+                        apply=watch_pb2.AnyChainTx(cardano=tx, block=header_only)
+                    )
+                )
+                self.mempool.append(
+                    submit_pb2.WatchMempoolResponse(
+                        tx=submit_pb2.TxInMempool(
+                            ref=tx.hash,
+                            native_bytes=tx_cbor(len(self.mempool)),
+                            stage=submit_pb2.STAGE_MEMPOOL,
+                            cardano=tx,
+                        )
+                    )
+                )
+
+        outputs = [output for tx in data.txs() for output in tx.outputs]
+        self.outputs = outputs or [cardano_pb2.TxOutput()]
+        self.params = query_pb2.ReadParamsResponse(
+            values=query_pb2.AnyChainParams(
+                cardano=cardano_pb2.PParams(
+                    coins_per_utxo_byte=cardano_pb2.BigInt(int=4310),
+                    max_tx_size=16384,
+                    min_fee_coefficient=cardano_pb2.BigInt(int=44),
+                    min_fee_constant=cardano_pb2.BigInt(int=155381),
+                    max_block_body_size=90112,
+                    max_block_header_size=1100,
+                )
+            ),
+            ledger_tip=self.chain_point,
+        )
+
+    def _stream(self, messages: List) -> Iterator:
+        for index in range(self.events):
+            yield messages[index % len(messages)]
+
+    def _index(self, slot: int) -> int:
+        return (slot // SLOTS_PER_BLOCK - 1) % len(self.any_blocks)
+
+    # Sync
+
+    def FetchBlock(self, request, context):
+        return sync_pb2.FetchBlockResponse(
+            block=[self.any_blocks[self._index(ref.slot)] for ref in request.ref]
+        )
+
+    def DumpHistory(self, request, context):
+        start = self._index(request.start_token.slot) if request.start_token.slot else 0
+        count = request.max_items or len(self.any_blocks)
+        blocks = [
+            self.any_blocks[(start + offset) % len(self.any_blocks)]
+            for offset in range(count)
+        ]
+        header = blocks[-1].cardano.header
+        return sync_pb2.DumpHistoryResponse(
+            block=blocks,
+            next_token=sync_pb2.BlockRef(
+                slot=header.slot + SLOTS_PER_BLOCK, height=header.height + 1
+            ),
+        )
+
+    def FollowTip(self, request, context):
+        return self._stream(self.follow_tip)
+
+    def ReadTip(self, request, context):
+        return sync_pb2.ReadTipResponse(tip=self.tip)
+
+    # Query
+
+    def _utxo(self, ref: query_pb2.TxoRef) -> query_pb2.AnyUtxoData:
+        index = int.from_bytes(ref.hash[:4], "big") + ref.index
+        return query_pb2.AnyUtxoData(
+            txo_ref=ref, cardano=self.outputs[index % len(self.outputs)]
+        )
+
+    def ReadUtxos(self, request, context):
+        return query_pb2.ReadUtxosResponse(
+            items=[self._utxo(ref) for ref in request.keys],
+            ledger_tip=self.chain_point,
+        )
+
+    def SearchUtxos(self, request, context):
+        start = int(request.start_token or 0)
+        count = request.max_items or self.utxos_per_page
+        return query_pb2.SearchUtxosResponse(
+            items=[
+                query_pb2.AnyUtxoData(
+                    txo_ref=query_pb2.TxoRef(
+                        hash=(start + offset).to_bytes(32, "big"), index=0
+                    ),
+                    cardano=self.outputs[(start + offset) % len(self.outputs)],
+                )
+                for offset in range(count)
+            ],
+            ledger_tip=self.chain_point,
+            next_token=str(start + count),
+        )
+
+    def ReadParams(self, request, context):
+        return self.params
+
+    # Submit
+
+    def SubmitTx(self, request, context):
+        return submit_pb2.SubmitTxResponse(
+            ref=hashlib.blake2b(request.tx.raw, digest_size=32).digest()
+        )
+
+    def WaitForTx(self, request, context):
+        refs = list(request.ref) or [b""]
+        for index in range(self.events):
+            yield submit_pb2.WaitForTxResponse(
+                ref=refs[index % len(refs)], stage=submit_pb2.STAGE_CONFIRMED
+            )
+
+    def ReadMempool(self, request, context):
+        return submit_pb2.ReadMempoolResponse(
+            items=[response.tx for response in self.mempool[: self.utxos_per_page]]
+        )
+
+    def WatchMempool(self, request, context):
+        return self._stream(self.mempool)
+
+    # Watch
+
+    def WatchTx(self, request, context):
+        return self._stream(self.watch_tx)
+
+
+class FakeServer:
+    """Run a `FakeServicer` on a local port; use as a context manager"""
+
+    def __init__(
+        self,
+        data: Optional[ChainData] = None,
+        events: int = 10_000,
+        utxos_per_page: int = 100,
+        max_workers: int = 8,
+    ) -> None:
+        self.servicer = FakeServicer(data or ChainData(), events, utxos_per_page)
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        sync_pb2_grpc.add_SyncServiceServicer_to_server(self.servicer, self.server)
+        query_pb2_grpc.add_QueryServiceServicer_to_server(self.servicer, self.server)
+        submit_pb2_grpc.add_SubmitServiceServicer_to_server(self.servicer, self.server)
+        watch_pb2_grpc.add_WatchServiceServicer_to_server(self.servicer, self.server)
+        self.uri: Optional[str] = None
+
+    def start(self) -> str:
+        port = self.server.add_insecure_port("127.0.0.1:0")
+        self.server.start()
+        self.uri = f"127.0.0.1:{port}"
+        return self.uri
+
+    def stop(self) -> None:
+        self.server.stop(None)
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+__all__ = [
+    "ChainData",
+    "FakeServer",
+    "FakeServicer",
+    "tx_cbor",
+]
@@ -0,0 +1,319 @@
+"""Chain simulator server that forks and misbehaves on purpose.
+
+`ChainSimulator` grows a synthetic chain in a background thread and serves
+it through `SyncService` and `WatchService` with the faults set in
+`Faults`: rollbacks of configurable depth, latency spikes and streams that
+are reset mid-flight. Every stream follows the live chain like a real node
+would, so a stream that falls behind never sees blocks that were rolled
+back before it reached them, and one at the tip gets `undo`s for them.
+
+Once the chain has produced all its blocks, streams end (with status OK)
+as soon as they are at the tip, so a follower knows when it is done.
+FollowTip applies the request's field mask to each block.
+
+```python
+with ChainSimulator(Faults(rollback_every=20, reset_every=500)) as uri:
+    client = CardanoSyncClient(uri, secure=False)
+```
+"""
+
+import random
+import threading
+import time
+from concurrent import futures
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import grpc
+
+from benchmarks.server import ChainData
+from utxorpc.cardano import CardanoChain
+from utxorpc_spec.utxorpc.v1alpha.cardano import cardano_pb2  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.sync import sync_pb2, sync_pb2_grpc  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.watch import watch_pb2, watch_pb2_grpc  # type: ignore
+
+
+class Faults:
+    """What the simulated chain and server do; every fault is off by default"""
+
+    blocks: int
+    block_interval: float
+    txs_per_block: int
+    rollback_every: int
+    rollback_depth: Tuple[int, int]
+    spike_every: int
+    spike: float
+    reset_every: int
+    seed: int
+
+    def __init__(
+        self,
+        blocks: int = 1000,
+        block_interval: float = 0.0,
+        txs_per_block: int = 2,
+        rollback_every: int = 0,
+        rollback_depth: Tuple[int, int] = (1, 3),
+        spike_every: int = 0,
+        spike: float = 0.2,
+        reset_every: int = 0,
+        seed: int = 0,
+    ) -> None:
+        """
+        `blocks` blocks are produced, one every `block_interval` seconds.
+        Every `rollback_every` blocks the chain first drops between
+        `rollback_depth[0]` and `rollback_depth[1]` blocks. Streams stall for
+        `spike` seconds every `spike_every` messages and are aborted with
+        `UNAVAILABLE` after `reset_every` messages.
+        """
+        self.blocks = blocks
+        self.block_interval = block_interval
+        self.txs_per_block = txs_per_block
+        self.rollback_every = rollback_every
+        self.rollback_depth = rollback_depth
+        self.spike_every = spike_every
+        self.spike = spike
+        self.reset_every = reset_every
+        self.seed = seed
+
+
+class SimulatedChain:
+    """The best chain, changed by a producer thread and read by streams"""
+
+    def __init__(self, faults: Faults) -> None:
+        self.faults = faults
+        self.data = ChainData(blocks=0, txs_per_block=faults.txs_per_block)
+        self.rng = random.Random(faults.seed)
+        self.blocks: List[cardano_pb2.Block] = [self._block(None)]
+        # hash -> index in `blocks`, for blocks on the best chain only
+        self.index: Dict[bytes, int] = {self.blocks[0].header.hash: 0}
+        self.produced = 0
+        self.rollbacks = 0
+        self.rolled_back = 0
+        self.done = False
+        self.condition = threading.Condition()
+
+    def _block(self, parent: Optional[cardano_pb2.Block]) -> cardano_pb2.Block:
+        slot = parent.header.slot + self.rng.randint(1, 40) if parent else 0
+        height = parent.header.height + 1 if parent else 0
+        return cardano_pb2.Block(
+            header=cardano_pb2.BlockHeader(
+                slot=slot, hash=self.rng.randbytes(32), height=height
+            ),
+            body=cardano_pb2.BlockBody(
+                tx=[self.data.tx() for _ in range(self.faults.txs_per_block)]
+            ),
+        )
+
+    def _step(self) -> None:
+        faults = self.faults
+        with self.condition:
+            if (
+                faults.rollback_every
+                and self.produced
+                and self.produced % faults.rollback_every == 0
+            ):
+                depth = min(
+                    self.rng.randint(*faults.rollback_depth), len(self.blocks) - 1
+                )
+                for block in self.blocks[-depth:]:
+                    del self.index[block.header.hash]
+                del self.blocks[-depth:]
+                self.rollbacks += 1
+                self.rolled_back += depth
+            block = self._block(self.blocks[-1])
+            self.index[block.header.hash] = len(self.blocks)
+            self.blocks.append(block)
+            self.produced += 1
+            self.done = self.produced >= faults.blocks
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        while not self.done:
+            self._step()
+            if self.faults.block_interval:
+                time.sleep(self.faults.block_interval)
+
+    @property
+    def tip(self) -> cardano_pb2.Block:
+        return self.blocks[-1]
+
+    def intersect(self, refs: List[Tuple[int, bytes]]) -> Optional[int]:
+        """Index of the most recent of `refs` on the best chain"""
+        found = [self.index[hash] for _, hash in refs if hash in self.index]
+        return max(found) if found else None
+
+
+class _Cursor:
+    """What one stream has sent, diffed against the chain to find undos"""
+
+    def __init__(self, chain: SimulatedChain, start: int) -> None:
+        self.chain = chain
+        self.sent: List[cardano_pb2.Block] = chain.blocks[: start + 1]
+
+    def changes(self) -> Iterator[Tuple[str, cardano_pb2.Block]]:
+        """`("undo" | "apply", block)` pairs to bring the stream to the tip.
+
+        Must be called holding the chain's condition.
+        """
+        chain = self.chain
+        while self.sent and self.sent[-1].header.hash not in chain.index:
+            yield "undo", self.sent.pop()
+        for block in chain.blocks[len(self.sent) :]:
+            self.sent.append(block)
+            yield "apply", block
+
+    @property
+    def at_tip(self) -> bool:
+        return (
+            bool(self.sent) and self.sent[-1].header.hash == self.chain.tip.header.hash
+        )
+
+
+class SimulatorServicer(
+    sync_pb2_grpc.SyncServiceServicer, watch_pb2_grpc.WatchServiceServicer
+):
+    def __init__(self, chain: SimulatedChain) -> None:
+        self.chain = chain
+        self.resets = 0
+        self.spikes = 0
+        self._lock = threading.Lock()
+
+    def _start(self, refs: List[Tuple[int, bytes]], context) -> int:
+        """Index of the last block the stream starts after; -1 for genesis"""
+        if not refs:
+            return -1
+        with self.chain.condition:
+            start = self.chain.intersect(refs)
+        if start is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "No intersection found")
+        return start  # type: ignore[return-value]
+
+    def _follow(
+        self, cursor: _Cursor, context
+    ) -> Iterator[Tuple[str, cardano_pb2.Block]]:
+        """Changes for one stream, with the configured faults injected"""
+        faults = self.chain.faults
+        sent = 0
+        while True:
+            with self.chain.condition:
+                self.chain.condition.wait_for(
+                    lambda: self.chain.done or not cursor.at_tip, timeout=1.0
+                )
+                changes = list(cursor.changes())
+                finished = self.chain.done and cursor.at_tip
+            for change in changes:
+                sent += 1
+                if faults.spike_every and sent % faults.spike_every == 0:
+                    with self._lock:
+                        self.spikes += 1
+                    time.sleep(faults.spike)
+                yield change
+                if faults.reset_every and sent % faults.reset_every == 0:
+                    with self._lock:
+                        self.resets += 1
+                    context.abort(grpc.StatusCode.UNAVAILABLE, "Injected stream reset")
+            if finished:
+                return
+
+    # Sync
+
+    def FollowTip(self, request, context):
+        start = self._start(
+            [(ref.slot, ref.hash) for ref in request.intersect], context
+        )
+        cursor = _Cursor(self.chain, start)
+        if request.intersect:
+            header = cursor.sent[-1].header
+            yield sync_pb2.FollowTipResponse(
+                reset=sync_pb2.BlockRef(
+                    slot=header.slot, hash=header.hash, height=header.height
+                )
+            )
+        for action, block in self._follow(cursor, context):
+            if request.HasField("field_mask"):
+                # Masks apply to the chain's block, e.g. `header`
+                masked = cardano_pb2.Block()
+                request.field_mask.MergeMessage(block, masked)
+                block = masked
+            any_block = sync_pb2.AnyChainBlock(cardano=block)
+            if action == "apply":
+                yield sync_pb2.FollowTipResponse(apply=any_block)
+            else:
+                yield sync_pb2.FollowTipResponse(undo=any_block)
+
+    def ReadTip(self, request, context):
+        with self.chain.condition:
+            header = self.chain.tip.header
+        return sync_pb2.ReadTipResponse(
+            tip=sync_pb2.BlockRef(
+                slot=header.slot, hash=header.hash, height=header.height
+            )
+        )
+
+    def FetchBlock(self, request, context):
+        blocks = []
+        with self.chain.condition:
+            for ref in request.ref:
+                index = self.chain.index.get(ref.hash)
+                if index is None:
+                    context.abort(grpc.StatusCode.NOT_FOUND, "Block not on the chain")
+                blocks.append(sync_pb2.AnyChainBlock(cardano=self.chain.blocks[index]))
+        return sync_pb2.FetchBlockResponse(block=blocks)
+
+    # Watch
+
+    def WatchTx(self, request, context):
+        start = self._start(
+            [(ref.slot, ref.hash) for ref in request.intersect], context
+        )
+        matches = (
+            CardanoChain.compile_tx_predicate(request.predicate)
+            if request.HasField("predicate")
+            else None
+        )
+        for action, block in self._follow(_Cursor(self.chain, start), context):
+            header_only = watch_pb2.AnyChainBlock(
+                cardano=cardano_pb2.Block(header=block.header)
+            )
+            txs = block.body.tx if action == "apply" else reversed(block.body.tx)
+            for tx in txs:
+                if matches is not None and not matches(tx):
+                    continue
+                any_tx = watch_pb2.AnyChainTx(cardano=tx, block=header_only)
+                if action == "apply":
+                    yield watch_pb2.WatchTxResponse(apply=any_tx)
+                else:
+                    yield watch_pb2.WatchTxResponse(undo=any_tx)
+
+
+class ChainSimulator:
+    """Run a simulated chain and its server; use as a context manager"""
+
+    def __init__(self, faults: Optional[Faults] = None, max_workers: int = 16) -> None:
+        self.chain = SimulatedChain(faults or Faults())
+        self.servicer = SimulatorServicer(self.chain)
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        sync_pb2_grpc.add_SyncServiceServicer_to_server(self.servicer, self.server)
+        watch_pb2_grpc.add_WatchServiceServicer_to_server(self.servicer, self.server)
+        self._producer = threading.Thread(target=self.chain.run, daemon=True)
+
+    def start(self) -> str:
+        port = self.server.add_insecure_port("127.0.0.1:0")
+        self.server.start()
+        self._producer.start()
+        return f"127.0.0.1:{port}"
+
+    def stop(self) -> None:
+        self.server.stop(None)
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+__all__ = [
+    "ChainSimulator",
+    "Faults",
+    "SimulatedChain",
+]
@@ -0,0 +1,81 @@
+"""Stage breakdown of the async followers, and what profiling them costs.
+
+Streams `async_follow_tip` and `async_watch_tx` from
+`benchmarks.server.FakeServer` with a `StageProfiler` attached and prints
+its report. `--work` makes the consumer spin for that many microseconds per
+message, to see it show up in the `consumer` stage. Each method is also run
+with no profiler and with a disabled one, to measure the overhead.
+
+```sh
+python -m benchmarks.stages --events 20000 --work 50
+```
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, AsyncIterable, Callable, Dict, Optional
+
+from benchmarks.server import ChainData, FakeServer
+from utxorpc import CardanoSyncClient, CardanoWatchClient
+from utxorpc.generics.profiler import StageProfiler
+
+
+async def consume(stream: AsyncIterable[Any], work: float) -> int:
+    count = 0
+    async for _ in stream:
+        count += 1
+        if work:
+            until = time.perf_counter() + work
+            while time.perf_counter() < until:
+                pass
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--txs-per-block", type=int, default=10)
+    parser.add_argument("--work", type=float, default=0, help="us per message")
+    args = parser.parse_args()
+
+    data = ChainData(txs_per_block=args.txs_per_block)
+    profiler = StageProfiler()
+    rates: Dict[str, Dict[str, float]] = {}
+
+    async def run(uri: str) -> None:
+        sync = CardanoSyncClient(uri, secure=False)
+        watch = CardanoWatchClient(uri, secure=False)
+        streams: Dict[str, Callable[[], AsyncIterable[Any]]] = {
+            "async_follow_tip": lambda: sync.async_follow_tip(intersect=[]),
+            "async_watch_tx": watch.async_watch_tx,
+        }
+        modes: Dict[str, Optional[StageProfiler]] = {
+            "off": None,
+            "disabled": StageProfiler(enabled=False),
+            "enabled": profiler,
+        }
+        async with sync.async_connect(), watch.async_connect():
+            for name, stream in streams.items():
+                rates[name] = {}
+                for mode, attached in modes.items():
+                    sync.profiler = watch.profiler = attached
+                    start = time.perf_counter()
+                    count = await consume(stream(), args.work / 1e6)
+                    rates[name][mode] = count / (time.perf_counter() - start)
+
+    with FakeServer(data, events=args.events) as uri:
+        asyncio.run(run(uri))
+
+    print(profiler.report())
+    print()
+    print(f"{'method':<20}{'off/s':>10}{'disabled/s':>12}{'enabled/s':>11}")
+    for name, by_mode in rates.items():
+        print(
+            f"{name:<20}{by_mode['off']:>10.0f}{by_mode['disabled']:>12.0f}"
+            f"{by_mode['enabled']:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Per-event overhead of the sync and async streaming APIs.
+
+Starts `benchmarks.server.FakeServer`, which streams synthetic messages as
+fast as it can, and measures how long each client method takes per event,
+on both the blocking and the asyncio paths.
+
+```sh
+python -m benchmarks.streams --events 20000
+```
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, AsyncIterable, Callable, Dict, Iterable
+
+from benchmarks.server import ChainData, FakeServer
+from utxorpc import CardanoSubmitClient, CardanoSyncClient, CardanoWatchClient
+
+
+def consume(stream: Iterable[Any]) -> int:
+    count = 0
+    for _ in stream:
+        count += 1
+    return count
+
+
+async def async_consume(stream: AsyncIterable[Any]) -> int:
+    count = 0
+    async for _ in stream:
+        count += 1
+    return count
+
+
+def summarize(count: int, elapsed: float) -> Dict[str, float]:
+    return {
+        "events": count,
+        "seconds": elapsed,
+        "events_per_second": count / elapsed,
+        "us_per_event": elapsed / count * 1e6,
+    }
+
+
+def measure(run: Callable[[], int]) -> Dict[str, float]:
+    start = time.perf_counter()
+    count = run()
+    return summarize(count, time.perf_counter() - start)
+
+
+async def async_measure(
+    stream: Callable[[], AsyncIterable[Any]],
+) -> Dict[str, float]:
+    start = time.perf_counter()
+    count = await async_consume(stream())
+    return summarize(count, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--txs", type=int, default=10, help="txs per block")
+    args = parser.parse_args()
+
+    server = FakeServer(
+        ChainData(
+            blocks=1, txs_per_block=args.txs, outputs_per_tx=1, assets_per_output=0
+        ),
+        events=args.events,
+    )
+    uri = server.start()
+
+    sync_client = CardanoSyncClient(uri, secure=False)
+    watch_client = CardanoWatchClient(uri, secure=False)
+    submit_client = CardanoSubmitClient(uri, secure=False)
+    results: Dict[str, Dict[str, float]] = {}
+
+    with sync_client.connect(), watch_client.connect(), submit_client.connect():
+        results["follow_tip"] = measure(
+            lambda: consume(sync_client.follow_tip(intersect=[]))
+        )
+        results["watch_tx"] = measure(lambda: consume(watch_client.watch_tx()))
+        results["watch_mempool"] = measure(
+            lambda: consume(submit_client.watch_mempool())
+        )
+        results["wait_for_tx"] = measure(
+            lambda: consume(submit_client.wait_for_tx(b"\x00" * 32))
+        )
+
+    async def run_async() -> None:
+        async with sync_client.async_connect(), watch_client.async_connect():
+            async with submit_client.async_connect():
+                for name, stream in (
+                    ("follow_tip", lambda: sync_client.async_follow_tip(intersect=[])),
+                    ("watch_tx", watch_client.async_watch_tx),
+                    ("watch_mempool", submit_client.async_watch_mempool),
+                    (
+                        "wait_for_tx",
+                        lambda: submit_client.async_wait_for_tx(b"\x00" * 32),
+                    ),
+                ):
+                    results[f"async_{name}"] = await async_measure(stream)
+
+    asyncio.run(run_async())
+    server.stop()
+
+    print(f"{'method':<16}{'sync us/event':>16}{'async us/event':>16}{'ratio':>8}")
+    for name in ("follow_tip", "watch_tx", "watch_mempool", "wait_for_tx"):
+        sync_us = results[name]["us_per_event"]
+        async_us = results[f"async_{name}"]["us_per_event"]
+        print(f"{name:<16}{sync_us:>16.1f}{async_us:>16.1f}{async_us / sync_us:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""Throughput and latency of every client method against a fake server.
+
+Runs each Sync, Query, Submit and Watch client method on the blocking and
+the asyncio paths against `benchmarks.server.FakeServer`. Unary methods
+report per-call latency; streams report the gap between messages as seen by
+the consumer. Results can be written as JSON and compared with an earlier
+run, e.g. one made on another commit.
+
+```sh
+python -m benchmarks.suite --output before.json
+git checkout my-branch
+python -m benchmarks.suite --output after.json --compare before.json
+```
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack, ExitStack
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List
+
+import grpc
+from google.protobuf import __version__ as protobuf_version
+
+from benchmarks.server import ChainData, FakeServer, tx_cbor
+from utxorpc import (
+    CardanoPoint,
+    CardanoQueryClient,
+    CardanoSubmitClient,
+    CardanoSyncClient,
+    CardanoWatchClient,
+)
+from utxorpc.generics.metrics import Metrics
+from utxorpc_spec.utxorpc.v1alpha.query.query_pb2 import TxoRef  # type: ignore
+
+Result = Dict[str, Any]
+
+
+def summarize(kind: str, samples: List[float], items: int, elapsed: float) -> Result:
+    """Latency percentiles of `samples` (seconds) and items per second"""
+    ordered = sorted(samples)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1e6
+
+    return {
+        "kind": kind,
+        "calls": len(samples),
+        "items": items,
+        "seconds": elapsed,
+        "items_per_second": items / elapsed,
+        "mean_us": sum(ordered) / len(ordered) * 1e6,
+        "p50_us": percentile(0.50),
+        "p90_us": percentile(0.90),
+        "p99_us": percentile(0.99),
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def run_unary(call: Callable[[], Any], calls: int, items_per_call: int) -> Result:
+    for _ in range(min(calls, 10)):
+        call()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        begin = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    return summarize("unary", samples, calls * items_per_call, elapsed)
+
+
+def run_stream(stream: Callable[[], Iterable[Any]]) -> Result:
+    samples = []
+    start = last = time.perf_counter()
+    for _ in stream():
+        now = time.perf_counter()
+        samples.append(now - last)
+        last = now
+    return summarize("stream", samples, len(samples), last - start)
+
+
+async def async_run_unary(
+    call: Callable[[], Awaitable[Any]], calls: int, items_per_call: int
+) -> Result:
+    for _ in range(min(calls, 10)):
+        await call()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        begin = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    return summarize("unary", samples, calls * items_per_call, elapsed)
+
+
+async def async_run_stream(stream: Callable[[], AsyncIterable[Any]]) -> Result:
+    samples = []
+    start = last = time.perf_counter()
+    async for _ in stream():
+        now = time.perf_counter()
+        samples.append(now - last)
+        last = now
+    return summarize("stream", samples, len(samples), last - start)
+
+
+async def async_collect(stream: AsyncIterable[Any]) -> List[Any]:
+    return [item async for item in stream]
+
+
+class Suite:
+    """The benchmark cases, bound to clients connected to one server"""
+
+    def __init__(self, uri: str, data: ChainData, args: argparse.Namespace) -> None:
+        self.args = args
+        interceptors = Metrics().interceptors if args.metrics else None
+        self.sync = CardanoSyncClient(uri, secure=False, interceptors=interceptors)
+        self.query = CardanoQueryClient(uri, secure=False, interceptors=interceptors)
+        self.submit = CardanoSubmitClient(uri, secure=False, interceptors=interceptors)
+        self.watch = CardanoWatchClient(uri, secure=False, interceptors=interceptors)
+        self.point = CardanoPoint(
+            data.blocks[0].header.slot, data.blocks[0].header.hash
+        )
+        self.keys = [
+            TxoRef(hash=tx.hash, index=0)
+            for tx in itertools.islice(data.txs(), args.batch)
+        ]
+        # Every submitted tx is new, or the client would answer from its cache
+        self.nonces = itertools.count()
+
+    def txs(self, count: int) -> List[bytes]:
+        return [tx_cbor(next(self.nonces), self.args.tx_size) for _ in range(count)]
+
+    def unary_cases(self) -> Dict[str, Any]:
+        """name -> (blocking call, async call, items per call)"""
+        args = self.args
+        sync, query, submit = self.sync, self.query, self.submit
+        point = self.point
+        return {
+            "read_tip": (sync.read_tip, sync.async_read_tip, 1),
+            "fetch_block": (
+                lambda: sync.fetch_block([point]),
+                lambda: sync.async_fetch_block([point]),
+                1,
+            ),
+            "fetch_block_raw": (
+                lambda: sync.fetch_block_raw([point]),
+                lambda: sync.async_fetch_block_raw([point]),
+                1,
+            ),
+            "dump_history": (
+                lambda: sync.dump_history(point, args.page),
+                lambda: sync.async_dump_history(point, args.page),
+                args.page,
+            ),
+            "dump_history_raw": (
+                lambda: sync.dump_history_raw(point, args.page),
+                lambda: sync.async_dump_history_raw(point, args.page),
+                args.page,
+            ),
+            "read_utxos": (
+                lambda: query.read_utxos(self.keys),
+                lambda: query.async_read_utxos(self.keys),
+                len(self.keys),
+            ),
+            "search_utxos": (
+                lambda: query.search_utxos(None),
+                lambda: async_collect(query.async_search_utxos(None)),
+                args.page,
+            ),
+            "read_params": (query.read_params, query.async_read_params, 1),
+            "submit_tx": (
+                lambda: submit.submit_tx(self.txs(1)[0]),
+                lambda: submit.async_submit_tx(self.txs(1)[0]),
+                1,
+            ),
+            "submit_many": (
+                lambda: submit.submit_many(self.txs(args.batch)),
+                lambda: submit.async_submit_many(self.txs(args.batch)),
+                args.batch,
+            ),
+        }
+
+    def stream_cases(self) -> Dict[str, Any]:
+        """name -> (blocking stream or None, async stream)"""
+        sync, submit, watch = self.sync, self.submit, self.watch
+        ref = b"\x00" * 32
+        return {
+            "follow_tip": (
+                lambda: sync.follow_tip(intersect=[]),
+                lambda: sync.async_follow_tip(intersect=[]),
+            ),
+            "follow_tip_raw": (None, lambda: sync.async_follow_tip_raw(intersect=[])),
+            "follow_tip_buffered": (
+                None,
+                lambda: sync.async_follow_tip_buffered(intersect=[]),
+            ),
+            "watch_tx": (watch.watch_tx, watch.async_watch_tx),
+            "watch_tx_raw": (None, watch.async_watch_tx_raw),
+            "watch_tx_buffered": (None, watch.async_watch_tx_buffered),
+            "watch_mempool": (submit.watch_mempool, submit.async_watch_mempool),
+            "watch_mempool_buffered": (None, submit.async_watch_mempool_buffered),
+            "wait_for_tx": (
+                lambda: submit.wait_for_tx(ref),
+                lambda: submit.async_wait_for_tx(ref),
+            ),
+        }
+
+    def selected(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.args.only)
+
+    def run(self) -> Dict[str, Result]:
+        results: Dict[str, Result] = {}
+        clients = (self.sync, self.query, self.submit, self.watch)
+        calls = self.args.calls
+
+        with ExitStack() as stack:
+            for client in clients:
+                stack.enter_context(client.connect())
+            for name, (call, _, items) in self.unary_cases().items():
+                if self.selected(name):
+                    results[name] = run_unary(call, calls, items)
+            for name, (stream, _) in self.stream_cases().items():
+                if stream is not None and self.selected(name):
+                    results[name] = run_stream(stream)
+
+        async def run_async() -> None:
+            async with AsyncExitStack() as stack:
+                for client in clients:
+                    await stack.enter_async_context(client.async_connect())
+                for name, (_, call, items) in self.unary_cases().items():
+                    if self.selected(f"async_{name}"):
+                        results[f"async_{name}"] = await async_run_unary(
+                            call, calls, items
+                        )
+                for name, (_, stream) in self.stream_cases().items():
+                    if self.selected(f"async_{name}"):
+                        results[f"async_{name}"] = await async_run_stream(stream)
+
+        asyncio.run(run_async())
+        return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def report(results: Dict[str, Result], baseline: Dict[str, Result]) -> None:
+    header = f"{'method':<30}{'items/s':>12}{'p50 us':>10}{'p99 us':>10}"
+    if baseline:
+        header += f"{'items/s Δ':>12}{'p50 Δ':>9}{'p99 Δ':>9}"
+    print(header)
+
+    def change(new: float, old: float) -> str:
+        return f"{(new / old - 1) * 100:+.0f}%" if old else "n/a"
+
+    for name, result in results.items():
+        line = (
+            f"{name:<30}{result['items_per_second']:>12.0f}"
+            f"{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}"
+        )
+        old = baseline.get(name)
+        if old:
+            line += (
+                f"{change(result['items_per_second'], old['items_per_second']):>12}"
+                f"{change(result['p50_us'], old['p50_us']):>9}"
+                f"{change(result['p99_us'], old['p99_us']):>9}"
+            )
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500, help="calls per unary case")
+    parser.add_argument("--events", type=int, default=5000, help="messages per stream")
+    parser.add_argument("--blocks", type=int, default=256, help="distinct blocks")
+    parser.add_argument("--txs-per-block", type=int, default=10)
+    parser.add_argument("--outputs-per-tx", type=int, default=2)
+    parser.add_argument("--assets-per-output", type=int, default=1)
+    parser.add_argument("--datum-size", type=int, default=0, help="bytes per datum")
+    parser.add_argument("--tx-size", type=int, default=0, help="padding per tx")
+    parser.add_argument("--page", type=int, default=100, help="blocks/utxos per page")
+    parser.add_argument("--batch", type=int, default=50, help="keys/txs per batch")
+    parser.add_argument(
+        "--only", nargs="+", default=["*"], help="case name patterns, e.g. 'async_*'"
+    )
+    parser.add_argument(
+        "--metrics", action="store_true", help="install the metrics interceptors"
+    )
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    data = ChainData(
+        blocks=args.blocks,
+        txs_per_block=args.txs_per_block,
+        outputs_per_tx=args.outputs_per_tx,
+        assets_per_output=args.assets_per_output,
+        datum_size=args.datum_size,
+    )
+    with FakeServer(data, events=args.events, utxos_per_page=args.page) as uri:
+        results = Suite(uri, data, args).run()
+
+    baseline: Dict[str, Result] = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    report(results, baseline)
+
+    if args.output:
+        document = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": time.time(),
+                "python": sys.version.split()[0],
+                "grpc": grpc.__version__,
+                "protobuf": protobuf_version,
+                "platform": platform.platform(),
+                "block_bytes": data.blocks[0].ByteSize(),
+                "args": vars(args),
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
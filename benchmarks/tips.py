@@ -0,0 +1,104 @@
+"""Whether a `TipTracker` keeps up with a forking chain, and what it saves.
+
+Starts `benchmarks.simulator.ChainSimulator` producing blocks at a steady
+pace with rollbacks and stream resets, and follows it with a `TipTracker`.
+While the chain grows, `wait_for_slot` and `wait_for_height` waiters are
+checked to resolve at or past their target, and `read_tip()` is timed
+answered locally and from the server. Once the chain is done, the
+tracker's tip must be the simulator's tip. Exits with status 1 if any
+check fails.
+
+```sh
+python -m benchmarks.tips --blocks 500 --reads 2000
+```
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import List
+
+from benchmarks.simulator import ChainSimulator, Faults, SimulatedChain
+from utxorpc import CardanoSyncClient
+from utxorpc.generics.tip import TipTracker
+
+
+async def time_reads(tracker: TipTracker, reads: int, max_staleness: float) -> float:
+    """Median seconds per `read_tip()`"""
+    samples: List[float] = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        await tracker.read_tip(max_staleness=max_staleness)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def run(uri: str, chain: SimulatedChain, args: argparse.Namespace) -> List[str]:
+    failures: List[str] = []
+    client = CardanoSyncClient(uri, secure=False)
+    tracker = client.tip_tracker(reconnect_delay=0.05)
+    async with client.async_connect(), tracker:
+        # The first answer needs the server, then the stream keeps it fresh
+        first = await tracker.read_tip(max_staleness=0)
+        if first is None:
+            return ["read_tip() returned no tip"]
+
+        slot = await asyncio.wait_for(tracker.wait_for_slot(first.slot + 200), 30)
+        if slot.slot < first.slot + 200:
+            failures.append(f"wait_for_slot woke at slot {slot.slot}")
+        height = tracker.height or 0
+        point = await asyncio.wait_for(tracker.wait_for_height(height + 20), 30)
+        if (tracker.height or 0) < height + 20:
+            failures.append(f"wait_for_height woke at {point}")
+
+        local = await time_reads(tracker, args.reads, max_staleness=60)
+        remote = await time_reads(tracker, args.reads // 10, max_staleness=0)
+        print(
+            f"read_tip: local {local * 1e6:.1f}us, remote {remote * 1e6:.1f}us "
+            f"({remote / local:.0f}x)"
+        )
+
+        while not chain.done:
+            await asyncio.sleep(0.05)
+        # Let the tracker catch up with the last blocks
+        deadline = time.monotonic() + 5
+        expected = chain.tip.header
+        while tracker.tip is None or tracker.tip.hash != expected.hash:
+            if time.monotonic() > deadline:
+                failures.append(f"tracker tip {tracker.tip} != {expected.slot}")
+                break
+            await asyncio.sleep(0.01)
+        print(tracker.stats())
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=500)
+    parser.add_argument("--block-interval", type=float, default=0.01)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    faults = Faults(
+        blocks=args.blocks,
+        block_interval=args.block_interval,
+        rollback_every=20,
+        rollback_depth=(1, 4),
+        reset_every=150,
+    )
+    simulator = ChainSimulator(faults)
+    with simulator as uri:
+        failures = asyncio.run(run(uri, simulator.chain, args))
+    print(
+        f"simulator: {simulator.chain.rollbacks} rollbacks, "
+        f"{simulator.servicer.resets} resets"
+    )
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
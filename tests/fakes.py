@@ -0,0 +1,102 @@
+"""In-process stand-ins for gRPC stubs, shared by the async component tests."""
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List
+
+import grpc
+from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import (  # type: ignore
+    BlockRef,
+    ReadTipResponse,
+)
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code: grpc.StatusCode) -> None:
+        super().__init__(code.name)
+        self._code = code
+
+    def code(self) -> grpc.StatusCode:
+        return self._code
+
+
+class FakeStream:
+    """One open server stream; the test pushes messages or an error into it"""
+
+    def __init__(self, request: Any) -> None:
+        self.request = request
+        self.cancelled = False
+        self.closed = False
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    def send(self, message: Any) -> None:
+        self._queue.put_nowait(message)
+
+    def fail(self, error: Exception) -> None:
+        self._queue.put_nowait(error)
+
+    def end(self) -> None:
+        self._queue.put_nowait(None)
+
+    async def messages(self) -> AsyncIterator[Any]:
+        try:
+            while True:
+                message = await self._queue.get()
+                if message is None:
+                    return
+                if isinstance(message, Exception):
+                    raise message
+                yield message
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        finally:
+            self.closed = True
+
+
+class FakeStub:
+    """Async stub whose streaming methods record each call as a `FakeStream`"""
+
+    def __init__(self) -> None:
+        self.streams: Dict[str, List[FakeStream]] = {}
+        self.opened = asyncio.Event()
+        self.tip = BlockRef()
+
+    def _open(self, method: str, request: Any) -> AsyncIterator[Any]:
+        stream = FakeStream(request)
+        self.streams.setdefault(method, []).append(stream)
+        self.opened.set()
+        return stream.messages()
+
+    def WaitForTx(self, request: Any, metadata: Any = None) -> AsyncIterator[Any]:
+        return self._open("WaitForTx", request)
+
+    def FollowTip(self, request: Any, metadata: Any = None) -> AsyncIterator[Any]:
+        return self._open("FollowTip", request)
+
+    async def ReadTip(self, request: Any, metadata: Any = None) -> ReadTipResponse:
+        return ReadTipResponse(tip=self.tip)
+
+    def open_streams(self, method: str) -> List[FakeStream]:
+        return [s for s in self.streams.get(method, []) if not s.closed]
+
+
+class FakeClient:
+    def __init__(self, chain: Any = None) -> None:
+        self.chain = chain
+        self.metadata: Dict[str, str] = {}
+        self.stub = FakeStub()
+
+    def get_async_stub(self) -> FakeStub:
+        return self.stub
+
+    def get_async_raw_stub(self) -> FakeStub:
+        return self.stub
+
+
+async def until(condition: Any, timeout: float = 2.0) -> None:
+    """Poll `condition()` until it is true, failing after `timeout` seconds"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.002)
@@ -0,0 +1,47 @@
+"""Calls scheduled through `BackgroundClient` from other threads."""
+
+import asyncio
+import concurrent.futures
+import contextlib
+from typing import Any, AsyncIterator
+
+import pytest
+
+from utxorpc.generics.clients.background import BackgroundClient
+
+
+class FakeClient:
+    @contextlib.asynccontextmanager
+    async def async_connect(self) -> AsyncIterator["FakeClient"]:
+        yield self
+
+    async def echo(self, value: Any, delay: float = 0.0) -> Any:
+        await asyncio.sleep(delay)
+        return value
+
+    async def hang(self) -> None:
+        await asyncio.Event().wait()
+
+
+def test_map_yields_in_order() -> None:
+    with BackgroundClient(FakeClient(), max_concurrency=2) as client:
+        results = client.map(client.client.echo, [1, 2, 3], [0.03, 0.0, 0.01])
+        assert list(results) == [1, 2, 3]
+
+
+def test_map_timeout_is_a_deadline_for_all_results() -> None:
+    with BackgroundClient(FakeClient()) as client:
+        results = client.map(client.client.echo, [1, 2], [0.01, 5.0], timeout=0.2)
+        assert next(results) == 1
+        with pytest.raises(concurrent.futures.TimeoutError):
+            next(results)
+
+
+def test_close_cancels_pending_calls() -> None:
+    client = BackgroundClient(FakeClient())
+    client.start()
+    futures = [client.submit(client.client.hang) for _ in range(3)]
+    client.close()
+    for future in futures:
+        with pytest.raises(concurrent.futures.CancelledError):
+            future.result(timeout=1)
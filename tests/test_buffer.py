@@ -0,0 +1,104 @@
+"""Delivery, overflow and shutdown of `BufferedStream`."""
+
+import asyncio
+from typing import AsyncIterator, List
+
+import pytest
+
+from utxorpc.generics.buffer import (
+    BufferedStream,
+    BufferOverflowError,
+    OverflowPolicy,
+)
+
+
+class SourceError(Exception):
+    pass
+
+
+async def source(count: int, error: bool = False) -> AsyncIterator[int]:
+    for item in range(count):
+        yield item
+    if error:
+        raise SourceError("source failed")
+
+
+async def consume(stream: BufferedStream[int]) -> List[int]:
+    items: List[int] = []
+    async for item in stream:
+        items.append(item)
+    return items
+
+
+def test_delivers_every_message() -> None:
+    async def main() -> List[int]:
+        async with BufferedStream(source(100), maxsize=8) as stream:
+            return await consume(stream)
+
+    assert asyncio.run(main()) == list(range(100))
+
+
+def test_delivers_buffered_messages_before_the_source_error() -> None:
+    async def main() -> List[int]:
+        items: List[int] = []
+        async with BufferedStream(source(5, error=True), maxsize=16) as stream:
+            # Let the reader buffer everything and hit the error first
+            stream._start()
+            await asyncio.sleep(0.01)
+            assert stream.stats().depth == 5
+            with pytest.raises(SourceError):
+                async for item in stream:
+                    items.append(item)
+        return items
+
+    assert asyncio.run(main()) == list(range(5))
+
+
+def test_drop_oldest_keeps_the_newest_messages() -> None:
+    async def main() -> List[int]:
+        stream = BufferedStream(
+            source(10), maxsize=3, overflow=OverflowPolicy.drop_oldest
+        )
+        async with stream:
+            stream._start()
+            await asyncio.sleep(0.01)
+            items = await consume(stream)
+            assert stream.stats().dropped == 7
+        return items
+
+    assert asyncio.run(main()) == [7, 8, 9]
+
+
+def test_overflow_error_is_raised_after_the_full_buffer() -> None:
+    async def main() -> List[int]:
+        items: List[int] = []
+        stream = BufferedStream(source(10), maxsize=3, overflow=OverflowPolicy.error)
+        async with stream:
+            stream._start()
+            await asyncio.sleep(0.01)
+            with pytest.raises(BufferOverflowError):
+                async for item in stream:
+                    items.append(item)
+        return items
+
+    assert asyncio.run(main()) == [0, 1, 2]
+
+
+def test_aclose_closes_the_source() -> None:
+    closed = asyncio.Event()
+
+    async def endless() -> AsyncIterator[int]:
+        try:
+            while True:
+                yield 1
+                await asyncio.sleep(0)
+        finally:
+            closed.set()
+
+    async def main() -> None:
+        async with BufferedStream(endless(), maxsize=4) as stream:
+            async for _ in stream:
+                break
+        assert closed.is_set()
+
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Cardano tx parsing, chain points and compact point storage."""
+
+import hashlib
+import pickle
+
+import pytest
+
+from benchmarks.server import tx_cbor
+from utxorpc.cardano import CardanoChain, CardanoPoint
+from utxorpc.points import PointArray
+
+
+def tx_with_inputs(inputs: bytes) -> bytes:
+    """`[{0: inputs, 2: 1}, {}, true, null]` with `inputs` already encoded"""
+    return b"\x84\xa2\x00" + inputs + b"\x02\x01\xa0\xf5\xf6"
+
+
+def tx_input(tx_hash: bytes, index: int) -> bytes:
+    return b"\x82\x58\x20" + tx_hash + bytes([index])
+
+
+def point(slot: int) -> CardanoPoint:
+    return CardanoPoint(slot, slot.to_bytes(32, "big"))
+
+
+def test_tx_hash_is_the_blake2b_of_the_body() -> None:
+    tx = tx_cbor(7, size=100)
+    body = tx[1:12]
+    assert CardanoChain.tx_hash(tx) == hashlib.blake2b(body, digest_size=32).digest()
+    assert CardanoChain.tx_hash(tx) != CardanoChain.tx_hash(tx_cbor(8, size=100))
+    # Auxiliary data is not part of the id
+    assert CardanoChain.tx_hash(tx) == CardanoChain.tx_hash(tx_cbor(7))
+
+
+def test_tx_inputs() -> None:
+    first, second = bytes(range(32)), bytes(32)
+    pairs = tx_input(first, 0) + tx_input(second, 5)
+    expected = [(first, 0), (second, 5)]
+    assert CardanoChain.tx_inputs(tx_with_inputs(b"\x82" + pairs)) == expected
+    # Since Conway inputs may be a set, tag 258
+    tagged = b"\xd9\x01\x02\x82" + pairs
+    assert CardanoChain.tx_inputs(tx_with_inputs(tagged)) == expected
+    assert CardanoChain.tx_inputs(tx_cbor(1)) == []
+
+
+def test_point_equality_and_order() -> None:
+    a, b = point(10), point(20)
+    assert a == CardanoPoint(10, a.hash.hex())
+    assert a < b <= b and b > a >= a
+    assert sorted([b, a]) == [a, b]
+    assert CardanoPoint(10, bytes(32)) < a
+    assert len({a, CardanoPoint(10, a.hash), b}) == 2
+    assert pickle.loads(pickle.dumps(a)) == a
+    assert CardanoPoint.intern(10, a.hash) is CardanoPoint.intern(10, a.hash)
+    with pytest.raises(AttributeError):
+        a.slot = 11  # type: ignore[misc]
+
+
+def test_point_comparisons_with_other_types() -> None:
+    a = point(10)
+    assert a != (10, a.hash)
+    assert a != None  # noqa: E711
+    for compare in (a.__lt__, a.__le__, a.__gt__, a.__ge__):
+        assert compare((10, a.hash)) is NotImplemented
+    with pytest.raises(TypeError):
+        a < 10  # type: ignore[operator]
+
+
+def test_point_array_lookups() -> None:
+    points = PointArray(point(slot) for slot in (10, 20, 20, 40))
+    assert len(points) == 4 and points.nbytes == 4 * 40
+    assert list(points) == [point(10), point(20), point(20), point(40)]
+    assert points[-1] == point(40)
+    assert point(20) in points and point(30) not in points
+    assert points.index(point(40)) == 3
+    assert points.find(20) == point(20) and points.find(30) is None
+    assert points.floor(30) == point(20) and points.floor(5) is None
+    assert points.ceiling(30) == point(40) and points.ceiling(50) is None
+    assert list(points[1:3]) == [point(20), point(20)]
+    with pytest.raises(IndexError):
+        points[4]
+    with pytest.raises(ValueError):
+        points.append(point(30))
+    with pytest.raises(ValueError):
+        points.append(CardanoPoint(50, b"short"))
+
+
+def test_point_array_truncates_on_rollback() -> None:
+    points = PointArray(point(slot) for slot in range(10, 60, 10))
+    points.truncate(35)
+    assert list(points) == [point(10), point(20), point(30)]
+    points.append(point(40))
+    assert points[-1] == point(40)
+    assert bytes(points.hashes[:32]) == point(10).hash
@@ -0,0 +1,57 @@
+"""Column tables built from Cardano blocks."""
+
+import pytest
+from utxorpc_spec.utxorpc.v1alpha.cardano.cardano_pb2 import (  # type: ignore
+    BigInt,
+    Block,
+    BlockBody,
+    BlockHeader,
+    Tx,
+    TxOutput,
+)
+
+np = pytest.importorskip("numpy")
+
+from utxorpc.columnar import big_int_to_int, blocks_to_columns, segment_sum  # noqa: E402
+
+
+def block(slot: int, *txs: Tx) -> Block:
+    return Block(
+        header=BlockHeader(slot=slot, hash=slot.to_bytes(32, "big"), height=slot),
+        body=BlockBody(tx=list(txs)),
+    )
+
+
+def tx(fee: BigInt, *coins: BigInt) -> Tx:
+    return Tx(fee=fee, outputs=[TxOutput(address=b"\x61", coin=c) for c in coins])
+
+
+def test_big_int_to_int() -> None:
+    assert big_int_to_int(BigInt(int=5)) == 5
+    assert big_int_to_int(BigInt(big_u_int=(2**70).to_bytes(9, "big"))) == 2**70
+    assert big_int_to_int(BigInt(big_n_int=b"\x04")) == -5
+
+
+def test_amounts_are_uint64() -> None:
+    columns = blocks_to_columns(
+        [block(1, tx(BigInt(int=10), BigInt(int=3), BigInt(int=4))), block(2)]
+    )
+    assert columns.txs.fee.dtype == np.uint64
+    assert columns.outputs.coin.tolist() == [3, 4]
+    assert segment_sum(columns.txs.fee, columns.blocks.tx_offsets).tolist() == [10, 0]
+
+
+def test_amounts_outside_uint64_fall_back_to_python_ints() -> None:
+    large = BigInt(big_u_int=(2**64).to_bytes(9, "big"))
+    negative = BigInt(big_n_int=b"\x00")
+    columns = blocks_to_columns(
+        [
+            block(1, tx(BigInt(int=1), BigInt(int=2))),
+            block(2, tx(large, negative), tx(BigInt(int=3))),
+        ]
+    )
+    assert columns.txs.fee.dtype == object
+    assert columns.txs.fee.tolist() == [1, 2**64, 3]
+    assert columns.outputs.coin.tolist() == [2, -1]
+    totals = segment_sum(columns.txs.fee, columns.blocks.tx_offsets)
+    assert totals.tolist() == [1, 2**64 + 3]
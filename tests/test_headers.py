@@ -0,0 +1,77 @@
+"""Link checks of `HeaderChain` across applies, undos and resets."""
+
+import pytest
+from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import BlockRef  # type: ignore
+
+from utxorpc.generics.headers import HeaderChain, HeaderLinkError
+
+
+def header(height: int, slot: int = 0) -> BlockRef:
+    return BlockRef(
+        slot=slot or height * 20, hash=height.to_bytes(32, "big"), height=height
+    )
+
+
+def chain(*heights: int) -> HeaderChain:
+    headers = HeaderChain()
+    for height in heights:
+        headers.append(header(height))
+    return headers
+
+
+def test_append_checks_links() -> None:
+    headers = chain(10, 11, 12)
+    assert headers.height == 12
+    assert headers.get(11) == header(11)
+    assert headers.confirmations(11) == 2
+    with pytest.raises(HeaderLinkError):
+        headers.append(header(14))
+    with pytest.raises(HeaderLinkError):
+        headers.append(header(13, slot=5))
+    with pytest.raises(HeaderLinkError):
+        headers.append(header(13), parent_hash=header(11).hash)
+    headers.append(header(13), parent_hash=header(12).hash)
+
+
+def test_rollback_removes_the_tip_only() -> None:
+    headers = chain(10, 11, 12)
+    with pytest.raises(HeaderLinkError):
+        headers.rollback(header(11))
+    headers.rollback(header(12))
+    assert headers.height == 11
+
+
+def test_reset_to_kept_point() -> None:
+    headers = chain(10, 11, 12, 13)
+    headers.reset(BlockRef(slot=header(11).slot, hash=header(11).hash))
+    assert headers.height == 11
+    headers.append(header(12))
+
+
+def test_reset_to_unknown_point_with_height() -> None:
+    headers = chain(10, 11)
+    headers.reset(header(50))
+    assert headers.height == 50
+    with pytest.raises(HeaderLinkError):
+        headers.append(header(52))
+    headers.append(header(51))
+
+
+def test_reset_to_unknown_point_without_height() -> None:
+    headers = chain(10, 11)
+    point = header(50)
+    headers.reset(BlockRef(slot=point.slot, hash=point.hash))
+    assert headers.height is None
+    assert headers.confirmations(50) is None
+    assert point.hash in headers
+    with pytest.raises(HeaderLinkError):
+        headers.append(header(51, slot=point.slot))
+    with pytest.raises(HeaderLinkError):
+        headers.append(header(51), parent_hash=header(10).hash)
+    headers.append(header(51), parent_hash=point.hash)
+    assert headers.height == 51
+    assert headers.get(50) == point
+    assert headers.height_of(point.hash) == 50
+    headers.append(header(52))
+    with pytest.raises(HeaderLinkError):
+        headers.append(header(54))
@@ -0,0 +1,152 @@
+"""Restarts, reconnects and fan-out of the stream hubs."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, List
+
+import grpc
+import pytest
+
+from tests.fakes import FakeRpcError, FakeStream, until
+from utxorpc.generics.buffer import OverflowPolicy
+from utxorpc.generics.hub import MempoolHub, WatchHub
+
+
+class IdentityChain:
+    def any_chain_to_tx(self, tx: Any) -> Any:
+        return tx
+
+
+class FakeMempoolClient:
+    def __init__(self) -> None:
+        self.chain = IdentityChain()
+        self.streams: List[FakeStream] = []
+        self.opened_at: List[float] = []
+
+    def async_watch_mempool(self, predicate: Any = None) -> AsyncIterator[Any]:
+        stream = FakeStream(predicate)
+        self.streams.append(stream)
+        self.opened_at.append(time.monotonic())
+        return stream.messages()
+
+
+class FakeWatchClient:
+    def __init__(self) -> None:
+        self.chain = IdentityChain()
+        self.streams: List[FakeStream] = []
+
+    def async_watch_tx(
+        self, predicate: Any = None, field_mask: Any = None, intersect: Any = None
+    ) -> AsyncIterator[Any]:
+        stream = FakeStream(intersect)
+        self.streams.append(stream)
+        return stream.messages()
+
+
+def idle(slot: int) -> Any:
+    return SimpleNamespace(tx=None, block_ref=slot)
+
+
+def hub(client: FakeMempoolClient, **kwargs: Any) -> MempoolHub:
+    kwargs.setdefault("reconnect_delay", 0.001)
+    return MempoolHub(client, **kwargs)
+
+
+def test_fans_out_to_matching_subscribers() -> None:
+    async def main() -> None:
+        client = FakeMempoolClient()
+        async with hub(client) as txs:
+            everything = txs.subscribe()
+            odd = txs.subscribe(matcher=lambda tx: tx % 2 == 1)
+            await until(lambda: client.streams)
+            for tx in range(4):
+                client.streams[0].send(tx)
+            assert [await everything.__anext__() for _ in range(4)] == [0, 1, 2, 3]
+            assert [await odd.__anext__() for _ in range(2)] == [1, 3]
+            assert len(client.streams) == 1
+
+    asyncio.run(main())
+
+
+def test_reopens_with_backoff_after_errors() -> None:
+    async def main() -> None:
+        client = FakeMempoolClient()
+        async with hub(client, reconnect_delay=0.02, max_backoff=0.05) as txs:
+            subscription = txs.subscribe()
+            for count in range(1, 5):
+                await until(lambda: len(client.streams) == count)
+                client.streams[-1].fail(FakeRpcError(grpc.StatusCode.UNAVAILABLE))
+            await until(lambda: len(client.streams) == 5)
+            gaps = [b - a for a, b in zip(client.opened_at, client.opened_at[1:])]
+            assert gaps[0] >= 0.02 and gaps[1] >= 0.04
+            assert max(gaps) < 0.5
+            assert txs.failures == 4 and txs.reconnects == 4
+            # A message resets the backoff, and subscribers never noticed
+            client.streams[-1].send("tx")
+            assert await subscription.__anext__() == "tx"
+            assert txs.failures == 0
+
+    asyncio.run(main())
+
+
+def test_reopens_after_the_stream_ends() -> None:
+    async def main() -> None:
+        client = FakeMempoolClient()
+        async with hub(client) as txs:
+            subscription = txs.subscribe()
+            await until(lambda: client.streams)
+            client.streams[0].end()
+            await until(lambda: len(client.streams) == 2)
+            client.streams[1].send("tx")
+            assert await subscription.__anext__() == "tx"
+
+    asyncio.run(main())
+
+
+def test_restarts_after_a_fatal_error() -> None:
+    async def main() -> None:
+        client = FakeMempoolClient()
+        async with hub(client) as txs:
+            first = txs.subscribe()
+            await until(lambda: client.streams)
+            client.streams[0].fail(FakeRpcError(grpc.StatusCode.UNAUTHENTICATED))
+            with pytest.raises(grpc.RpcError):
+                await first.__anext__()
+            # Subscribing again opens a new stream instead of hanging
+            second = txs.subscribe()
+            await until(lambda: len(client.streams) == 2)
+            client.streams[1].send("tx")
+            assert await asyncio.wait_for(second.__anext__(), 1) == "tx"
+
+    asyncio.run(main())
+
+
+def test_subscription_ids_are_never_reused() -> None:
+    async def main() -> None:
+        txs = WatchHub(FakeWatchClient(), rotate_interval=0)
+        ids = set()
+        for _ in range(100):
+            subscription = txs.subscribe()
+            ids.add(subscription.id)
+            await subscription.aclose()
+            del subscription
+        assert len(ids) == 100
+        await txs.close()
+
+    asyncio.run(main())
+
+
+def test_closes_while_dispatch_blocks_on_a_full_subscriber() -> None:
+    async def main() -> None:
+        client = FakeWatchClient()
+        txs = WatchHub(client, rotate_interval=0)
+        subscription = txs.subscribe(maxsize=1, overflow=OverflowPolicy.block)
+        await until(lambda: client.streams)
+        client.streams[0].send(idle(1))
+        client.streams[0].send(idle(2))
+        await until(lambda: txs.received == 2)
+        await asyncio.wait_for(txs.close(), 1)
+        assert (await subscription.__anext__()).block_ref == 1
+
+    asyncio.run(main())
@@ -0,0 +1,322 @@
+"""Local predicate evaluation against the documented server semantics.
+
+Every case runs through both the reference interpreter (`tx_matches`,
+`utxo_matches`) and the compiled matchers, which must agree with it.
+"""
+
+import random
+from typing import Any, Callable, List, Optional
+
+import pytest
+from utxorpc_spec.utxorpc.v1alpha.cardano.cardano_pb2 import (  # type: ignore
+    AddressPattern,
+    Asset,
+    AssetPattern,
+    Multiasset,
+    Tx,
+    TxInput,
+    TxOutput,
+    TxOutputPattern,
+    TxPattern,
+)
+from utxorpc_spec.utxorpc.v1alpha.query.query_pb2 import (  # type: ignore
+    AnyUtxoPattern,
+    UtxoPredicate,
+)
+from utxorpc_spec.utxorpc.v1alpha.watch.watch_pb2 import (  # type: ignore
+    AnyChainTxPattern,
+    TxPredicate,
+)
+
+from tests.universe import Universe
+from utxorpc.predicate import (
+    compile_tx_predicate,
+    compile_utxo_predicate,
+    delegation_part,
+    payment_part,
+    tx_matches,
+    utxo_matches,
+)
+
+PAYMENT = bytes(range(28))
+OTHER_PAYMENT = bytes(range(100, 128))
+STAKE = bytes(range(28, 56))
+OTHER_STAKE = bytes(range(128, 156))
+POLICY = b"\x01" * 28
+OTHER_POLICY = b"\x02" * 28
+
+BASE = bytes([0x01]) + PAYMENT + STAKE
+ENTERPRISE = bytes([0x61]) + PAYMENT
+REWARD = bytes([0xE1]) + STAKE
+POINTER = bytes([0x41]) + PAYMENT + b"\x81\x00\x00"
+BYRON = bytes([0x82]) + PAYMENT + STAKE
+
+TxMatcher = Callable[[TxPredicate, Tx], bool]
+
+
+def reference(predicate: TxPredicate, tx: Tx) -> bool:
+    return tx_matches(predicate, tx)
+
+
+def compiled(predicate: TxPredicate, tx: Tx) -> bool:
+    return compile_tx_predicate(predicate)(tx)
+
+
+@pytest.fixture(params=[reference, compiled])
+def matches(request: Any) -> TxMatcher:
+    return request.param
+
+
+def output(address: bytes = ENTERPRISE, assets: Optional[List[Any]] = None) -> Any:
+    return TxOutput(address=address, assets=assets or [])
+
+
+def multiasset(policy_id: bytes, *names: bytes) -> Any:
+    return Multiasset(policy_id=policy_id, assets=[Asset(name=n) for n in names])
+
+
+def tx(
+    outputs: Optional[List[Any]] = None,
+    consumed: Optional[List[Any]] = None,
+    mint: Optional[List[Any]] = None,
+) -> Any:
+    inputs = [TxInput(tx_hash=b"\x00" * 32, as_output=o) for o in consumed or []]
+    return Tx(inputs=inputs, outputs=outputs or [], mint=mint or [])
+
+
+def where(**pattern: Any) -> Any:
+    return TxPredicate(match=AnyChainTxPattern(cardano=TxPattern(**pattern)))
+
+
+def has_address(**pattern: Any) -> Any:
+    return where(has_address=AddressPattern(**pattern))
+
+
+def moves_asset(**pattern: Any) -> Any:
+    return where(moves_asset=AssetPattern(**pattern))
+
+
+def mints_asset(**pattern: Any) -> Any:
+    return where(mints_asset=AssetPattern(**pattern))
+
+
+def negate(*children: Any) -> Any:
+    return TxPredicate(**{"not": list(children)})
+
+
+NEVER = has_address(exact_address=b"\xff")
+
+
+def test_empty_predicate_matches_everything(matches: TxMatcher) -> None:
+    assert matches(TxPredicate(), tx())
+    assert matches(TxPredicate(), tx([output()]))
+
+
+def test_empty_pattern_matches_everything(matches: TxMatcher) -> None:
+    assert matches(where(), tx())
+    assert matches(has_address(), tx([output()]))
+
+
+def test_empty_any_of_and_all_of_are_ignored(matches: TxMatcher) -> None:
+    predicate = TxPredicate(any_of=[], all_of=[])
+    assert matches(predicate, tx([output()]))
+
+
+def test_any_of(matches: TxMatcher) -> None:
+    sample = tx([output(ENTERPRISE)])
+    assert matches(
+        TxPredicate(any_of=[NEVER, has_address(payment_part=PAYMENT)]), sample
+    )
+    assert not matches(TxPredicate(any_of=[NEVER, NEVER]), sample)
+
+
+def test_all_of(matches: TxMatcher) -> None:
+    sample = tx([output(BASE)])
+    both = [has_address(payment_part=PAYMENT), has_address(delegation_part=STAKE)]
+    assert matches(TxPredicate(all_of=both), sample)
+    assert not matches(TxPredicate(all_of=[*both, NEVER]), sample)
+
+
+def test_not(matches: TxMatcher) -> None:
+    sample = tx([output(ENTERPRISE)])
+    assert matches(negate(NEVER), sample)
+    assert not matches(negate(has_address(payment_part=PAYMENT)), sample)
+    # Any matching child excludes the tx
+    assert not matches(negate(NEVER, has_address(payment_part=PAYMENT)), sample)
+    assert matches(negate(), sample)
+
+
+def test_fields_combine_with_and(matches: TxMatcher) -> None:
+    sample = tx([output(ENTERPRISE)])
+    predicate = has_address(payment_part=PAYMENT)
+    predicate.any_of.append(NEVER)
+    assert not matches(predicate, sample)
+    predicate = has_address(payment_part=PAYMENT)
+    getattr(predicate, "not").append(has_address(exact_address=ENTERPRISE))
+    assert not matches(predicate, sample)
+
+
+def test_address_parts() -> None:
+    assert payment_part(BASE) == PAYMENT
+    assert delegation_part(BASE) == STAKE
+    assert payment_part(ENTERPRISE) == PAYMENT
+    assert delegation_part(ENTERPRISE) is None
+    assert payment_part(POINTER) == PAYMENT
+    assert delegation_part(POINTER) is None
+    assert payment_part(REWARD) is None
+    assert delegation_part(REWARD) == STAKE
+    assert payment_part(BYRON) is None
+    assert delegation_part(BYRON) is None
+    assert payment_part(b"") is None
+
+
+@pytest.mark.parametrize(
+    "address, pattern, expected",
+    [
+        (BASE, {"exact_address": BASE}, True),
+        (BASE, {"exact_address": ENTERPRISE}, False),
+        (BASE, {"payment_part": PAYMENT}, True),
+        (BASE, {"delegation_part": STAKE}, True),
+        (BASE, {"payment_part": PAYMENT, "delegation_part": STAKE}, True),
+        (BASE, {"payment_part": PAYMENT, "delegation_part": OTHER_STAKE}, False),
+        (BASE, {"payment_part": OTHER_PAYMENT}, False),
+        (ENTERPRISE, {"payment_part": PAYMENT}, True),
+        (ENTERPRISE, {"delegation_part": STAKE}, False),
+        (POINTER, {"payment_part": PAYMENT}, True),
+        (REWARD, {"delegation_part": STAKE}, True),
+        (REWARD, {"payment_part": STAKE}, False),
+        # Byron addresses have neither part, whatever their bytes
+        (BYRON, {"payment_part": PAYMENT}, False),
+        (BYRON, {"exact_address": BYRON}, True),
+    ],
+)
+def test_address_patterns(
+    matches: TxMatcher, address: bytes, pattern: Any, expected: bool
+) -> None:
+    assert matches(has_address(**pattern), tx([output(address)])) is expected
+
+
+def test_has_address_covers_resolved_inputs(matches: TxMatcher) -> None:
+    predicate = has_address(exact_address=BASE)
+    assert matches(predicate, tx([output(ENTERPRISE)], consumed=[output(BASE)]))
+    assert not matches(predicate, tx([output(ENTERPRISE)]))
+
+
+def test_consumes_and_produces(matches: TxMatcher) -> None:
+    sample = tx([output(ENTERPRISE)], consumed=[output(BASE)])
+    spends = TxOutputPattern(address=AddressPattern(exact_address=BASE))
+    pays = TxOutputPattern(address=AddressPattern(exact_address=ENTERPRISE))
+    assert matches(where(consumes=spends), sample)
+    assert not matches(where(produces=spends), sample)
+    assert matches(where(produces=pays), sample)
+    assert not matches(where(consumes=pays), sample)
+    # Unresolved inputs are never consumed outputs
+    unresolved = Tx(inputs=[TxInput(tx_hash=b"\x00" * 32)], outputs=[output()])
+    assert not matches(where(consumes=TxOutputPattern()), unresolved)
+
+
+def test_output_pattern_needs_address_and_asset_on_one_output(
+    matches: TxMatcher,
+) -> None:
+    pattern = TxOutputPattern(
+        address=AddressPattern(exact_address=BASE),
+        asset=AssetPattern(policy_id=POLICY),
+    )
+    split = tx([output(BASE), output(ENTERPRISE, [multiasset(POLICY, b"a")])])
+    together = tx([output(BASE, [multiasset(POLICY, b"a")])])
+    assert not matches(where(produces=pattern), split)
+    assert matches(where(produces=pattern), together)
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ({"policy_id": POLICY}, True),
+        ({"policy_id": OTHER_POLICY}, True),
+        ({"policy_id": POLICY, "asset_name": b"nft"}, True),
+        ({"policy_id": OTHER_POLICY, "asset_name": b"nft"}, False),
+        ({"asset_name": b"token"}, True),
+        # Minted assets that no output holds aren't moved
+        ({"policy_id": POLICY, "asset_name": b"lp"}, False),
+        ({"asset_name": b"lp"}, False),
+        ({"asset_name": b"missing"}, False),
+        ({"policy_id": b"\x03" * 28}, False),
+    ],
+)
+def test_moves_asset_across_multiple_policies(
+    matches: TxMatcher, pattern: Any, expected: bool
+) -> None:
+    sample = tx(
+        [output(BASE, [multiasset(POLICY, b"nft", b"token")])],
+        consumed=[output(ENTERPRISE, [multiasset(OTHER_POLICY, b"token")])],
+        mint=[multiasset(POLICY, b"lp")],
+    )
+    assert matches(moves_asset(**pattern), sample) is expected
+
+
+def test_mints_asset(matches: TxMatcher) -> None:
+    sample = tx(
+        [output(BASE, [multiasset(POLICY, b"nft")])],
+        mint=[multiasset(OTHER_POLICY, b"lp", b"token")],
+    )
+    assert matches(mints_asset(policy_id=OTHER_POLICY), sample)
+    assert matches(mints_asset(policy_id=OTHER_POLICY, asset_name=b"token"), sample)
+    assert not matches(mints_asset(policy_id=POLICY), sample)
+    assert not matches(mints_asset(asset_name=b"nft"), sample)
+
+
+def test_any_of_many_policies_and_addresses(matches: TxMatcher) -> None:
+    sample = tx([output(BASE, [multiasset(OTHER_POLICY, b"token")])])
+    policies = [moves_asset(policy_id=bytes([i]) * 28) for i in range(3, 40)]
+    addresses = [has_address(payment_part=bytes([i]) * 28) for i in range(3, 40)]
+    assert not matches(TxPredicate(any_of=policies + addresses), sample)
+    hit = policies + [moves_asset(policy_id=OTHER_POLICY)] + addresses
+    assert matches(TxPredicate(any_of=hit), sample)
+    hit = policies + addresses + [has_address(delegation_part=STAKE)]
+    assert matches(TxPredicate(any_of=hit), sample)
+    assert not matches(negate(*hit), sample)
+
+
+def test_certificate_patterns_are_rejected(matches: TxMatcher) -> None:
+    predicate = TxPredicate(match=AnyChainTxPattern(cardano=TxPattern()))
+    predicate.match.cardano.has_certificate.SetInParent()
+    with pytest.raises(ValueError):
+        matches(predicate, tx())
+
+
+@pytest.mark.parametrize("match", [utxo_matches, None])
+def test_utxo_predicates(match: Any) -> None:
+    def matches(predicate: Any, value: Any) -> bool:
+        if match is None:
+            return compile_utxo_predicate(predicate)(value)
+        return match(predicate, value)
+
+    def where_output(**pattern: Any) -> Any:
+        return UtxoPredicate(match=AnyUtxoPattern(cardano=TxOutputPattern(**pattern)))
+
+    utxo = output(BASE, [multiasset(POLICY, b"nft")])
+    by_stake = where_output(address=AddressPattern(delegation_part=STAKE))
+    by_asset = where_output(asset=AssetPattern(policy_id=OTHER_POLICY))
+    assert matches(UtxoPredicate(), utxo)
+    assert matches(UtxoPredicate(any_of=[], all_of=[]), utxo)
+    assert matches(by_stake, utxo)
+    assert not matches(by_asset, utxo)
+    assert matches(UtxoPredicate(any_of=[by_asset, by_stake]), utxo)
+    assert not matches(UtxoPredicate(all_of=[by_asset, by_stake]), utxo)
+    assert matches(UtxoPredicate(**{"not": [by_asset]}), utxo)
+    assert not matches(UtxoPredicate(**{"not": [by_asset, by_stake]}), utxo)
+
+
+def test_compiled_matchers_agree_with_the_reference() -> None:
+    universe = Universe(random.Random(0), size=50)
+    sample = [universe.tx() for _ in range(50)]
+    outputs = [output for tx in sample for output in tx.outputs]
+    for _ in range(100):
+        predicate = universe.tx_predicate()
+        matcher = compile_tx_predicate(predicate)
+        for value in sample:
+            assert matcher(value) == tx_matches(predicate, value), predicate
+        utxo_predicate = universe.utxo_predicate()
+        utxo_matcher = compile_utxo_predicate(utxo_predicate)
+        for value in outputs:
+            assert utxo_matcher(value) == utxo_matches(utxo_predicate, value)
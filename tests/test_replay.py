@@ -0,0 +1,131 @@
+"""Recording traffic from the fake server and replaying it without a network."""
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Iterable, List, Tuple
+
+import grpc
+import pytest
+
+from benchmarks.server import FakeServer
+from utxorpc import CardanoPoint, CardanoSyncClient
+from utxorpc.generics.replay import (
+    RecordedCall,
+    Recorder,
+    Recording,
+    ReplayError,
+)
+
+START = CardanoPoint(0, bytes(32))
+FOLLOW_TIP = "/utxorpc.v1alpha.sync.SyncService/FollowTip"
+
+
+def summary(responses: Iterable[Any]) -> List[Tuple[Any, Any]]:
+    return [(response.action, response.block) for response in responses]
+
+
+@pytest.fixture(scope="module")
+def recorded(tmp_path_factory: pytest.TempPathFactory) -> Tuple[Path, Any]:
+    """A recording of one session against the fake server, and what it returned"""
+    path = tmp_path_factory.mktemp("replay") / "session.rec"
+    with FakeServer(events=50) as uri:
+        with Recorder(str(path)) as recorder:
+            client = CardanoSyncClient(
+                uri, secure=False, interceptors=recorder.interceptors
+            )
+            with client.connect():
+                tip = client.read_tip()
+                follow = summary(client.follow_tip(intersect=[]))
+                history = client.dump_history(START, 5)
+            assert recorder.calls == 3
+            assert recorder.messages == 52
+    return path, (tip, follow, history)
+
+
+def test_load_lists_every_call(recorded: Tuple[Path, Any]) -> None:
+    path, _ = recorded
+    recording = Recording.load(str(path))
+    assert [call.method.rsplit("/", 1)[-1] for call in recording] == [
+        "ReadTip",
+        "FollowTip",
+        "DumpHistory",
+    ]
+    assert all(call.code == grpc.StatusCode.OK for call in recording)
+    follow = recording.calls[1]
+    assert len(follow.messages) == 50
+    offsets = [offset for offset, _ in follow.messages]
+    assert offsets == sorted(offsets)
+
+
+def test_blocking_replay_matches_the_live_session(recorded: Tuple[Path, Any]) -> None:
+    path, (tip, follow, history) = recorded
+    client = CardanoSyncClient("replay", secure=False)
+    with Recording.load(str(path)).connect(client, speed=None):
+        assert client.read_tip() == tip
+        assert summary(client.follow_tip(intersect=[])) == follow
+        assert client.dump_history(START, 5) == history
+        # Every recorded call was used up
+        with pytest.raises(ReplayError) as error:
+            client.read_tip()
+        assert error.value.code() == grpc.StatusCode.UNIMPLEMENTED
+
+
+def test_async_replay_loops(recorded: Tuple[Path, Any]) -> None:
+    path, (tip, follow, _) = recorded
+    client = CardanoSyncClient("replay", secure=False)
+
+    async def main() -> None:
+        async with Recording.load(str(path)).async_connect(
+            client, speed=None, loop=True
+        ):
+            for _ in range(3):
+                assert await client.async_read_tip() == tip
+                responses = [r async for r in client.async_follow_tip(intersect=[])]
+                assert summary(responses) == follow
+
+    asyncio.run(main())
+
+
+def test_truncated_recording_keeps_complete_records(
+    recorded: Tuple[Path, Any], tmp_path: Path
+) -> None:
+    path, (_, follow, _) = recorded
+    data = path.read_bytes()
+    truncated = tmp_path / "truncated.rec"
+    truncated.write_bytes(data[: len(data) * 2 // 3])
+    recording = Recording.load(str(truncated))
+    assert 0 < len(recording.calls[1].messages) < 50
+    client = CardanoSyncClient("replay", secure=False)
+    with recording.connect(client, speed=None):
+        client.read_tip()
+        # The stream has no END record, so it ends after its last message
+        replayed = summary(client.follow_tip(intersect=[]))
+        assert replayed == follow[: len(replayed)]
+
+    not_a_recording = tmp_path / "empty.rec"
+    not_a_recording.write_bytes(b"")
+    with pytest.raises(ValueError):
+        Recording.load(str(not_a_recording))
+
+
+def test_replays_recorded_errors_at_the_recorded_pace(
+    recorded: Tuple[Path, Any],
+) -> None:
+    path, (_, follow, _) = recorded
+    _, message = Recording.load(str(path)).calls[1].messages[0]
+    call = RecordedCall(FOLLOW_TIP, b"")
+    call.messages = [(0, message), (50_000_000, message)]
+    call.code = grpc.StatusCode.UNAVAILABLE
+    call.details = "connection reset"
+    client = CardanoSyncClient("replay", secure=False)
+    with Recording([call]).connect(client, speed=1.0):
+        responses = []
+        started = time.monotonic()
+        with pytest.raises(ReplayError) as error:
+            for response in client.follow_tip(intersect=[]):
+                responses.append(response)
+        assert time.monotonic() - started >= 0.045
+    assert summary(responses) == [follow[0]] * 2
+    assert error.value.code() == grpc.StatusCode.UNAVAILABLE
+    assert error.value.details() == "connection reset"
@@ -0,0 +1,90 @@
+"""Followers against the chain simulator's rollbacks, stream resets and stalls.
+
+Each scenario is small enough to run in well under a second per follower.
+The followers from `benchmarks.resilience` resume from their own points
+after a reset, so the checks are that they end on the best chain, having
+seen every injected reset, without a tx counted twice and with bounded
+recovery times.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict
+
+import pytest
+
+from benchmarks.resilience import (
+    Run,
+    TxFollower,
+    async_follow_tip,
+    async_watch_tx,
+    follow_tip,
+    watch_tx,
+)
+from benchmarks.simulator import ChainSimulator, Faults
+
+MAX_RECOVERY = 0.5
+
+FOLLOWERS: Dict[str, Callable[[str, Run], Any]] = {
+    "follow_tip": follow_tip,
+    "async_follow_tip": lambda uri, run: asyncio.run(async_follow_tip(uri, run)),
+    "watch_tx": watch_tx,
+    "async_watch_tx": lambda uri, run: asyncio.run(async_watch_tx(uri, run)),
+}
+
+
+def follow(faults: Faults, method: str) -> Any:
+    simulator = ChainSimulator(faults)
+    run = Run(simulator.chain, consumer_delay=0.0)
+    with simulator as uri:
+        started = time.monotonic()
+        follower = FOLLOWERS[method](uri, run)
+        elapsed = time.monotonic() - started
+    assert follower.state() == follower.expected()
+    if isinstance(follower, TxFollower):
+        kept = [tx for _, _, txs in follower.blocks for tx in txs]
+        assert len(kept) == len(set(kept)), "tx delivered twice"
+    assert run.resets == simulator.servicer.resets
+    assert max(run.recoveries, default=0.0) < MAX_RECOVERY
+    return simulator, run, elapsed
+
+
+@pytest.mark.parametrize("method", FOLLOWERS)
+def test_rollbacks(method: str) -> None:
+    faults = Faults(
+        blocks=150, block_interval=0.001, rollback_every=10, rollback_depth=(1, 4)
+    )
+    simulator, run, _ = follow(faults, method)
+    assert simulator.chain.rollbacks > 0
+    assert run.undos > 0
+
+
+@pytest.mark.parametrize("method", FOLLOWERS)
+def test_stream_resets(method: str) -> None:
+    simulator, run, _ = follow(Faults(blocks=300, reset_every=60), method)
+    assert run.resets == simulator.servicer.resets > 0
+    assert len(run.recoveries) == run.resets
+
+
+@pytest.mark.parametrize("method", FOLLOWERS)
+def test_stalls(method: str) -> None:
+    faults = Faults(blocks=200, spike_every=100, spike=0.05)
+    simulator, run, elapsed = follow(faults, method)
+    assert simulator.servicer.spikes > 0
+    assert run.resets == 0
+    # Stalls only add their own length
+    assert elapsed < simulator.servicer.spikes * faults.spike + MAX_RECOVERY
+
+
+def test_everything_at_once() -> None:
+    faults = Faults(
+        blocks=300,
+        block_interval=0.0005,
+        rollback_every=15,
+        rollback_depth=(1, 5),
+        spike_every=150,
+        spike=0.02,
+        reset_every=80,
+    )
+    for method in FOLLOWERS:
+        follow(faults, method)
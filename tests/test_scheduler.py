@@ -0,0 +1,143 @@
+"""Ordering, retries and failure propagation of `SubmitScheduler`."""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+import grpc
+import pytest
+
+from tests.fakes import FakeRpcError
+from utxorpc.generics.scheduler import (
+    DependencyError,
+    SubmitResult,
+    SubmitScheduler,
+    TokenBucket,
+)
+
+
+class FakeChain:
+    def __init__(self, inputs: Dict[bytes, List[bytes]]) -> None:
+        self.inputs = inputs
+
+    def tx_hash(self, tx: bytes) -> bytes:
+        return tx
+
+    def tx_inputs(self, tx: bytes) -> List[Tuple[bytes, int]]:
+        return [(parent, 0) for parent in self.inputs.get(tx, [])]
+
+
+class FakeSubmitClient:
+    """Txs are their own hash; `outcomes` lists errors to raise before success"""
+
+    def __init__(
+        self,
+        inputs: Dict[bytes, List[bytes]],
+        outcomes: Optional[Dict[bytes, List[Exception]]] = None,
+    ) -> None:
+        self.chain = FakeChain(inputs)
+        self.outcomes = outcomes or {}
+        self.submitted: List[bytes] = []
+
+    async def async_submit_tx(self, tx: bytes) -> bytes:
+        self.submitted.append(tx)
+        errors = self.outcomes.get(tx)
+        if errors:
+            raise errors.pop(0)
+        return b"ref-" + tx
+
+
+class FakeTracker:
+    """Reaches every stage at once, unless told to fail or hang for a ref"""
+
+    def __init__(self, errors: Optional[Dict[bytes, Exception]] = None) -> None:
+        self.errors = errors or {}
+        self.hang: List[bytes] = []
+        self.closed = False
+
+    def track(self, ref: bytes, stage: int = 0) -> "asyncio.Future[int]":
+        future: "asyncio.Future[int]" = asyncio.get_running_loop().create_future()
+        if ref in self.errors:
+            future.set_exception(self.errors[ref])
+        elif ref not in self.hang:
+            future.set_result(stage)
+        return future
+
+    def untrack(self, ref: bytes) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def run(client: Any, txs: List[bytes], **kwargs: Any) -> Dict[bytes, SubmitResult]:
+    async def main() -> Dict[bytes, SubmitResult]:
+        kwargs.setdefault("tracker", FakeTracker())
+        scheduler = SubmitScheduler(client, retry_delay=0.001, **kwargs)
+        for tx in txs:
+            scheduler.add(tx)
+        return await asyncio.wait_for(scheduler.run(), 2)
+
+    return asyncio.run(main())
+
+
+def test_parents_are_submitted_first() -> None:
+    client = FakeSubmitClient({b"c": [b"b"], b"b": [b"a"]})
+    results = run(client, [b"c", b"b", b"a", b"x"])
+    assert all(result.ok for result in results.values())
+    assert client.submitted.index(b"a") < client.submitted.index(b"b")
+    assert client.submitted.index(b"b") < client.submitted.index(b"c")
+
+
+def test_transient_errors_are_retried() -> None:
+    unavailable = FakeRpcError(grpc.StatusCode.UNAVAILABLE)
+    client = FakeSubmitClient({}, {b"a": [unavailable, unavailable]})
+    results = run(client, [b"a"], max_retries=2)
+    assert results[b"a"].ref == b"ref-a"
+    assert client.submitted == [b"a"] * 3
+
+
+def test_rejected_txs_fail_at_once() -> None:
+    client = FakeSubmitClient(
+        {b"b": [b"a"]}, {b"a": [FakeRpcError(grpc.StatusCode.INVALID_ARGUMENT)]}
+    )
+    results = run(client, [b"a", b"b"], max_retries=5)
+    assert client.submitted == [b"a"]
+    assert results[b"a"].error.code() == grpc.StatusCode.INVALID_ARGUMENT
+    assert isinstance(results[b"b"].error, DependencyError)
+    assert results[b"b"].error.__cause__ is results[b"a"].error
+
+
+def test_tracker_errors_fail_dependents() -> None:
+    error = FakeRpcError(grpc.StatusCode.UNAUTHENTICATED)
+    client = FakeSubmitClient({b"b": [b"a"], b"c": [b"b"]})
+    tracker = FakeTracker({b"ref-a": error})
+    results = run(client, [b"a", b"b", b"c", b"x"], tracker=tracker)
+    assert set(results) == {b"a", b"b", b"c", b"x"}
+    # `a` itself was submitted; it's its dependents that can't go on
+    assert results[b"a"].ref == b"ref-a"
+    assert results[b"b"].error.__cause__ is error
+    assert isinstance(results[b"c"].error, DependencyError)
+    assert results[b"x"].ok
+    assert client.submitted == [b"a", b"x"]
+
+
+def test_stage_timeout_fails_dependents() -> None:
+    client = FakeSubmitClient({b"b": [b"a"]})
+    tracker = FakeTracker()
+    tracker.hang.append(b"ref-a")
+    results = run(client, [b"a", b"b"], tracker=tracker, stage_timeout=0.01)
+    assert isinstance(results[b"b"].error, DependencyError)
+    assert isinstance(results[b"b"].error.__cause__, asyncio.TimeoutError)
+
+
+def test_cycles_are_rejected() -> None:
+    client = FakeSubmitClient({b"a": [b"b"], b"b": [b"a"]})
+    with pytest.raises(ValueError):
+        run(client, [b"a", b"b"])
+
+
+def test_token_bucket_validates_its_rate() -> None:
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    with pytest.raises(ValueError):
+        TokenBucket(1, burst=0)
@@ -0,0 +1,100 @@
+"""Bulk submission against the fake server: per-tx results and dedupe."""
+
+import asyncio
+import hashlib
+from typing import Iterator, List
+
+import pytest
+
+from benchmarks.server import FakeServer, tx_cbor
+from utxorpc import CardanoSubmitClient
+from utxorpc.generics.metrics import InMemoryMetrics, Metrics
+
+TXS = [tx_cbor(nonce) for nonce in range(4)]
+
+
+@pytest.fixture(scope="module")
+def uri() -> Iterator[str]:
+    with FakeServer(events=10) as uri:
+        yield uri
+
+
+def ref_of(tx: bytes) -> bytes:
+    # The fake server answers with the hash of the whole tx
+    return hashlib.blake2b(tx, digest_size=32).digest()
+
+
+def client(uri: str, backend: InMemoryMetrics) -> CardanoSubmitClient:
+    return CardanoSubmitClient(
+        uri, secure=False, interceptors=Metrics(backend).interceptors
+    )
+
+
+def submitted(backend: InMemoryMetrics) -> int:
+    return sum(
+        metrics.calls
+        for method, metrics in backend.methods.items()
+        if method.endswith("/SubmitTx")
+    )
+
+
+def test_submit_many_dedupes(uri: str) -> None:
+    backend = InMemoryMetrics()
+    submit = client(uri, backend)
+    with submit.connect():
+        results = submit.submit_many([TXS[0], TXS[1], TXS[0]], max_concurrency=1)
+        refs = [ref_of(TXS[0]), ref_of(TXS[1]), ref_of(TXS[0])]
+        assert [r.ref for r in results] == refs
+        assert all(r.ok for r in results)
+        assert results[0].tx_hash == submit.chain.tx_hash(TXS[0])
+        assert submitted(backend) == 2
+        # Txs accepted by an earlier call aren't sent again
+        results = submit.submit_many([TXS[1], TXS[2]])
+        assert [r.ref for r in results] == [ref_of(TXS[1]), ref_of(TXS[2])]
+        assert submitted(backend) == 3
+
+
+def test_submit_many_reports_undecodable_txs(uri: str) -> None:
+    backend = InMemoryMetrics()
+    submit = client(uri, backend)
+    with submit.connect():
+        results = submit.submit_many([b"\xff", TXS[0]])
+    assert not results[0].ok and results[0].tx_hash == b""
+    assert results[1].ok
+    assert submitted(backend) == 1
+
+
+def test_submitted_cache_is_lru(uri: str) -> None:
+    backend = InMemoryMetrics()
+    submit = client(uri, backend)
+    submit.submitted_cache_size = 2
+    with submit.connect():
+        submit.submit_many(TXS[:2])
+        # Touching TXS[0] makes TXS[1] the least recently used
+        submit.submit_many([TXS[0]])
+        submit.submit_many([TXS[2]])
+        assert submit.memory_stats()["submitted_cache"] == 2
+        assert submitted(backend) == 3
+        submit.submit_many([TXS[0], TXS[2]])
+        assert submitted(backend) == 3
+        submit.submit_many([TXS[1]])
+        assert submitted(backend) == 4
+
+
+def test_async_submit_many_dedupes_in_flight(uri: str) -> None:
+    async def main() -> List[bytes]:
+        backend = InMemoryMetrics()
+        submit = client(uri, backend)
+        async with submit.async_connect():
+            first, second = await asyncio.gather(
+                submit.async_submit_many([TXS[3]] * 5),
+                submit.async_submit_many([TXS[3], TXS[0]]),
+            )
+            assert submitted(backend) == 2
+            assert submit.memory_stats()["in_flight"] == 0
+            await submit.async_submit_many([TXS[0]])
+            assert submitted(backend) == 2
+        return [r.ref for r in first + second if r.ref is not None]
+
+    refs = asyncio.run(main())
+    assert refs == [ref_of(TXS[3])] * 6 + [ref_of(TXS[0])]
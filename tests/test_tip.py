@@ -0,0 +1,109 @@
+"""Tip tracking across applies, heightless resets and reconnects."""
+
+import asyncio
+import time
+from typing import Any, List
+
+import grpc
+from utxorpc_spec.utxorpc.v1alpha.cardano.cardano_pb2 import (  # type: ignore
+    Block,
+    BlockHeader,
+)
+from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import (  # type: ignore
+    AnyChainBlock,
+    BlockRef,
+    FollowTipResponse,
+)
+
+from tests.fakes import FakeClient, FakeRpcError, until
+from utxorpc.cardano import CardanoChain
+from utxorpc.generics.tip import TipTracker
+
+
+def header(height: int) -> BlockRef:
+    return BlockRef(slot=height * 20, hash=height.to_bytes(32, "big"), height=height)
+
+
+def apply(height: int) -> bytes:
+    ref = header(height)
+    block = Block(header=BlockHeader(slot=ref.slot, hash=ref.hash, height=height))
+    return FollowTipResponse(apply=AnyChainBlock(cardano=block)).SerializeToString()
+
+
+def reset(ref: BlockRef) -> bytes:
+    return FollowTipResponse(reset=ref).SerializeToString()
+
+
+def client(tip: int = 10) -> FakeClient:
+    client = FakeClient(CardanoChain())
+    client.stub.tip = header(tip)
+    return client
+
+
+def test_follows_applies_from_the_remote_tip() -> None:
+    async def main() -> None:
+        fake = client()
+        async with TipTracker(fake) as tracker:
+            await until(lambda: fake.stub.open_streams("FollowTip"))
+            assert tracker.height == 10
+            stream = fake.stub.open_streams("FollowTip")[0]
+            assert [ref.hash for ref in stream.request.intersect] == [header(10).hash]
+            stream.send(apply(11))
+            stream.send(apply(12))
+            assert (await asyncio.wait_for(tracker.wait_for_height(12), 1)).slot == 240
+            assert tracker.confirmations(11) == 2
+
+    asyncio.run(main())
+
+
+def test_height_is_unknown_after_a_heightless_reset() -> None:
+    async def main() -> None:
+        fake = client()
+        async with TipTracker(fake) as tracker:
+            await until(lambda: fake.stub.open_streams("FollowTip"))
+            stream = fake.stub.open_streams("FollowTip")[0]
+            point = header(50)
+            stream.send(reset(BlockRef(slot=point.slot, hash=point.hash)))
+            await until(lambda: tracker.messages == 1)
+            assert tracker.slot == point.slot
+            assert tracker.height is None
+            assert tracker.confirmations(50) is None
+            waiter = asyncio.ensure_future(tracker.wait_for_height(1))
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+            # The next block tells the height of the reset point
+            stream.send(apply(51))
+            await asyncio.wait_for(waiter, 1)
+            assert tracker.height == 51
+            assert tracker.confirmations(50) == 2
+
+    asyncio.run(main())
+
+
+def test_reconnects_with_backoff() -> None:
+    async def main() -> None:
+        fake = client()
+        opened: List[float] = []
+        follow = fake.stub.FollowTip
+
+        def timed(request: Any, metadata: Any = None) -> Any:
+            opened.append(time.monotonic())
+            return follow(request, metadata)
+
+        fake.stub.FollowTip = timed  # type: ignore[method-assign]
+        async with TipTracker(fake, reconnect_delay=0.02, max_backoff=0.05) as tracker:
+            for count in range(1, 5):
+                await until(lambda: len(opened) == count)
+                fake.stub.streams["FollowTip"][-1].fail(
+                    FakeRpcError(grpc.StatusCode.UNAVAILABLE)
+                )
+            await until(lambda: len(opened) == 5)
+            gaps = [b - a for a, b in zip(opened, opened[1:])]
+            assert gaps[0] >= 0.02 and gaps[1] >= 0.04
+            assert max(gaps) < 0.5
+            assert tracker.failures == 4 and tracker.reconnects == 4
+            fake.stub.streams["FollowTip"][-1].send(apply(11))
+            await until(lambda: tracker.height == 11)
+            assert tracker.failures == 0
+
+    asyncio.run(main())
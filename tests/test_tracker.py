@@ -0,0 +1,157 @@
+"""Stream rotation, stage targets and error handling of `TxTracker`."""
+
+import asyncio
+from typing import Any, List, Tuple
+
+import grpc
+import pytest
+from utxorpc_spec.utxorpc.v1alpha.submit.submit_pb2 import (  # type: ignore
+    Stage,
+    WaitForTxResponse,
+)
+
+from tests.fakes import FakeClient, FakeRpcError, until
+from utxorpc.generics.tracker import TxTracker
+
+REF_A = b"\xaa" * 32
+REF_B = b"\xbb" * 32
+REF_C = b"\xcc" * 32
+
+
+def tracker(client: FakeClient, **kwargs: Any) -> TxTracker:
+    kwargs.setdefault("rotate_interval", 0.001)
+    return TxTracker(client, **kwargs)
+
+
+def update(ref: bytes, stage: int) -> WaitForTxResponse:
+    return WaitForTxResponse(ref=ref, stage=stage)
+
+
+def test_resolves_at_the_target_stage() -> None:
+    async def main() -> List[Tuple[bytes, int]]:
+        client = FakeClient()
+        seen: List[Tuple[bytes, int]] = []
+        async with tracker(client) as txs:
+            future = txs.track(
+                REF_A, Stage.STAGE_CONFIRMED, callback=lambda r, s: seen.append((r, s))
+            )
+            await until(lambda: client.stub.open_streams("WaitForTx"))
+            stream = client.stub.open_streams("WaitForTx")[0]
+            assert list(stream.request.ref) == [REF_A]
+            stream.send(update(REF_A, Stage.STAGE_MEMPOOL))
+            stream.send(update(REF_A, Stage.STAGE_ACKNOWLEDGED))
+            stream.send(update(REF_A, Stage.STAGE_CONFIRMED))
+            assert await asyncio.wait_for(future, 1) == Stage.STAGE_CONFIRMED
+            assert txs.pending == 0
+        return seen
+
+    assert asyncio.run(main()) == [
+        (REF_A, Stage.STAGE_MEMPOOL),
+        (REF_A, Stage.STAGE_CONFIRMED),
+    ]
+
+
+def test_each_stage_target_gets_its_own_future() -> None:
+    async def main() -> None:
+        client = FakeClient()
+        async with tracker(client) as txs:
+            confirmed = txs.track(REF_A, Stage.STAGE_CONFIRMED)
+            mempool = txs.track(REF_A, Stage.STAGE_MEMPOOL)
+            assert txs.track(REF_A, Stage.STAGE_MEMPOOL) is mempool
+            await until(lambda: client.stub.open_streams("WaitForTx"))
+            stream = client.stub.open_streams("WaitForTx")[0]
+            stream.send(update(REF_A, Stage.STAGE_MEMPOOL))
+            assert await asyncio.wait_for(mempool, 1) == Stage.STAGE_MEMPOOL
+            assert not confirmed.done()
+            # A target already reached resolves at once
+            acknowledged = txs.track(REF_A, Stage.STAGE_ACKNOWLEDGED)
+            assert acknowledged.result() == Stage.STAGE_MEMPOOL
+            stream.send(update(REF_A, Stage.STAGE_CONFIRMED))
+            assert await asyncio.wait_for(confirmed, 1) == Stage.STAGE_CONFIRMED
+
+    asyncio.run(main())
+
+
+def test_rotation_replaces_the_stream_with_all_refs() -> None:
+    async def main() -> None:
+        client = FakeClient()
+        async with tracker(client, overlap=1.0) as txs:
+            first = txs.track(REF_A)
+            await until(lambda: client.stub.open_streams("WaitForTx"))
+            old = client.stub.open_streams("WaitForTx")[0]
+            second = txs.track(REF_B)
+            await until(lambda: len(client.stub.streams["WaitForTx"]) == 2)
+            replacement = client.stub.streams["WaitForTx"][1]
+            assert set(replacement.request.ref) == {REF_A, REF_B}
+            # The old stream is retired once the replacement answers
+            assert not old.closed
+            replacement.send(update(REF_A, Stage.STAGE_CONFIRMED))
+            await until(lambda: old.cancelled)
+            replacement.send(update(REF_B, Stage.STAGE_CONFIRMED))
+            assert await asyncio.wait_for(first, 1) == Stage.STAGE_CONFIRMED
+            assert await asyncio.wait_for(second, 1) == Stage.STAGE_CONFIRMED
+
+    asyncio.run(main())
+
+
+def test_refs_are_split_across_streams() -> None:
+    async def main() -> None:
+        client = FakeClient()
+        async with tracker(client, max_refs_per_stream=2) as txs:
+            for ref in (REF_A, REF_B, REF_C):
+                txs.track(ref)
+            await until(lambda: len(client.stub.open_streams("WaitForTx")) == 2)
+            sizes = sorted(
+                len(s.request.ref) for s in client.stub.open_streams("WaitForTx")
+            )
+            assert sizes == [1, 2]
+
+    asyncio.run(main())
+
+
+def test_transient_errors_resubscribe() -> None:
+    async def main() -> None:
+        client = FakeClient()
+        async with tracker(client) as txs:
+            future = txs.track(REF_A)
+            await until(lambda: client.stub.open_streams("WaitForTx"))
+            client.stub.open_streams("WaitForTx")[0].fail(
+                FakeRpcError(grpc.StatusCode.UNAVAILABLE)
+            )
+            await until(lambda: len(client.stub.streams["WaitForTx"]) == 2)
+            assert txs.failures == 1
+            stream = client.stub.streams["WaitForTx"][1]
+            assert list(stream.request.ref) == [REF_A]
+            stream.send(update(REF_A, Stage.STAGE_CONFIRMED))
+            assert await asyncio.wait_for(future, 1) == Stage.STAGE_CONFIRMED
+            assert txs.failures == 0
+
+    asyncio.run(main())
+
+
+def test_non_retryable_errors_fail_the_futures() -> None:
+    async def main() -> None:
+        client = FakeClient()
+        async with tracker(client) as txs:
+            future = txs.track(REF_A)
+            await until(lambda: client.stub.open_streams("WaitForTx"))
+            client.stub.open_streams("WaitForTx")[0].fail(
+                FakeRpcError(grpc.StatusCode.UNAUTHENTICATED)
+            )
+            with pytest.raises(grpc.RpcError) as error:
+                await asyncio.wait_for(future, 1)
+            assert error.value.code() == grpc.StatusCode.UNAUTHENTICATED
+            assert txs.pending == 0
+
+    asyncio.run(main())
+
+
+def test_close_cancels_unresolved_futures() -> None:
+    async def main() -> None:
+        client = FakeClient()
+        txs = tracker(client)
+        async with txs:
+            future = txs.track(REF_A)
+        assert future.cancelled()
+
+    asyncio.run(main())
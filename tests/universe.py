@@ -0,0 +1,139 @@
+"""Random Cardano txs and predicates over small pools of credentials and assets.
+
+Used by `tests/test_predicate.py` to compare the compiled matchers with the
+reference interpreter, and by `benchmarks/predicates.py` as its workload.
+"""
+
+import random
+from typing import List
+
+from utxorpc_spec.utxorpc.v1alpha.cardano import cardano_pb2  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.query.query_pb2 import (  # type: ignore
+    AnyUtxoPattern,
+    UtxoPredicate,
+)
+from utxorpc_spec.utxorpc.v1alpha.watch.watch_pb2 import (  # type: ignore
+    AnyChainTxPattern,
+    TxPredicate,
+)
+
+
+class Universe:
+    """Small pools of credentials and assets so random draws collide often"""
+
+    def __init__(self, rng: random.Random, size: int) -> None:
+        self.rng = rng
+        self.payments = [rng.randbytes(28) for _ in range(size)]
+        self.stakes = [rng.randbytes(28) for _ in range(size)]
+        self.policies = [rng.randbytes(28) for _ in range(max(size // 4, 2))]
+        self.names = [b"", b"token", b"nft", b"lp"]
+
+    def address(self) -> bytes:
+        kind = self.rng.choice([0x01, 0x61, 0xE1, 0x82])
+        if kind == 0x01:
+            return (
+                bytes([kind])
+                + self.rng.choice(self.payments)
+                + self.rng.choice(self.stakes)
+            )
+        if kind == 0xE1:
+            return bytes([kind]) + self.rng.choice(self.stakes)
+        if kind == 0x61:
+            return bytes([kind]) + self.rng.choice(self.payments)
+        return bytes([kind]) + self.rng.randbytes(40)
+
+    def multiassets(self) -> List[cardano_pb2.Multiasset]:
+        return [
+            cardano_pb2.Multiasset(
+                policy_id=self.rng.choice(self.policies),
+                assets=[
+                    cardano_pb2.Asset(name=self.rng.choice(self.names))
+                    for _ in range(self.rng.randint(1, 2))
+                ],
+            )
+            for _ in range(self.rng.choice([0, 0, 1, 2]))
+        ]
+
+    def output(self) -> cardano_pb2.TxOutput:
+        return cardano_pb2.TxOutput(address=self.address(), assets=self.multiassets())
+
+    def tx(self) -> cardano_pb2.Tx:
+        inputs = [
+            cardano_pb2.TxInput(tx_hash=self.rng.randbytes(32))
+            for _ in range(self.rng.randint(1, 3))
+        ]
+        for tx_input in inputs:
+            if self.rng.random() < 0.7:
+                tx_input.as_output.CopyFrom(self.output())
+        return cardano_pb2.Tx(
+            inputs=inputs,
+            outputs=[self.output() for _ in range(self.rng.randint(1, 4))],
+            mint=self.multiassets(),
+        )
+
+    def address_pattern(self) -> cardano_pb2.AddressPattern:
+        pattern = cardano_pb2.AddressPattern()
+        for _ in range(self.rng.choice([1, 1, 1, 2])):
+            field = self.rng.choice(["exact", "payment", "delegation"])
+            if field == "exact":
+                pattern.exact_address = self.address()
+            elif field == "payment":
+                pattern.payment_part = self.rng.choice(self.payments)
+            else:
+                pattern.delegation_part = self.rng.choice(self.stakes)
+        return pattern
+
+    def asset_pattern(self) -> cardano_pb2.AssetPattern:
+        pattern = cardano_pb2.AssetPattern()
+        if self.rng.random() < 0.8:
+            pattern.policy_id = self.rng.choice(self.policies)
+        if self.rng.random() < 0.4:
+            pattern.asset_name = self.rng.choice(self.names[1:])
+        return pattern
+
+    def output_pattern(self) -> cardano_pb2.TxOutputPattern:
+        pattern = cardano_pb2.TxOutputPattern()
+        if self.rng.random() < 0.7:
+            pattern.address.CopyFrom(self.address_pattern())
+        if self.rng.random() < 0.4:
+            pattern.asset.CopyFrom(self.asset_pattern())
+        return pattern
+
+    def tx_pattern(self) -> cardano_pb2.TxPattern:
+        pattern = cardano_pb2.TxPattern()
+        field = self.rng.choice(
+            ["has_address", "has_address", "moves_asset", "mints_asset"]
+            + ["produces", "consumes"]
+        )
+        if field == "has_address":
+            pattern.has_address.CopyFrom(self.address_pattern())
+        elif field in ("moves_asset", "mints_asset"):
+            getattr(pattern, field).CopyFrom(self.asset_pattern())
+        else:
+            getattr(pattern, field).CopyFrom(self.output_pattern())
+        return pattern
+
+    def tx_predicate(self, depth: int = 0) -> TxPredicate:
+        predicate = TxPredicate()
+        if depth >= 2 or self.rng.random() < 0.5:
+            predicate.match.CopyFrom(AnyChainTxPattern(cardano=self.tx_pattern()))
+            return predicate
+        for field in ("not", "all_of", "any_of"):
+            if self.rng.random() < 0.5:
+                getattr(predicate, field).extend(
+                    self.tx_predicate(depth + 1) for _ in range(self.rng.randint(1, 4))
+                )
+        return predicate
+
+    def utxo_predicate(self, depth: int = 0) -> UtxoPredicate:
+        predicate = UtxoPredicate()
+        if depth >= 2 or self.rng.random() < 0.5:
+            predicate.match.CopyFrom(AnyUtxoPattern(cardano=self.output_pattern()))
+            return predicate
+        for field in ("not", "all_of", "any_of"):
+            if self.rng.random() < 0.5:
+                getattr(predicate, field).extend(
+                    self.utxo_predicate(depth + 1)
+                    for _ in range(self.rng.randint(1, 4))
+                )
+        return predicate
@@ -1,7 +1,48 @@
-from .sync import CardanoBlock, CardanoPoint, CardanoSyncClient
-from .query import CardanoQueryClient
-from .submit import CardanoSubmitClient
-from .watch import CardanoWatchClient
+"""UTxO RPC SDK.
+
+Public names are loaded on first access (PEP 562), so importing the
+package is cheap and only the clients actually used pull in grpc and their
+spec modules.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from .spec_alias import install as _install_spec_alias
+
+_install_spec_alias()
+
+if TYPE_CHECKING:
+    from .cardano import CardanoBlock, CardanoPoint
+    from .sync import CardanoSyncClient
+    from .query import CardanoQueryClient
+    from .submit import CardanoSubmitClient
+    from .watch import CardanoWatchClient
+    from .generics.clients import BackgroundClient
+
+_LAZY: Dict[str, str] = {
+    "CardanoBlock": ".cardano",
+    "CardanoPoint": ".cardano",
+    "CardanoSyncClient": ".sync",
+    "CardanoQueryClient": ".query",
+    "CardanoSubmitClient": ".submit",
+    "CardanoWatchClient": ".watch",
+    "BackgroundClient": ".generics.clients",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
 
 __all__ = [
     # Types
@@ -12,4 +53,5 @@ __all__ = [
     "CardanoQueryClient",
     "CardanoSubmitClient",
     "CardanoWatchClient",
+    "BackgroundClient",
 ]
@@ -0,0 +1,173 @@
+"""Cardano chain types shared by every Cardano client"""
+
+import hashlib
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from typing_extensions import TypeAlias
+from utxorpc_spec.utxorpc.v1alpha.cardano.cardano_pb2 import Block  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import (  # type: ignore
+    AnyChainBlock,
+    BlockRef,
+)
+
+from utxorpc.cbor import array_items, decode, map_items
+from utxorpc.generics import Chain
+from utxorpc.generics.memory import register_cache
+from utxorpc.predicate import compile_tx_predicate
+from utxorpc.generics.wire import find_path
+
+
+CardanoBlock: TypeAlias = Block
+
+
+class CardanoPoint:
+    """Immutable chain point, hashable and ordered by slot then hash"""
+
+    __slots__ = ("slot", "hash")
+
+    slot: int
+    hash: bytes
+
+    def __init__(self, slot: int, hash: Union[bytes, str]):
+        object.__setattr__(self, "slot", slot)
+        if isinstance(hash, str):
+            object.__setattr__(self, "hash", bytes.fromhex(hash))
+        else:
+            object.__setattr__(self, "hash", bytes(hash))
+
+    @classmethod
+    def intern(cls, slot: int, hash: bytes) -> "CardanoPoint":
+        """Return a shared instance for recently seen `(slot, hash)` pairs"""
+        key = (slot, hash)
+        point = _interned.get(key)
+        if point is None:
+            if len(_interned) >= INTERN_SIZE:
+                _interned.clear()
+            point = _interned[key] = cls(slot, hash)
+        return point
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CardanoPoint is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("CardanoPoint is immutable")
+
+    def __reduce__(self):
+        return CardanoPoint, (self.slot, self.hash)
+
+    @property
+    def hex(self) -> str:
+        return self.hash.hex()
+
+    def __repr__(self) -> str:
+        return f"CardanoPoint(slot={self.slot}, hash={self.hash.hex()!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CardanoPoint):
+            return NotImplemented
+        return self.slot == other.slot and self.hash == other.hash
+
+    def __hash__(self) -> int:
+        return hash((self.slot, self.hash))
+
+    def __lt__(self, other: object) -> bool:
+        if not isinstance(other, CardanoPoint):
+            return NotImplemented
+        return (self.slot, self.hash) < (other.slot, other.hash)
+
+    def __le__(self, other: object) -> bool:
+        if not isinstance(other, CardanoPoint):
+            return NotImplemented
+        return (self.slot, self.hash) <= (other.slot, other.hash)
+
+    def __gt__(self, other: object) -> bool:
+        if not isinstance(other, CardanoPoint):
+            return NotImplemented
+        return (self.slot, self.hash) > (other.slot, other.hash)
+
+    def __ge__(self, other: object) -> bool:
+        if not isinstance(other, CardanoPoint):
+            return NotImplemented
+        return (self.slot, self.hash) >= (other.slot, other.hash)
+
+
+# Streams repeat the same points (tips, idle refs, the block of every tx),
+# so conversions share instances through a small cache
+INTERN_SIZE = 4096
+_interned: Dict[Tuple[int, bytes], CardanoPoint] = {}
+register_cache(
+    "cardano.interned_points",
+    lambda: {"entries": len(_interned), "capacity": INTERN_SIZE},
+)
+
+
+class CardanoChain(Chain[CardanoBlock, CardanoPoint]):
+    @staticmethod
+    def any_chain_to_block(message: AnyChainBlock) -> Optional[CardanoBlock]:
+        try:
+            return message.cardano
+        except (IndexError, AttributeError):
+            return None
+
+    @staticmethod
+    def point_to_block_ref(point: CardanoPoint) -> BlockRef:
+        return BlockRef(slot=point.slot, hash=point.hash)
+
+    @staticmethod
+    def block_ref_to_point(block_ref: BlockRef) -> CardanoPoint:
+        return CardanoPoint.intern(block_ref.slot, block_ref.hash)
+
+    @staticmethod
+    def block_to_point(block: CardanoBlock) -> CardanoPoint:
+        return CardanoPoint.intern(block.header.slot, block.header.hash)
+
+    @staticmethod
+    def raw_block_to_point(data: bytes) -> Optional[CardanoPoint]:
+        block_ref = CardanoChain.raw_block_ref(data)
+        if block_ref is None:
+            return None
+        return CardanoChain.block_ref_to_point(block_ref)
+
+    @staticmethod
+    def raw_block_ref(data: bytes) -> Optional[BlockRef]:
+        # AnyChainBlock.cardano (2) -> Block.header (1). BlockHeader shares
+        # the slot/hash/height field numbers of BlockRef, so it parses as one.
+        header = find_path(data, 2, 1)
+        if header is None:
+            return None
+        return BlockRef.FromString(header)
+
+    @staticmethod
+    def tx_hash(tx_bytes: bytes) -> bytes:
+        # The tx id is the blake2b-256 of the body as encoded in the tx
+        start, end = array_items(tx_bytes)[0]
+        return hashlib.blake2b(tx_bytes[start:end], digest_size=32).digest()
+
+    @staticmethod
+    def tx_inputs(tx_bytes: bytes) -> List[Tuple[bytes, int]]:
+        # Inputs are key 0 of the body map, a (possibly tagged) set of
+        # [tx hash, output index] pairs
+        body_start, _ = array_items(tx_bytes)[0]
+        inputs = map_items(tx_bytes, body_start).get(0)
+        if inputs is None:
+            return []
+        return [(bytes(h), int(i)) for h, i in decode(tx_bytes, inputs[0])]
+
+    @staticmethod
+    def any_chain_to_tx(message: Any) -> Optional[Any]:
+        # Both watch.AnyChainTx and submit.TxInMempool carry a `cardano` Tx
+        if not message.HasField("cardano"):
+            return None
+        return message.cardano
+
+    @staticmethod
+    def compile_tx_predicate(predicate: Any) -> Callable[[Any], bool]:
+        return compile_tx_predicate(predicate)
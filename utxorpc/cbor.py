@@ -0,0 +1,129 @@
+"""Minimal CBOR reader for Cardano transaction bytes.
+
+Only what the SDK needs to look inside a signed transaction without a full
+ledger library: slicing items out of their original encoding (hashes must be
+computed over the exact bytes) and decoding small items such as inputs.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+BREAK = 0xFF
+
+
+def _argument(data: bytes, offset: int) -> Tuple[int, int, int]:
+    """Return `(major_type, argument, next_offset)` of the item at `offset`.
+
+    For indefinite-length items the argument is -1.
+    """
+    initial = data[offset]
+    major, info = initial >> 5, initial & 0x1F
+    offset += 1
+    if info < 24:
+        return major, info, offset
+    if info == 31:
+        return major, -1, offset
+    size = {24: 1, 25: 2, 26: 4, 27: 8}.get(info)
+    if size is None:
+        raise ValueError(f"Invalid CBOR additional info {info} at {offset - 1}")
+    return major, int.from_bytes(data[offset : offset + size], "big"), offset + size
+
+
+def item_end(data: bytes, offset: int = 0) -> int:
+    """Return the offset right after the CBOR item starting at `offset`"""
+    major, argument, offset = _argument(data, offset)
+    if major in (0, 1, 7):
+        return offset
+    if major in (2, 3):
+        if argument >= 0:
+            return offset + argument
+        while data[offset] != BREAK:
+            offset = item_end(data, offset)
+        return offset + 1
+    if major == 6:
+        return item_end(data, offset)
+
+    # Arrays hold `argument` items, maps twice as many
+    items = argument * 2 if major == 5 and argument >= 0 else argument
+    if items >= 0:
+        for _ in range(items):
+            offset = item_end(data, offset)
+        return offset
+    while data[offset] != BREAK:
+        offset = item_end(data, offset)
+    return offset + 1
+
+
+def array_items(data: bytes, offset: int = 0) -> List[Tuple[int, int]]:
+    """Return the `(start, end)` offsets of the items of an array.
+
+    Tags wrapping the array (e.g. the set tag 258) are skipped.
+    """
+    major, argument, offset = _argument(data, offset)
+    while major == 6:
+        major, argument, offset = _argument(data, offset)
+    if major != 4:
+        raise ValueError(f"Expected a CBOR array, got major type {major}")
+    items: List[Tuple[int, int]] = []
+    while (argument < 0 and data[offset] != BREAK) or len(items) < argument:
+        end = item_end(data, offset)
+        items.append((offset, end))
+        offset = end
+    return items
+
+
+def map_items(data: bytes, offset: int = 0) -> Dict[Any, Tuple[int, int]]:
+    """Return a map's keys (decoded) and the `(start, end)` of their values"""
+    major, argument, offset = _argument(data, offset)
+    if major != 5:
+        raise ValueError(f"Expected a CBOR map, got major type {major}")
+    items: Dict[Any, Tuple[int, int]] = {}
+    while (argument < 0 and data[offset] != BREAK) or len(items) < argument:
+        key_end = item_end(data, offset)
+        key = decode(data[offset:key_end])
+        value_end = item_end(data, key_end)
+        items[key] = (key_end, value_end)
+        offset = value_end
+    return items
+
+
+def decode(data: bytes, offset: int = 0) -> Any:
+    """Decode integers, byte/text strings, arrays and maps.
+
+    Tags are dropped and simple values other than booleans and null decode
+    to `None`; enough for structural fields such as tx inputs.
+    """
+    major, argument, next_offset = _argument(data, offset)
+    if major == 0:
+        return argument
+    if major == 1:
+        return -1 - argument
+    if major in (2, 3):
+        if argument >= 0:
+            value = data[next_offset : next_offset + argument]
+        else:
+            chunks = []
+            offset = next_offset
+            while data[offset] != BREAK:
+                end = item_end(data, offset)
+                chunks.append(decode(data, offset))
+                offset = end
+            return b"".join(chunks) if major == 2 else "".join(chunks)
+        return bytes(value) if major == 2 else bytes(value).decode("utf-8")
+    if major == 4:
+        return [decode(data, start) for start, _ in array_items(data, offset)]
+    if major == 5:
+        return {
+            key: decode(data, start)
+            for key, (start, _) in map_items(data, offset).items()
+        }
+    if major == 6:
+        return decode(data, next_offset)
+    return {20: False, 21: True}.get(argument)
+
+
+__all__ = [
+    "item_end",
+    "array_items",
+    "map_items",
+    "decode",
+]
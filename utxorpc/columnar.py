@@ -0,0 +1,223 @@
+"""Columnar NumPy batches of Cardano blocks.
+
+Turns a sequence of `CardanoBlock`s (for example the output of
+`dump_history`) into flat arrays so that analytics can be vectorised instead
+of walking protobuf objects:
+
+```python
+batch = blocks_to_columns(client.dump_history(start=point, max_items=100))
+fees_per_block = segment_sum(batch.txs.fee, batch.blocks.tx_offsets)
+```
+
+Nesting is expressed with offset arrays: the transactions of block `i` are
+`txs[blocks.tx_offsets[i]:blocks.tx_offsets[i + 1]]`, and likewise for the
+outputs of a transaction and the address bytes of an output.
+
+Amounts (`fee`, `coin`) are `uint64` columns. `BigInt` values outside that
+range, negative or from 2**64 up, can't be stored in them; a batch
+containing any gets that column as a NumPy object array of Python ints
+instead, which `segment_sum` also handles.
+
+Requires the optional `numpy` dependency (`pip install utxorpc[numpy]`).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "utxorpc.columnar requires numpy. Install it with `pip install utxorpc[numpy]`"
+    ) from e
+
+from utxorpc.cardano import CardanoBlock
+
+HASH_SIZE = 32
+
+UINT64_END = 2**64
+
+
+def big_int_to_int(value: Any) -> int:
+    """Convert a `cardano.BigInt` message into a Python int"""
+    kind = value.WhichOneof("big_int")
+    if kind == "big_u_int":
+        return int.from_bytes(value.big_u_int, "big")
+    if kind == "big_n_int":
+        return -1 - int.from_bytes(value.big_n_int, "big")
+    return value.int
+
+
+def _hashes(values: List[bytes]) -> "np.ndarray":
+    # Hashes can be missing when a field mask drops them, so pad to a fixed
+    # width to keep a single (n, 32) buffer.
+    data = b"".join(v.ljust(HASH_SIZE, b"\0")[:HASH_SIZE] for v in values)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, HASH_SIZE).copy()
+
+
+def _amounts(values: List[int]) -> "np.ndarray":
+    if not values or (min(values) >= 0 and max(values) < UINT64_END):
+        return np.array(values, dtype=np.uint64)
+    return np.array(values, dtype=object)
+
+
+def _offsets(counts: List[int]) -> "np.ndarray":
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+@dataclass
+class BlockColumns:
+    slot: "np.ndarray"
+    height: "np.ndarray"
+    timestamp: "np.ndarray"
+    hash: "np.ndarray"
+    tx_count: "np.ndarray"
+    tx_offsets: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.slot)
+
+
+@dataclass
+class TxColumns:
+    hash: "np.ndarray"
+    fee: "np.ndarray"
+    successful: "np.ndarray"
+    input_count: "np.ndarray"
+    output_count: "np.ndarray"
+    block_index: "np.ndarray"
+    output_offsets: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.fee)
+
+
+@dataclass
+class OutputColumns:
+    coin: "np.ndarray"
+    tx_index: "np.ndarray"
+    address_data: "np.ndarray"
+    address_offsets: "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.coin)
+
+    def address(self, index: int) -> bytes:
+        start, end = self.address_offsets[index], self.address_offsets[index + 1]
+        return self.address_data[start:end].tobytes()
+
+    def addresses(self) -> List[bytes]:
+        data = self.address_data.tobytes()
+        offsets = self.address_offsets.tolist()
+        return [data[offsets[i] : offsets[i + 1]] for i in range(len(self))]
+
+
+@dataclass
+class CardanoColumns:
+    blocks: BlockColumns
+    txs: TxColumns
+    outputs: OutputColumns
+
+
+def blocks_to_columns(blocks: Iterable[Optional[CardanoBlock]]) -> CardanoColumns:
+    """Convert blocks into block, tx and output column tables.
+
+    `None` entries (blocks the chain adapter couldn't decode) are skipped.
+    """
+    slots: List[int] = []
+    heights: List[int] = []
+    timestamps: List[int] = []
+    block_hashes: List[bytes] = []
+    tx_counts: List[int] = []
+
+    tx_hashes: List[bytes] = []
+    fees: List[int] = []
+    successful: List[bool] = []
+    input_counts: List[int] = []
+    output_counts: List[int] = []
+    tx_block_index: List[int] = []
+
+    coins: List[int] = []
+    output_tx_index: List[int] = []
+    addresses: List[bytes] = []
+
+    for block in blocks:
+        if block is None:
+            continue
+        header = block.header
+        block_index = len(slots)
+        slots.append(header.slot)
+        heights.append(header.height)
+        timestamps.append(block.timestamp)
+        block_hashes.append(header.hash)
+        txs = block.body.tx
+        tx_counts.append(len(txs))
+
+        for tx in txs:
+            tx_index = len(fees)
+            tx_hashes.append(tx.hash)
+            fees.append(big_int_to_int(tx.fee))
+            successful.append(tx.successful)
+            input_counts.append(len(tx.inputs))
+            outputs = tx.outputs
+            output_counts.append(len(outputs))
+            tx_block_index.append(block_index)
+
+            for output in outputs:
+                coins.append(big_int_to_int(output.coin))
+                output_tx_index.append(tx_index)
+                addresses.append(output.address)
+
+    address_data = b"".join(addresses)
+
+    return CardanoColumns(
+        blocks=BlockColumns(
+            slot=np.array(slots, dtype=np.uint64),
+            height=np.array(heights, dtype=np.uint64),
+            timestamp=np.array(timestamps, dtype=np.uint64),
+            hash=_hashes(block_hashes),
+            tx_count=np.array(tx_counts, dtype=np.uint32),
+            tx_offsets=_offsets(tx_counts),
+        ),
+        txs=TxColumns(
+            hash=_hashes(tx_hashes),
+            fee=_amounts(fees),
+            successful=np.array(successful, dtype=np.bool_),
+            input_count=np.array(input_counts, dtype=np.uint32),
+            output_count=np.array(output_counts, dtype=np.uint32),
+            block_index=np.array(tx_block_index, dtype=np.int64),
+            output_offsets=_offsets(output_counts),
+        ),
+        outputs=OutputColumns(
+            coin=_amounts(coins),
+            tx_index=np.array(output_tx_index, dtype=np.int64),
+            address_data=np.frombuffer(address_data, dtype=np.uint8).copy(),
+            address_offsets=_offsets([len(a) for a in addresses]),
+        ),
+    )
+
+
+def segment_sum(values: "np.ndarray", offsets: "np.ndarray") -> "np.ndarray":
+    """Sum `values` per parent row given that parent's offset array.
+
+    Empty segments sum to zero, e.g. blocks without transactions.
+    """
+    totals = np.zeros(len(offsets) - 1, dtype=values.dtype)
+    if len(values):
+        starts = offsets[:-1]
+        non_empty = offsets[1:] > starts
+        totals[non_empty] = np.add.reduceat(values, starts[non_empty])
+    return totals
+
+
+__all__ = [
+    "BlockColumns",
+    "TxColumns",
+    "OutputColumns",
+    "CardanoColumns",
+    "big_int_to_int",
+    "blocks_to_columns",
+    "segment_sum",
+]
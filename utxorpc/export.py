@@ -0,0 +1,378 @@
+"""Streaming export of chain history to Arrow IPC or Parquet files.
+
+Blocks are buffered up to `row_group_size` at a time, converted with
+`utxorpc.columnar.blocks_to_columns` and written as one row group of each of
+the `blocks`, `txs` and `outputs` tables, so memory stays bounded no matter
+how long the exported range is.
+
+```python
+with HistoryExporter("history/", format="parquet", compression="zstd") as sink:
+    start = sink.resume_point() or genesis
+    sink.write(client.dump_history(start=start, max_items=1000))
+```
+
+Output is split into parts of at most `blocks_per_file` blocks. A part is
+written under a temporary name and renamed once complete, so an interrupted
+export leaves only whole parts behind; `resume_point` returns the last block
+of the last complete part and blocks at or below it are skipped on write.
+
+To export from `follow_tip`, pass its responses rather than bare blocks and
+set `rollback_depth`. The last `rollback_depth` applied blocks are held back
+so that undos and resets can remove them; only blocks deeper than that are
+written, and `close()` leaves held-back blocks for the next run to apply
+again from `resume_point`. A rollback reaching blocks already written
+raises `ExportRollbackError`.
+
+Fees and coins are written as `uint64`; a batch with `BigInt` amounts
+outside that range raises `ValueError`.
+
+```python
+with HistoryExporter("history/", rollback_depth=2160) as sink:
+    await sink.async_write(client.async_follow_tip(intersect=[tip]))
+```
+
+Requires the optional `pyarrow` and `numpy` dependencies
+(`pip install utxorpc[arrow]`).
+"""
+
+import os
+import re
+from collections import deque
+from typing import Any, AsyncIterable, Deque, Dict, Iterable, List, Optional, Union
+
+try:
+    import numpy as np
+    import pyarrow as pa  # type: ignore
+    import pyarrow.ipc  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "utxorpc.export requires pyarrow. Install it with `pip install utxorpc[arrow]`"
+    ) from e
+
+from utxorpc.columnar import HASH_SIZE, CardanoColumns, blocks_to_columns
+from utxorpc.cardano import CardanoBlock, CardanoPoint
+from utxorpc.generics.clients.sync import FollowTipResponse, FollowTipResponseAction
+
+TABLES = ("blocks", "txs", "outputs")
+
+BLOCKS_SCHEMA = pa.schema(
+    [
+        ("slot", pa.uint64()),
+        ("height", pa.uint64()),
+        ("timestamp", pa.uint64()),
+        ("hash", pa.binary(HASH_SIZE)),
+        ("tx_count", pa.uint32()),
+    ]
+)
+TXS_SCHEMA = pa.schema(
+    [
+        ("block_slot", pa.uint64()),
+        ("hash", pa.binary(HASH_SIZE)),
+        ("fee", pa.uint64()),
+        ("successful", pa.bool_()),
+        ("input_count", pa.uint32()),
+        ("output_count", pa.uint32()),
+    ]
+)
+OUTPUTS_SCHEMA = pa.schema(
+    [
+        ("block_slot", pa.uint64()),
+        ("tx_hash", pa.binary(HASH_SIZE)),
+        ("index", pa.uint32()),
+        ("coin", pa.uint64()),
+        ("address", pa.large_binary()),
+    ]
+)
+SCHEMAS = dict(zip(TABLES, (BLOCKS_SCHEMA, TXS_SCHEMA, OUTPUTS_SCHEMA)))
+
+EXTENSIONS = {"parquet": "parquet", "ipc": "arrow"}
+
+ExportItem = Union[Optional[CardanoBlock], FollowTipResponse]
+
+
+class ExportRollbackError(Exception):
+    """A rollback reached blocks that were already written"""
+
+
+def _hash_array(hashes: "np.ndarray") -> "pa.Array":
+    return pa.FixedSizeBinaryArray.from_buffers(
+        pa.binary(HASH_SIZE), len(hashes), [None, pa.py_buffer(hashes.tobytes())]
+    )
+
+
+def columns_to_tables(columns: CardanoColumns) -> Dict[str, "pa.Table"]:
+    """Build the `blocks`, `txs` and `outputs` Arrow tables of a batch"""
+    blocks, txs, outputs = columns.blocks, columns.txs, columns.outputs
+    if txs.fee.dtype == object or outputs.coin.dtype == object:
+        raise ValueError("Fees and coins must fit in uint64 to be exported")
+    tx_block_slot = blocks.slot[txs.block_index]
+    output_index = np.arange(len(outputs), dtype=np.int64)
+    output_index -= txs.output_offsets[:-1][outputs.tx_index]
+
+    return {
+        "blocks": pa.Table.from_arrays(
+            [
+                pa.array(blocks.slot),
+                pa.array(blocks.height),
+                pa.array(blocks.timestamp),
+                _hash_array(blocks.hash),
+                pa.array(blocks.tx_count),
+            ],
+            schema=BLOCKS_SCHEMA,
+        ),
+        "txs": pa.Table.from_arrays(
+            [
+                pa.array(tx_block_slot),
+                _hash_array(txs.hash),
+                pa.array(txs.fee),
+                pa.array(txs.successful),
+                pa.array(txs.input_count),
+                pa.array(txs.output_count),
+            ],
+            schema=TXS_SCHEMA,
+        ),
+        "outputs": pa.Table.from_arrays(
+            [
+                pa.array(tx_block_slot[outputs.tx_index]),
+                _hash_array(txs.hash[outputs.tx_index]),
+                pa.array(output_index.astype(np.uint32)),
+                pa.array(outputs.coin),
+                pa.LargeBinaryArray.from_buffers(
+                    pa.large_binary(),
+                    len(outputs),
+                    [
+                        None,
+                        pa.py_buffer(outputs.address_offsets.tobytes()),
+                        pa.py_buffer(outputs.address_data.tobytes()),
+                    ],
+                ),
+            ],
+            schema=OUTPUTS_SCHEMA,
+        ),
+    }
+
+
+class HistoryExporter:
+    directory: str
+    format: str
+    row_group_size: int
+    blocks_per_file: int
+    compression: Optional[str]
+    rollback_depth: int
+
+    def __init__(
+        self,
+        directory: str,
+        format: str = "parquet",
+        row_group_size: int = 1024,
+        blocks_per_file: int = 100_000,
+        compression: Optional[str] = None,
+        rollback_depth: int = 0,
+    ) -> None:
+        if format not in EXTENSIONS:
+            raise ValueError(
+                f"Unsupported format {format!r}. Expected one of {list(EXTENSIONS)}"
+            )
+        if row_group_size <= 0 or blocks_per_file <= 0:
+            raise ValueError("row_group_size and blocks_per_file must be positive")
+        if rollback_depth < 0:
+            raise ValueError("rollback_depth can't be negative")
+
+        self.directory = directory
+        self.format = format
+        self.row_group_size = row_group_size
+        self.blocks_per_file = blocks_per_file
+        self.compression = compression
+        self.rollback_depth = rollback_depth
+
+        # Blocks that can still be rolled back, oldest first
+        self._pending: Deque[CardanoBlock] = deque()
+        # Blocks settled but not yet written
+        self._buffer: List[CardanoBlock] = []
+        self._writers: Dict[str, Any] = {}
+        self._part_blocks = 0
+        self._part = 0
+        self._last_point: Optional[CardanoPoint] = None
+        # Last block written by a previous run; blocks up to it are skipped
+        self._resumed_slot: Optional[int] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def __enter__(self) -> "HistoryExporter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _path(self, part: int, table: str, tmp: bool = False) -> str:
+        name = f"part-{part:05d}.{table}.{EXTENSIONS[self.format]}"
+        return os.path.join(self.directory, name + (".tmp" if tmp else ""))
+
+    def _complete_parts(self) -> List[int]:
+        pattern = re.compile(
+            rf"part-(\d+)\.blocks\.{re.escape(EXTENSIONS[self.format])}$"
+        )
+        matches = (pattern.match(name) for name in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in matches if match)
+
+    def _recover(self) -> None:
+        # Temporary files belong to a part that never finished; drop them and
+        # continue after the last complete one.
+        for name in os.listdir(self.directory):
+            if name.startswith("part-") and name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+
+        parts = self._complete_parts()
+        if not parts:
+            return
+        self._part = parts[-1] + 1
+
+        path = self._path(parts[-1], "blocks")
+        if self.format == "parquet":
+            table = pq.read_table(path, columns=["slot", "hash"])
+        else:
+            with pa.memory_map(path) as source:
+                table = pa.ipc.open_file(source).read_all()
+        if table.num_rows:
+            last = table.slice(table.num_rows - 1)
+            self._last_point = CardanoPoint(
+                slot=last.column("slot")[0].as_py(),
+                hash=last.column("hash")[0].as_py(),
+            )
+            self._resumed_slot = self._last_point.slot
+
+    def resume_point(self) -> Optional[CardanoPoint]:
+        """Return the last exported block, or `None` for an empty export"""
+        return self._last_point
+
+    def _open_part(self) -> None:
+        for table in TABLES:
+            path = self._path(self._part, table, tmp=True)
+            schema = SCHEMAS[table]
+            if self.format == "parquet":
+                self._writers[table] = pq.ParquetWriter(
+                    path, schema, compression=self.compression or "none"
+                )
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                self._writers[table] = pa.ipc.new_file(path, schema, options=options)
+
+    def _close_part(self) -> None:
+        if not self._writers:
+            return
+        for table in TABLES:
+            self._writers.pop(table).close()
+        # The blocks table is renamed last since its presence marks the part
+        # as complete.
+        for table in reversed(TABLES):
+            os.replace(
+                self._path(self._part, table, tmp=True), self._path(self._part, table)
+            )
+        self._part += 1
+        self._part_blocks = 0
+
+    def flush(self) -> None:
+        """Write buffered blocks as one row group of each table"""
+        if not self._buffer:
+            return
+        if not self._writers:
+            self._open_part()
+
+        tables = columns_to_tables(blocks_to_columns(self._buffer))
+        for name, table in tables.items():
+            if self.format == "parquet":
+                self._writers[name].write_table(table, row_group_size=len(table) or 1)
+            else:
+                self._writers[name].write_table(table)
+
+        last = self._buffer[-1].header
+        self._last_point = CardanoPoint(slot=last.slot, hash=last.hash)
+        self._part_blocks += len(self._buffer)
+        self._buffer = []
+
+        if self._part_blocks >= self.blocks_per_file:
+            self._close_part()
+
+    def _settled_slot(self) -> Optional[int]:
+        """Slot of the last block that can no longer be rolled back"""
+        if self._buffer:
+            return self._buffer[-1].header.slot
+        return self._last_point.slot if self._last_point is not None else None
+
+    def append(self, block: Optional[CardanoBlock]) -> None:
+        """Add one block on top of the others, flushing a row group once
+        enough blocks are deeper than `rollback_depth`"""
+        if block is None:
+            return
+        if self._resumed_slot is not None and block.header.slot <= self._resumed_slot:
+            # Already written before a restart
+            return
+        self._pending.append(block)
+        while len(self._pending) > self.rollback_depth:
+            self._buffer.append(self._pending.popleft())
+            if len(self._buffer) >= self.row_group_size:
+                self.flush()
+
+    def undo(self, block: Optional[CardanoBlock]) -> None:
+        """Remove `block`, which must be the most recent one"""
+        if block is None:
+            return
+        if self._pending and self._pending[-1].header.hash == block.header.hash:
+            self._pending.pop()
+            return
+        settled = self._settled_slot()
+        if settled is not None and block.header.slot <= settled:
+            raise ExportRollbackError(
+                f"Can't undo block at slot {block.header.slot}; blocks up to slot "
+                f"{settled} are deeper than rollback_depth ({self.rollback_depth})"
+            )
+        # A block skipped on resume, or never applied here
+
+    def reset(self, point: CardanoPoint) -> None:
+        """Drop the blocks after `point`, where the stream continues from"""
+        while self._pending and self._pending[-1].header.slot > point.slot:
+            self._pending.pop()
+        settled = self._settled_slot()
+        if not self._pending and settled is not None and point.slot < settled:
+            raise ExportRollbackError(
+                f"Can't roll back to slot {point.slot}; blocks up to slot "
+                f"{settled} are deeper than rollback_depth ({self.rollback_depth})"
+            )
+
+    def apply(self, item: ExportItem) -> None:
+        """Apply a `FollowTipResponse`, or append a bare block"""
+        if not isinstance(item, FollowTipResponse):
+            self.append(item)
+        elif item.action == FollowTipResponseAction.apply:
+            self.append(item.block)
+        elif item.action == FollowTipResponseAction.undo:
+            self.undo(item.block)
+        elif item.point is not None:
+            self.reset(item.point)
+
+    def write(self, items: Iterable[ExportItem]) -> None:
+        """Consume blocks, e.g. from `dump_history`, or `follow_tip` responses"""
+        for item in items:
+            self.apply(item)
+
+    async def async_write(self, items: AsyncIterable[ExportItem]) -> None:
+        """Consume an async iterable of blocks or `follow_tip` responses"""
+        async for item in items:
+            self.apply(item)
+
+    def close(self) -> None:
+        """Flush settled blocks and finalize the current part.
+
+        Blocks within `rollback_depth` of the tip are not written.
+        """
+        self.flush()
+        self._close_part()
+
+
+__all__ = [
+    "ExportRollbackError",
+    "HistoryExporter",
+    "columns_to_tables",
+]
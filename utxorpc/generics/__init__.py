@@ -1,4 +1,4 @@
-from typing import Optional, Protocol, TypeVar
+from typing import Any, Callable, List, Optional, Protocol, Tuple, TypeVar
 
 from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import (  # type: ignore
     AnyChainBlock,
@@ -9,7 +9,7 @@ BlockType = TypeVar("BlockType", covariant=True)
 PointType = TypeVar("PointType")
 
 
-class Chain(Protocol[BlockType, PointType]):
+class Chain(Protocol[BlockType, PointType]):  # type: ignore[misc]
     @staticmethod
     def any_chain_to_block(message: AnyChainBlock) -> Optional[BlockType]: ...
 
@@ -19,6 +19,27 @@ class Chain(Protocol[BlockType, PointType]):
     @staticmethod
     def block_ref_to_point(block_ref: BlockRef) -> PointType: ...
 
+    @staticmethod
+    def block_to_point(block: BlockType) -> PointType: ...  # type: ignore[misc]
+
+    @staticmethod
+    def raw_block_to_point(data: bytes) -> Optional[PointType]: ...
+
+    @staticmethod
+    def raw_block_ref(data: bytes) -> Optional[BlockRef]: ...
+
+    @staticmethod
+    def tx_hash(tx_bytes: bytes) -> bytes: ...
+
+    @staticmethod
+    def tx_inputs(tx_bytes: bytes) -> List[Tuple[bytes, int]]: ...
+
+    @staticmethod
+    def any_chain_to_tx(message: Any) -> Optional[Any]: ...
+
+    @staticmethod
+    def compile_tx_predicate(predicate: Any) -> Callable[[Any], bool]: ...
+
 
 __all__ = [
     "Chain",
@@ -0,0 +1,272 @@
+"""Bounded buffering between a gRPC stream and its consumer.
+
+`BufferedStream` reads the wrapped stream in a background task and queues
+messages for the consumer, so network reads continue while the consumer is
+busy and bursts are absorbed up to `maxsize` messages. What happens when the
+buffer is full is controlled by an `OverflowPolicy`.
+
+```python
+async with client.async_follow_tip_buffered(intersect=[point], maxsize=500) as stream:
+    async for response in stream:
+        ...
+        print(stream.stats())
+```
+
+Leaving the block closes the stream, which stops the background reader and
+the gRPC call behind it; streams used without `async with` must be closed
+with `aclose()`, even after breaking out of the loop.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from utxorpc.generics.memory import track_memory
+from utxorpc.generics.stats import RateMeter
+
+T = TypeVar("T")
+
+
+class OverflowPolicy(Enum):
+    block = "BLOCK"
+    drop_oldest = "DROP_OLDEST"
+    error = "ERROR"
+
+
+class BufferOverflowError(Exception):
+    """Raised to the consumer when a buffer with `OverflowPolicy.error` fills up"""
+
+
+@dataclass
+class BufferStats:
+    depth: int
+    max_depth: int
+    maxsize: int
+    received: int
+    consumed: int
+    dropped: int
+    receive_rate: float
+    consume_rate: float
+    lag_seconds: float
+    lag_slots: Optional[int]
+    received_bytes: int
+    queued_bytes: int
+    max_queued_bytes: int
+
+
+class BufferedStream(Generic[T]):
+    maxsize: int
+    overflow: OverflowPolicy
+
+    def __init__(
+        self,
+        source: AsyncIterable[T],
+        maxsize: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.block,
+        slot_of: Optional[Callable[[T], Optional[int]]] = None,
+        size_of: Optional[Callable[[T], int]] = None,
+    ) -> None:
+        """Wrap `source` in a buffer of at most `maxsize` messages.
+
+        `slot_of` extracts the slot of a message (or `None` if it has none)
+        and is used to report the consumer's lag in slots. `size_of` (e.g.
+        `utxorpc.generics.memory.message_size`) measures messages for the
+        byte counts of `stats`, which stay at 0 without it.
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._source = source
+        self._slot_of = slot_of
+        self._size_of = size_of
+        # (received at, message, size)
+        self._queue: Deque[Tuple[float, T, int]] = deque()
+        self._condition: Optional[asyncio.Condition] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._error: Optional[Exception] = None
+        self._finished = False
+
+        self._max_depth = 0
+        self._dropped = 0
+        self._received = RateMeter()
+        self._consumed = RateMeter()
+        self._last_wait = 0.0
+        self._received_slot: Optional[int] = None
+        self._consumed_slot: Optional[int] = None
+        self._received_bytes = 0
+        self._queued_bytes = 0
+        self._max_queued_bytes = 0
+        track_memory("buffers", self)
+
+    def _slot(self, item: T) -> Optional[int]:
+        return self._slot_of(item) if self._slot_of is not None else None
+
+    async def _read(self) -> None:
+        assert self._condition is not None
+        condition = self._condition
+        try:
+            async for item in self._source:
+                async with condition:
+                    if len(self._queue) >= self.maxsize:
+                        if self.overflow is OverflowPolicy.error:
+                            raise BufferOverflowError(
+                                f"Stream buffer exceeded {self.maxsize} messages"
+                            )
+                        if self.overflow is OverflowPolicy.drop_oldest:
+                            self._queued_bytes -= self._queue.popleft()[2]
+                            self._dropped += 1
+                        else:
+                            await condition.wait_for(
+                                lambda: len(self._queue) < self.maxsize
+                            )
+
+                    size = self._size_of(item) if self._size_of is not None else 0
+                    self._queue.append((time.monotonic(), item, size))
+                    self._received_bytes += size
+                    self._queued_bytes += size
+                    self._max_queued_bytes = max(
+                        self._max_queued_bytes, self._queued_bytes
+                    )
+                    self._received.mark()
+                    slot = self._slot(item)
+                    if slot is not None:
+                        self._received_slot = slot
+                    self._max_depth = max(self._max_depth, len(self._queue))
+                    condition.notify_all()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error = e
+        finally:
+            self._finished = True
+            async with condition:
+                condition.notify_all()
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._condition = asyncio.Condition()
+            self._task = asyncio.ensure_future(self._read())
+
+    def __aiter__(self) -> "BufferedStream[T]":
+        return self
+
+    async def __aenter__(self) -> "BufferedStream[T]":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def __anext__(self) -> T:
+        self._start()
+        assert self._condition is not None
+        async with self._condition:
+            await self._condition.wait_for(lambda: bool(self._queue) or self._finished)
+            # Messages received before the source failed are delivered first
+            if not self._queue:
+                if self._error is not None:
+                    raise self._error
+                raise StopAsyncIteration
+
+            received_at, item, size = self._queue.popleft()
+            self._queued_bytes -= size
+            self._condition.notify_all()
+
+        self._consumed.mark()
+        self._last_wait = time.monotonic() - received_at
+        slot = self._slot(item)
+        if slot is not None:
+            self._consumed_slot = slot
+        return item
+
+    async def aclose(self) -> None:
+        """Stop reading from the source, close it and discard buffered messages.
+
+        Leaving an `async for` early doesn't stop the background reader, so
+        streams should be closed, or used as an async context manager.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        # Closing an async generator source ends the gRPC call behind it
+        close = getattr(self._source, "aclose", None)
+        if close is not None:
+            await close()
+        self._queue.clear()
+        self._queued_bytes = 0
+        self._finished = True
+
+    def stats(self) -> BufferStats:
+        lag_slots = None
+        if self._received_slot is not None and self._consumed_slot is not None:
+            lag_slots = self._received_slot - self._consumed_slot
+
+        # While messages are queued the consumer is at least as far behind as
+        # the oldest one has been waiting.
+        lag_seconds = self._last_wait
+        if self._queue:
+            lag_seconds = max(lag_seconds, time.monotonic() - self._queue[0][0])
+
+        return BufferStats(
+            depth=len(self._queue),
+            max_depth=self._max_depth,
+            maxsize=self.maxsize,
+            received=self._received.count,
+            consumed=self._consumed.count,
+            dropped=self._dropped,
+            receive_rate=self._received.rate,
+            consume_rate=self._consumed.rate,
+            lag_seconds=lag_seconds,
+            lag_slots=lag_slots,
+            received_bytes=self._received_bytes,
+            queued_bytes=self._queued_bytes,
+            max_queued_bytes=self._max_queued_bytes,
+        )
+
+    def memory_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._queue),
+            "max_depth": self._max_depth,
+            "maxsize": self.maxsize,
+            "received_bytes": self._received_bytes,
+            "queued_bytes": self._queued_bytes,
+            "max_queued_bytes": self._max_queued_bytes,
+        }
+
+
+def buffered(
+    source: AsyncIterable[T],
+    maxsize: int = 1024,
+    overflow: OverflowPolicy = OverflowPolicy.block,
+    slot_of: Optional[Callable[[T], Optional[int]]] = None,
+    size_of: Optional[Callable[[T], int]] = None,
+) -> BufferedStream[T]:
+    """Wrap any async stream in a `BufferedStream`"""
+    return BufferedStream(
+        source, maxsize=maxsize, overflow=overflow, slot_of=slot_of, size_of=size_of
+    )
+
+
+__all__ = [
+    "OverflowPolicy",
+    "BufferOverflowError",
+    "BufferStats",
+    "BufferedStream",
+    "buffered",
+]
@@ -1,10 +1,13 @@
+import importlib
 from contextlib import asynccontextmanager, contextmanager
 from functools import partial
 from typing import (
+    TYPE_CHECKING,
     Any,
     Dict,
     Generic,
     Iterable,
+    List,
     Optional,
     Protocol,
     Sequence,
@@ -17,6 +20,7 @@ from typing import (
 import grpc
 
 from utxorpc.generics import Chain
+from utxorpc.generics.profiler import StageProfiler
 
 
 class StubType(Protocol):
@@ -25,6 +29,52 @@ class StubType(Protocol):
 
 Stub = TypeVar("Stub", bound=StubType)
 
+SYNC_INTERCEPTORS = (
+    grpc.UnaryUnaryClientInterceptor,
+    grpc.UnaryStreamClientInterceptor,
+    grpc.StreamUnaryClientInterceptor,
+    grpc.StreamStreamClientInterceptor,
+)
+
+
+class RawChannel:
+    """Channel proxy whose multi-callables return undecoded response bytes.
+
+    Stubs built on top of it skip protobuf parsing of responses entirely, which
+    is what the `*_raw` client methods rely on.
+    """
+
+    def __init__(self, channel: Union[grpc.Channel, grpc.aio.Channel]) -> None:
+        self._channel = channel
+
+    def unary_unary(
+        self, method: str, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return self._channel.unary_unary(
+            method, request_serializer=request_serializer, **kwargs
+        )
+
+    def unary_stream(
+        self, method: str, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return self._channel.unary_stream(
+            method, request_serializer=request_serializer, **kwargs
+        )
+
+    def stream_unary(
+        self, method: str, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return self._channel.stream_unary(
+            method, request_serializer=request_serializer, **kwargs
+        )
+
+    def stream_stream(
+        self, method: str, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return self._channel.stream_stream(
+            method, request_serializer=request_serializer, **kwargs
+        )
+
 
 class Client(Generic[Stub]):
     uri: str
@@ -35,6 +85,8 @@ class Client(Generic[Stub]):
     async_channel: Optional[grpc.aio.Channel]
     options: Optional[Iterable[Tuple[str, str]]]
     compression: Optional[grpc.Compression]
+    interceptors: List[Any]
+    profiler: Optional[StageProfiler]
 
     chain: Type[Chain]
     stub: Type[Stub]
@@ -47,6 +99,8 @@ class Client(Generic[Stub]):
         options: Optional[Sequence[Tuple[str, Any]]] = None,
         compression: Optional[grpc.Compression] = None,
         ssl_context: Optional[grpc.ChannelCredentials] = None,
+        interceptors: Optional[Sequence[Any]] = None,
+        profiler: Optional[StageProfiler] = None,
     ) -> None:
         self.uri = uri
         self.metadata = metadata or {}
@@ -54,6 +108,17 @@ class Client(Generic[Stub]):
         self.ssl_context = ssl_context
         self.options = options
         self.compression = compression
+        # Blocking (`grpc.*ClientInterceptor`) and asyncio
+        # (`grpc.aio.ClientInterceptor`) interceptors can be mixed; each
+        # channel only installs its own kind
+        self.interceptors = list(interceptors or [])
+        # Can also be attached later; see `utxorpc.generics.profiler`
+        self.profiler = profiler
+
+    def _point_slot(self, point: Optional[Any]) -> Optional[int]:
+        if point is None:
+            return None
+        return self.chain.point_to_block_ref(point).slot
 
     def get_stub(self) -> Stub:
         if self.channel is None:
@@ -71,6 +136,24 @@ class Client(Generic[Stub]):
 
         return self.stub(self.async_channel)
 
+    def get_raw_stub(self) -> Stub:
+        """Like `get_stub`, but responses are returned as serialized bytes"""
+        if self.channel is None:
+            raise Exception(
+                "Missing connect. Meant to be used in connect context manager"
+            )
+
+        return self.stub(RawChannel(self.channel))  # type: ignore
+
+    def get_async_raw_stub(self) -> Stub:
+        """Like `get_async_stub`, but responses are returned as serialized bytes"""
+        if self.async_channel is None:
+            raise Exception(
+                "Missing async_connect. Meant to be used in async connect context manager"
+            )
+
+        return self.stub(RawChannel(self.async_channel))  # type: ignore
+
     @contextmanager
     def connect(self):
         """Perform connection to UTxO RPC endpoint.
@@ -99,8 +182,15 @@ class Client(Generic[Stub]):
                 options=self.options,
                 compression=self.compression,
             )
+        interceptors = [
+            i for i in self.interceptors if isinstance(i, SYNC_INTERCEPTORS)
+        ]
         with get_channel() as channel:
-            self.channel = channel
+            self.channel = (
+                grpc.intercept_channel(channel, *interceptors)
+                if interceptors
+                else channel
+            )
             try:
                 yield self
             finally:
@@ -122,12 +212,16 @@ class Client(Generic[Stub]):
         ```
 
         """
+        interceptors = [
+            i for i in self.interceptors if isinstance(i, grpc.aio.ClientInterceptor)
+        ]
         get_channel = partial(
             grpc.aio.insecure_channel,
             self.uri,
             # Typing bug on grpc lib (https://github.com/grpc/grpc/issues/37025)
             options=self.options,  # type: ignore
             compression=self.compression,
+            interceptors=interceptors or None,
         )
         if self.secure:
             get_channel = partial(
@@ -137,6 +231,7 @@ class Client(Generic[Stub]):
                 # Typing bug on grpc lib (https://github.com/grpc/grpc/issues/37025)
                 options=self.options,  # type: ignore
                 compression=self.compression,
+                interceptors=interceptors or None,
             )
         async with get_channel() as async_channel:
             self.async_channel = async_channel
@@ -146,16 +241,39 @@ class Client(Generic[Stub]):
                 pass
 
 
-# Import at the end to avoid circular imports
-from .sync import SyncClient  # noqa: E402
-from .query import QueryClient  # noqa: E402
-from .submit import SubmitClient  # noqa: E402
-from .watch import WatchClient  # noqa: E402
+if TYPE_CHECKING:
+    from .sync import SyncClient
+    from .query import QueryClient
+    from .submit import SubmitClient
+    from .watch import WatchClient
+    from .background import BackgroundClient
+
+# Service clients are loaded on first access (PEP 562), which also avoids
+# circular imports with the submodules importing `Client`
+_LAZY: Dict[str, str] = {
+    "SyncClient": ".sync",
+    "QueryClient": ".query",
+    "SubmitClient": ".submit",
+    "WatchClient": ".watch",
+    "BackgroundClient": ".background",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "Client",
+    "RawChannel",
     "SyncClient",
     "QueryClient",
     "SubmitClient",
     "WatchClient",
+    "BackgroundClient",
 ]
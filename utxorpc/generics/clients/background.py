@@ -0,0 +1,192 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from . import Client
+
+if TYPE_CHECKING:
+    from .query import QueryClient
+    from .submit import SubmitClient
+    from .sync import SyncClient
+
+C = TypeVar("C", bound=Client)
+R = TypeVar("R")
+SyncC = TypeVar("SyncC", bound="SyncClient")
+QueryC = TypeVar("QueryC", bound="QueryClient")
+SubmitC = TypeVar("SubmitC", bound="SubmitClient")
+
+
+class BackgroundClient(Generic[C]):
+    """Blocking facade over an async client running on a background loop.
+
+    The wrapped client is connected once with `async_connect` on a dedicated
+    event loop thread. Sync callers, e.g. Django views or Celery tasks, submit
+    its `async_*` methods and get `concurrent.futures.Future`s back, so many
+    calls overlap on a single channel instead of each blocking a thread.
+
+    Usage
+    -----
+
+    ```python
+    with BackgroundClient(CardanoSyncClient(uri)) as client:
+        futures = client.fetch_many([point_a, point_b])
+        blocks = [future.result() for future in futures]
+    ```
+    """
+
+    client: C
+    max_concurrency: Optional[int]
+
+    def __init__(self, client: C, max_concurrency: Optional[int] = None) -> None:
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connection: Any = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._futures: Set["Future[Any]"] = set()
+
+    def __enter__(self) -> "BackgroundClient[C]":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def _open(self) -> None:
+        if self.max_concurrency is not None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._connection = self.client.async_connect()
+        await self._connection.__aenter__()
+
+    async def _close(self) -> None:
+        # Calls still running are cancelled, which cancels their futures, so
+        # no thread is left blocked on a result
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._connection.__aexit__(None, None, None)
+
+    def start(self) -> None:
+        """Start the loop thread and connect the client"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="utxorpc-background", daemon=True
+        )
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._open(), self._loop).result()
+        except BaseException:
+            self._stop()
+            raise
+
+    def _stop(self) -> None:
+        assert self._loop is not None and self._thread is not None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+        # Calls submitted too late to start on the loop
+        for future in list(self._futures):
+            future.cancel()
+        self._futures.clear()
+
+    def close(self) -> None:
+        """Disconnect the client and stop the loop thread"""
+        if self._loop is None or self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop).result()
+        finally:
+            self._stop()
+
+    async def _run(self, fn: Callable[..., Awaitable[R]], *args, **kwargs) -> R:
+        if self._semaphore is None:
+            return await fn(*args, **kwargs)
+        async with self._semaphore:
+            return await fn(*args, **kwargs)
+
+    def submit(self, fn: Callable[..., Awaitable[R]], *args, **kwargs) -> "Future[R]":
+        """Schedule `fn(*args, **kwargs)` on the background loop.
+
+        `fn` is usually one of the wrapped client's `async_*` methods.
+        """
+        if self._loop is None:
+            raise Exception(
+                "Missing start. Meant to be used in BackgroundClient context manager"
+            )
+        future = asyncio.run_coroutine_threadsafe(
+            self._run(fn, *args, **kwargs), self._loop
+        )
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    def map(
+        self,
+        fn: Callable[..., Awaitable[R]],
+        *iterables: Iterable[Any],
+        timeout: Optional[float] = None,
+    ) -> Iterator[R]:
+        """Like `Executor.map`: run all calls concurrently, yield in order.
+
+        `timeout` is a deadline for all the results, counted from this call.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+
+        def results() -> Iterator[R]:
+            try:
+                for future in futures:
+                    if deadline is None:
+                        yield future.result()
+                    else:
+                        yield future.result(max(0.0, deadline - time.monotonic()))
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        return results()
+
+    def fetch_many(
+        self: "BackgroundClient[SyncC]", refs: Iterable[Any]
+    ) -> List["Future[Any]"]:
+        """Fetch each block in `refs` concurrently, one future per block"""
+        return [self.submit(self.client.async_fetch_block, [ref]) for ref in refs]
+
+    def read_utxos_many(
+        self: "BackgroundClient[QueryC]",
+        batches: Iterable[Iterable[Any]],
+    ) -> List["Future[Any]"]:
+        """Issue one `ReadUtxos` call per batch of keys concurrently"""
+        return [self.submit(self.client.async_read_utxos, list(k)) for k in batches]
+
+    def submit_many(
+        self: "BackgroundClient[SubmitC]", txs: Iterable[bytes]
+    ) -> List["Future[bytes]"]:
+        """Submit each transaction concurrently, one future per tx"""
+        return [self.submit(self.client.async_submit_tx, tx) for tx in txs]
+
+
+__all__ = [
+    "BackgroundClient",
+]
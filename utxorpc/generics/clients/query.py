@@ -53,11 +53,12 @@ class QueryClient(Client[QueryServiceStub], Generic[BlockType, PointType]):
         if field_mask:
             request.field_mask.CopyFrom(field_mask)
 
-        async for response in stub.SearchUtxos(
+        # SearchUtxos is a unary call; the single page is yielded to keep
+        # the generator interface
+        yield await stub.SearchUtxos(
             request,
             metadata=[(k, v) for k, v in self.metadata.items()],
-        ):
-            yield response
+        )
 
     async def async_read_params(
         self, field_mask: Optional[Any] = None
@@ -105,22 +106,13 @@ class QueryClient(Client[QueryServiceStub], Generic[BlockType, PointType]):
         if field_mask:
             request.field_mask.CopyFrom(field_mask)
 
-        responses = []
-        try:
-            # Try to iterate if it's a stream
-            for response in stub.SearchUtxos(
-                request,
-                metadata=[(k, v) for k, v in self.metadata.items()],
-            ):
-                responses.append(response)
-        except TypeError:
-            # If not iterable, it's a single response
-            response = stub.SearchUtxos(
-                request,
-                metadata=[(k, v) for k, v in self.metadata.items()],
-            )
-            responses.append(response)
-        return responses
+        # SearchUtxos is a unary call; the single page is returned in a list
+        # to keep the interface
+        response = stub.SearchUtxos(
+            request,
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        )
+        return [response]
 
     def read_params(self, field_mask: Optional[Any] = None) -> ReadParamsResponse:
         stub = self.get_stub()
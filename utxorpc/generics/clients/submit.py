@@ -1,4 +1,19 @@
-from typing import AsyncGenerator, Any, Generic, Optional
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import (
+    AsyncGenerator,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+)
+
+import grpc
 
 from utxorpc_spec.utxorpc.v1alpha.submit.submit_pb2 import (  # type: ignore
     SubmitTxRequest,
@@ -12,11 +27,92 @@ from utxorpc_spec.utxorpc.v1alpha.submit.submit_pb2 import (  # type: ignore
 from utxorpc_spec.utxorpc.v1alpha.submit.submit_pb2_grpc import SubmitServiceStub  # type: ignore
 
 from utxorpc.generics import BlockType, PointType
+from utxorpc.generics.buffer import BufferedStream, OverflowPolicy
+from utxorpc.generics.hub import MempoolHub
+from utxorpc.generics.memory import track_memory
+from utxorpc.generics.scheduler import SubmitResult, SubmitScheduler
+from utxorpc.generics.tracker import TxTracker
 from . import Client
 
 
 class SubmitClient(Client[SubmitServiceStub], Generic[BlockType, PointType]):
     stub = SubmitServiceStub
+    submitted_cache_size: int = 100_000
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # tx hash -> ref of txs the server accepted, so retries of a bulk
+        # submission skip them instead of submitting twice
+        self._submitted: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._submitted_lock = threading.Lock()
+        self._in_flight: Dict[bytes, "asyncio.Future[bytes]"] = {}
+        track_memory("submit_clients", self)
+
+    def memory_stats(self) -> Dict[str, Any]:
+        return {
+            "uri": self.uri,
+            "submitted_cache": len(self._submitted),
+            "submitted_cache_size": self.submitted_cache_size,
+            "in_flight": len(self._in_flight),
+        }
+
+    def _cached_ref(self, tx_hash: bytes) -> Optional[bytes]:
+        with self._submitted_lock:
+            ref = self._submitted.get(tx_hash)
+            if ref is not None:
+                self._submitted.move_to_end(tx_hash)
+            return ref
+
+    def _remember(self, tx_hash: bytes, ref: bytes) -> None:
+        with self._submitted_lock:
+            self._submitted[tx_hash] = ref
+            self._submitted.move_to_end(tx_hash)
+            while len(self._submitted) > self.submitted_cache_size:
+                self._submitted.popitem(last=False)
+
+    async def _async_submit_once(self, tx_hash: bytes, tx_bytes: bytes) -> bytes:
+        ref = self._cached_ref(tx_hash)
+        if ref is not None:
+            return ref
+        in_flight = self._in_flight.get(tx_hash)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.ensure_future(self.async_submit_tx(tx_bytes))
+        self._in_flight[tx_hash] = future
+        try:
+            ref = await asyncio.shield(future)
+        finally:
+            del self._in_flight[tx_hash]
+        self._remember(tx_hash, ref)
+        return ref
+
+    async def async_submit_many(
+        self, txs: Iterable[bytes], max_concurrency: int = 16
+    ) -> List[SubmitResult]:
+        """Submit many transactions with up to `max_concurrency` in flight.
+
+        Returns one `SubmitResult` per tx, in input order. Transactions are
+        de-duplicated by hash: duplicates, txs already in flight and txs
+        accepted by an earlier call are not sent again.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def submit(tx_bytes: bytes) -> SubmitResult:
+            try:
+                tx_hash = self.chain.tx_hash(tx_bytes)
+            except Exception as error:
+                return SubmitResult(b"", error=error)
+            async with semaphore:
+                try:
+                    ref = await self._async_submit_once(tx_hash, tx_bytes)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    return SubmitResult(tx_hash, error=error)
+            return SubmitResult(tx_hash, ref=ref)
+
+        return list(await asyncio.gather(*(submit(tx) for tx in txs)))
 
     async def async_submit_tx(self, tx_bytes: bytes) -> bytes:
         """Submit a transaction to the blockchain asynchronously"""
@@ -52,6 +148,52 @@ class SubmitClient(Client[SubmitServiceStub], Generic[BlockType, PointType]):
         ):
             yield response.tx
 
+    def async_watch_mempool_buffered(
+        self,
+        predicate: Optional[TxPredicate] = None,
+        maxsize: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.block,
+        size_of: Optional[Callable[[Any], int]] = None,
+    ) -> BufferedStream[TxInMempool]:
+        """Watch the mempool through a bounded buffer.
+
+        Mempool transactions carry no slot, so only time lag is reported.
+
+        Use it as an async context manager, or call `aclose()`, so the
+        background reader stops when the consumer is done.
+        """
+        return BufferedStream(
+            self.async_watch_mempool(predicate),
+            maxsize=maxsize,
+            overflow=overflow,
+            size_of=size_of,
+        )
+
+    def tx_tracker(self, max_refs_per_stream: int = 1000, **kwargs: Any) -> TxTracker:
+        """Create a `TxTracker` multiplexing many txs over few WaitForTx streams.
+
+        Meant to be used within the async connect context manager.
+        """
+        return TxTracker(self, max_refs_per_stream=max_refs_per_stream, **kwargs)
+
+    def mempool_hub(
+        self, predicate: Optional[TxPredicate] = None, **kwargs: Any
+    ) -> MempoolHub[TxInMempool]:
+        """Create a `MempoolHub` fanning one WatchMempool stream out locally.
+
+        Meant to be used within the async connect context manager.
+        """
+        return MempoolHub(self, predicate=predicate, **kwargs)
+
+    def tx_scheduler(
+        self, rate: Optional[float] = None, **kwargs: Any
+    ) -> SubmitScheduler:
+        """Create a `SubmitScheduler` submitting dependent txs in order.
+
+        Meant to be used within the async connect context manager.
+        """
+        return SubmitScheduler(self, rate=rate, **kwargs)
+
     def submit_tx(self, tx_bytes: bytes) -> bytes:
         """Submit a transaction to the blockchain synchronously"""
         stub = self.get_stub()
@@ -61,3 +203,80 @@ class SubmitClient(Client[SubmitServiceStub], Generic[BlockType, PointType]):
             metadata=[(k, v) for k, v in self.metadata.items()],
         )
         return response.ref
+
+    def submit_many(
+        self, txs: Iterable[bytes], max_concurrency: int = 16
+    ) -> List[SubmitResult]:
+        """Submit many transactions with up to `max_concurrency` in flight.
+
+        Blocking counterpart of `async_submit_many`, pipelining requests
+        over the channel with gRPC futures instead of threads.
+        """
+        stub = self.get_stub()
+        metadata = [(k, v) for k, v in self.metadata.items()]
+        results: List[SubmitResult] = []
+        # tx hash -> indexes of `results` waiting on that tx
+        waiting: Dict[bytes, List[int]] = {}
+        pending: "OrderedDict[bytes, grpc.Future]" = OrderedDict()
+
+        def settle(tx_hash: bytes, future: grpc.Future) -> None:
+            try:
+                ref = future.result().ref
+            except grpc.RpcError as error:
+                for index in waiting.pop(tx_hash):
+                    results[index] = SubmitResult(tx_hash, error=error)
+                return
+            self._remember(tx_hash, ref)
+            for index in waiting.pop(tx_hash):
+                results[index] = SubmitResult(tx_hash, ref=ref)
+
+        for tx_bytes in txs:
+            try:
+                tx_hash = self.chain.tx_hash(tx_bytes)
+            except Exception as error:
+                results.append(SubmitResult(b"", error=error))
+                continue
+            ref = self._cached_ref(tx_hash)
+            if ref is not None:
+                results.append(SubmitResult(tx_hash, ref=ref))
+                continue
+            results.append(SubmitResult(tx_hash))
+            if tx_hash in waiting:
+                waiting[tx_hash].append(len(results) - 1)
+                continue
+
+            # Keep the window full: settle the oldest call before adding more
+            while len(pending) >= max_concurrency:
+                settle(*pending.popitem(last=False))
+            waiting[tx_hash] = [len(results) - 1]
+            pending[tx_hash] = stub.SubmitTx.future(
+                SubmitTxRequest(tx=AnyChainTx(raw=tx_bytes)), metadata=metadata
+            )
+
+        while pending:
+            settle(*pending.popitem(last=False))
+        return results
+
+    def wait_for_tx(self, tx_ref: bytes) -> Generator[Stage, Any, None]:
+        """Wait for a transaction to reach various stages synchronously"""
+        stub = self.get_stub()
+        for response in stub.WaitForTx(
+            WaitForTxRequest(ref=[tx_ref]),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        ):
+            yield response.stage
+
+    def watch_mempool(
+        self, predicate: Optional[TxPredicate] = None
+    ) -> Generator[TxInMempool, Any, None]:
+        """Watch mempool for transactions matching predicate synchronously"""
+        stub = self.get_stub()
+        request = WatchMempoolRequest()
+        if predicate:
+            request.predicate.CopyFrom(predicate)
+
+        for response in stub.WatchMempool(
+            request,
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        ):
+            yield response.tx
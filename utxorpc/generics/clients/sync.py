@@ -1,16 +1,44 @@
 import asyncio
+import time
 from enum import Enum
-from typing import AsyncGenerator, Any, Generic, List, Optional, Iterable
+from functools import partial
+from typing import (
+    AsyncGenerator,
+    Any,
+    Callable,
+    Generator,
+    Generic,
+    List,
+    Optional,
+    Iterable,
+    Tuple,
+    Type,
+)
 
 from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import (  # type: ignore
     DumpHistoryRequest,
     FetchBlockRequest,
     FollowTipRequest,
     ReadTipRequest,
+    AnyChainBlock,
+    BlockRef,
+    FollowTipResponse as FollowTipResponseMessage,
 )
 from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2_grpc import SyncServiceStub  # type: ignore
 
-from utxorpc.generics import BlockType, PointType
+from utxorpc.generics import BlockType, Chain, PointType
+from utxorpc.generics.buffer import BufferedStream, OverflowPolicy
+from utxorpc.generics.headers import HEADER_FIELD_MASK, HeaderChain
+from utxorpc.generics.intersect import (
+    MAX_POINTS,
+    History,
+    Intersection,
+    find_intersect,
+)
+from utxorpc.generics.pipeline import ProcessPipeline, decode_and_transform
+from utxorpc.generics.profiler import profile_stream
+from utxorpc.generics.tip import TipTracker
+from utxorpc.generics.wire import LEN, find_field, iter_fields
 from . import Client
 
 
@@ -42,9 +70,117 @@ class FollowTipResponse(Generic[BlockType, PointType]):
             self.point = point
 
 
+def to_follow_tip_response(
+    chain: Type[Chain], response: FollowTipResponseMessage
+) -> Optional[FollowTipResponse]:
+    """Convert a `FollowTipResponse` message, or `None` if it has no action"""
+    if response.apply.SerializeToString() != b"":
+        return FollowTipResponse(
+            action=FollowTipResponseAction.apply,
+            block=chain.any_chain_to_block(response.apply),
+            point=None,
+        )
+    elif response.undo.SerializeToString() != b"":
+        return FollowTipResponse(
+            action=FollowTipResponseAction.undo,
+            block=chain.any_chain_to_block(response.undo),
+            point=None,
+        )
+    elif response.reset.SerializeToString() != b"":
+        return FollowTipResponse(
+            action=FollowTipResponseAction.reset,
+            block=None,
+            point=chain.block_ref_to_point(response.reset),
+        )
+    return None
+
+
+def decode_follow_tip(chain: Type[Chain], data: bytes) -> Optional[FollowTipResponse]:
+    """Decode a serialized `FollowTipResponse` message"""
+    return to_follow_tip_response(chain, FollowTipResponseMessage.FromString(data))
+
+
+def decode_block(chain: Type[Chain], data: bytes) -> Optional[Any]:
+    """Decode a serialized `AnyChainBlock` message into a chain block"""
+    return chain.any_chain_to_block(AnyChainBlock.FromString(data))
+
+
+RawBlockResponse = Tuple[FollowTipResponseAction, Optional[PointType], bytes]
+HeaderResponse = Tuple[FollowTipResponseAction, BlockRef]
+
+
+def apply_header(headers: HeaderChain, response: HeaderResponse) -> None:
+    """Apply an `async_follow_headers` response to a header chain"""
+    action, header = response
+    if action == FollowTipResponseAction.apply:
+        headers.append(header)
+    elif action == FollowTipResponseAction.undo:
+        headers.rollback(header)
+    else:
+        headers.reset(header)
+
+
 class SyncClient(Client[SyncServiceStub], Generic[BlockType, PointType]):
     stub = SyncServiceStub
 
+    def _raw_block(
+        self, action: FollowTipResponseAction, data: bytes
+    ) -> RawBlockResponse[PointType]:
+        # Prefer the chain-native encoding and fall back to the serialized
+        # AnyChainBlock when the server did not include it.
+        native = find_field(data, 1)
+        return action, self.chain.raw_block_to_point(data), native or data
+
+    def _raw_blocks(self, data: bytes) -> List[RawBlockResponse[PointType]]:
+        # FetchBlockResponse and DumpHistoryResponse keep blocks in field 1
+        return [
+            self._raw_block(FollowTipResponseAction.apply, value)  # type: ignore
+            for number, wire_type, value in iter_fields(data)
+            if number == 1 and wire_type == LEN
+        ]
+
+    def _raw_follow_tip(self, data: bytes) -> Optional[RawBlockResponse[PointType]]:
+        for number, wire_type, value in iter_fields(data):
+            if wire_type != LEN or not value:
+                continue
+            if number == 1:
+                return self._raw_block(FollowTipResponseAction.apply, value)  # type: ignore
+            if number == 2:
+                return self._raw_block(FollowTipResponseAction.undo, value)  # type: ignore
+            if number == 3:
+                return (
+                    FollowTipResponseAction.reset,
+                    self.chain.block_ref_to_point(BlockRef.FromString(value)),
+                    value,  # type: ignore
+                )
+        return None
+
+    def _follow_headers_request(
+        self, intersect: Iterable[PointType], field_mask: Optional[Any]
+    ) -> FollowTipRequest:
+        request = FollowTipRequest(
+            intersect=[self.chain.point_to_block_ref(point) for point in intersect]
+        )
+        if field_mask is not None:
+            request.field_mask.CopyFrom(field_mask)
+        return request
+
+    def _header_response(self, data: bytes) -> Optional[HeaderResponse]:
+        for number, wire_type, value in iter_fields(data):
+            if wire_type != LEN or not value:
+                continue
+            if number in (1, 2):
+                # Only the header is parsed; the body, if any, is skipped
+                header = self.chain.raw_block_ref(value)  # type: ignore
+                if header is None:
+                    return None
+                if number == 1:
+                    return FollowTipResponseAction.apply, header
+                return FollowTipResponseAction.undo, header
+            if number == 3:
+                return FollowTipResponseAction.reset, BlockRef.FromString(value)
+        return None
+
     async def async_fetch_block(self, ref: Iterable[PointType]) -> Optional[BlockType]:
         stub = self.get_async_stub()
         response = await stub.FetchBlock(
@@ -70,34 +206,194 @@ class SyncClient(Client[SyncServiceStub], Generic[BlockType, PointType]):
     async def async_follow_tip(
         self, intersect: Iterable[PointType], poke: int = 1
     ) -> AsyncGenerator[FollowTipResponse[BlockType, PointType], Any]:
+        request = FollowTipRequest(
+            intersect=[self.chain.point_to_block_ref(point) for point in intersect]
+        )
+        metadata = [(k, v) for k, v in self.metadata.items()]
+        if self.profiler is not None:
+            # Reads raw bytes so that parsing can be timed on its own
+            async for follow_tip_response in profile_stream(
+                self.profiler,
+                "async_follow_tip",
+                self.get_async_raw_stub().FollowTip(request, metadata=metadata),
+                FollowTipResponseMessage.FromString,
+                partial(to_follow_tip_response, self.chain),
+            ):
+                if follow_tip_response is not None:
+                    yield follow_tip_response
+                else:
+                    await asyncio.sleep(poke)
+            return
+
         stub = self.get_async_stub()
+        async for response in stub.FollowTip(request, metadata=metadata):
+            follow_tip_response = to_follow_tip_response(self.chain, response)
+            if follow_tip_response is not None:
+                yield follow_tip_response
+            else:
+                await asyncio.sleep(poke)
+
+    def _follow_tip_slot(
+        self, response: FollowTipResponse[BlockType, PointType]
+    ) -> Optional[int]:
+        if response.block is not None:
+            return self._point_slot(self.chain.block_to_point(response.block))
+        return self._point_slot(response.point)
+
+    def async_follow_tip_buffered(
+        self,
+        intersect: Iterable[PointType],
+        poke: int = 1,
+        maxsize: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.block,
+        size_of: Optional[Callable[[Any], int]] = None,
+    ) -> BufferedStream[FollowTipResponse[BlockType, PointType]]:
+        """Follow the tip through a bounded buffer.
+
+        Messages are received in the background while the consumer works;
+        see `BufferedStream.stats` for queue depth, lag and rates, and for
+        buffered bytes if `size_of` is given.
+
+        Use it as an async context manager, or call `aclose()`, so the
+        background reader stops when the consumer is done.
+        """
+        return BufferedStream(
+            self.async_follow_tip(intersect, poke=poke),
+            maxsize=maxsize,
+            overflow=overflow,
+            slot_of=self._follow_tip_slot,
+            size_of=size_of,
+        )
+
+    async def async_follow_tip_parallel(
+        self,
+        intersect: Iterable[PointType],
+        pipeline: ProcessPipeline,
+        transform: Optional[
+            Callable[[FollowTipResponse[BlockType, PointType]], Any]
+        ] = None,
+    ) -> AsyncGenerator[Any, Any]:
+        """Follow the tip decoding messages in `pipeline`'s worker processes.
+
+        Yields `FollowTipResponse`s, or `transform(response)` if a transform is
+        given, in stream order. `transform` runs in the workers, so it must be
+        picklable.
+        """
+        stub = self.get_async_raw_stub()
+        stream = stub.FollowTip(
+            FollowTipRequest(
+                intersect=[self.chain.point_to_block_ref(point) for point in intersect]
+            ),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        )
+        fn = partial(
+            decode_and_transform, partial(decode_follow_tip, self.chain), transform
+        )
+        async for result in pipeline.map(fn, stream):
+            yield result
+
+    async def async_dump_history_parallel(
+        self,
+        start: Optional[PointType],
+        max_items: Optional[int],
+        pipeline: ProcessPipeline,
+        transform: Optional[Callable[[BlockType], Any]] = None,
+    ) -> List[Any]:
+        """Dump history decoding blocks in `pipeline`'s worker processes.
+
+        Returns the blocks, or `transform(block)` for each one, in order.
+        Blocks that can't be converted by the chain adapter are dropped.
+        """
+        stub = self.get_async_raw_stub()
+        response = await stub.DumpHistory(
+            DumpHistoryRequest(
+                start_token=self.chain.point_to_block_ref(start), max_items=max_items
+            ),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        )
+
+        async def blocks() -> AsyncGenerator[bytes, Any]:
+            for number, wire_type, value in iter_fields(response):
+                if number == 1 and wire_type == LEN:
+                    yield value  # type: ignore
+
+        fn = partial(decode_and_transform, partial(decode_block, self.chain), transform)
+        return [result async for result in pipeline.map(fn, blocks())]
+
+    async def async_fetch_block_raw(
+        self, ref: Iterable[PointType]
+    ) -> Optional[RawBlockResponse[PointType]]:
+        """Fetch a block without decoding it into a protobuf object"""
+        stub = self.get_async_raw_stub()
+        response = await stub.FetchBlock(
+            FetchBlockRequest(
+                ref=[self.chain.point_to_block_ref(point) for point in ref]
+            ),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        )
+        blocks = self._raw_blocks(response)
+        return blocks[0] if blocks else None
+
+    async def async_dump_history_raw(
+        self, start: Optional[PointType], max_items: Optional[int]
+    ) -> List[RawBlockResponse[PointType]]:
+        """Dump history as `(action, point, bytes)` tuples"""
+        stub = self.get_async_raw_stub()
+        response = await stub.DumpHistory(
+            DumpHistoryRequest(
+                start_token=self.chain.point_to_block_ref(start), max_items=max_items
+            ),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        )
+        return self._raw_blocks(response)
+
+    async def async_follow_tip_raw(
+        self, intersect: Iterable[PointType], poke: int = 1
+    ) -> AsyncGenerator[RawBlockResponse[PointType], Any]:
+        """Follow the tip yielding `(action, point, bytes)` tuples.
+
+        The bytes are the block's `native_bytes` when present, otherwise the
+        serialized `AnyChainBlock` (or `BlockRef` for resets).
+        """
+        stub = self.get_async_raw_stub()
         async for response in stub.FollowTip(
             FollowTipRequest(
                 intersect=[self.chain.point_to_block_ref(point) for point in intersect]
             ),
             metadata=[(k, v) for k, v in self.metadata.items()],
         ):
-            if response.apply.SerializeToString() != b"":
-                yield FollowTipResponse(
-                    action=FollowTipResponseAction.apply,
-                    block=self.chain.any_chain_to_block(response.apply),
-                    point=None,
-                )
-            elif response.undo.SerializeToString() != b"":
-                yield FollowTipResponse(
-                    action=FollowTipResponseAction.undo,
-                    block=self.chain.any_chain_to_block(response.undo),
-                    point=None,
-                )
-            elif response.reset.SerializeToString() != b"":
-                yield FollowTipResponse(
-                    action=FollowTipResponseAction.reset,
-                    block=None,
-                    point=self.chain.block_ref_to_point(response.reset),
-                )
+            raw = self._raw_follow_tip(response)
+            if raw is not None:
+                yield raw
             else:
                 await asyncio.sleep(poke)
 
+    async def async_follow_headers(
+        self,
+        intersect: Iterable[PointType],
+        headers: Optional[HeaderChain] = None,
+        field_mask: Optional[Any] = HEADER_FIELD_MASK,
+        poke: int = 1,
+    ) -> AsyncGenerator[HeaderResponse, Any]:
+        """Follow the tip yielding `(action, BlockRef)` tuples, headers only.
+
+        `field_mask` asks the server to leave block bodies out; bodies sent
+        anyway are never decoded. Each response is applied to `headers`,
+        if given, before it is yielded.
+        """
+        stub = self.get_async_raw_stub()
+        async for response in stub.FollowTip(
+            self._follow_headers_request(intersect, field_mask),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        ):
+            header = self._header_response(response)
+            if header is None:
+                await asyncio.sleep(poke)
+                continue
+            if headers is not None:
+                apply_header(headers, header)
+            yield header
+
     def fetch_block(self, ref: Iterable[PointType]) -> Optional[BlockType]:
         stub = self.get_stub()
         response = stub.FetchBlock(
@@ -120,6 +416,93 @@ class SyncClient(Client[SyncServiceStub], Generic[BlockType, PointType]):
         )
         return [self.chain.any_chain_to_block(block) for block in response.block]
 
+    def follow_tip(
+        self, intersect: Iterable[PointType], poke: int = 1
+    ) -> Generator[FollowTipResponse[BlockType, PointType], Any, None]:
+        """Follow the tip synchronously, blocking the calling thread"""
+        stub = self.get_stub()
+        for response in stub.FollowTip(
+            FollowTipRequest(
+                intersect=[self.chain.point_to_block_ref(point) for point in intersect]
+            ),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        ):
+            follow_tip_response = to_follow_tip_response(self.chain, response)
+            if follow_tip_response is not None:
+                yield follow_tip_response
+            else:
+                time.sleep(poke)
+
+    def follow_headers(
+        self,
+        intersect: Iterable[PointType],
+        headers: Optional[HeaderChain] = None,
+        field_mask: Optional[Any] = HEADER_FIELD_MASK,
+        poke: int = 1,
+    ) -> Generator[HeaderResponse, Any, None]:
+        """Like `async_follow_headers`, blocking the calling thread"""
+        stub = self.get_raw_stub()
+        for response in stub.FollowTip(
+            self._follow_headers_request(intersect, field_mask),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        ):
+            header = self._header_response(response)
+            if header is None:
+                time.sleep(poke)
+                continue
+            if headers is not None:
+                apply_header(headers, header)
+            yield header
+
+    def fetch_block_raw(
+        self, ref: Iterable[PointType]
+    ) -> Optional[RawBlockResponse[PointType]]:
+        """Fetch a block without decoding it into a protobuf object"""
+        stub = self.get_raw_stub()
+        response = stub.FetchBlock(
+            FetchBlockRequest(
+                ref=[self.chain.point_to_block_ref(point) for point in ref]
+            ),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        )
+        blocks = self._raw_blocks(response)
+        return blocks[0] if blocks else None
+
+    def dump_history_raw(
+        self, start: Optional[PointType], max_items: Optional[int]
+    ) -> List[RawBlockResponse[PointType]]:
+        """Dump history as `(action, point, bytes)` tuples"""
+        stub = self.get_raw_stub()
+        response = stub.DumpHistory(
+            DumpHistoryRequest(
+                start_token=self.chain.point_to_block_ref(start), max_items=max_items
+            ),
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        )
+        return self._raw_blocks(response)
+
+    async def async_find_intersect(
+        self,
+        history: History[PointType],
+        max_points: int = MAX_POINTS,
+        follow_tip: bool = True,
+    ) -> Intersection[PointType]:
+        """Find the most recent point of `history` still on the chain.
+
+        `history` holds points in chain order, oldest first. See
+        `utxorpc.generics.intersect` for how it is searched.
+        """
+        return await find_intersect(
+            self, history, max_points=max_points, follow_tip=follow_tip
+        )
+
+    def tip_tracker(self, **kwargs: Any) -> TipTracker[PointType]:
+        """Create a `TipTracker` keeping the tip in memory from one stream.
+
+        Meant to be used within the async connect context manager.
+        """
+        return TipTracker(self, **kwargs)
+
     async def async_read_tip(self) -> Optional[PointType]:
         stub = self.get_async_stub()
         response = await stub.ReadTip(
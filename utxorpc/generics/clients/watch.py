@@ -1,13 +1,29 @@
-from typing import AsyncGenerator, Any, Generic, Optional
+from functools import partial
+from typing import (
+    AsyncGenerator,
+    Any,
+    Callable,
+    Generator,
+    Generic,
+    Optional,
+    Tuple,
+    Type,
+)
 from enum import Enum
 
 from utxorpc_spec.utxorpc.v1alpha.watch.watch_pb2 import (  # type: ignore
     WatchTxRequest,
+    WatchTxResponse,
     TxPredicate,
+    BlockRef,
 )
 from utxorpc_spec.utxorpc.v1alpha.watch.watch_pb2_grpc import WatchServiceStub  # type: ignore
 
-from utxorpc.generics import BlockType, PointType
+from utxorpc.generics import BlockType, Chain, PointType
+from utxorpc.generics.buffer import BufferedStream, OverflowPolicy
+from utxorpc.generics.hub import WatchHub
+from utxorpc.generics.profiler import profile_stream
+from utxorpc.generics.wire import LEN, find_field, iter_fields
 from . import Client
 
 
@@ -33,48 +49,187 @@ class WatchTxResponseWrapper(Generic[BlockType, PointType]):
         self.block_ref = block_ref
 
 
+def to_watch_tx_response(
+    chain: Type[Chain], response: WatchTxResponse
+) -> Optional[WatchTxResponseWrapper]:
+    """Convert a `WatchTxResponse` message, or `None` if it has no action"""
+    if response.apply.SerializeToString() != b"":
+        return WatchTxResponseWrapper(
+            action=WatchTxResponseAction.apply,
+            tx=response.apply,
+        )
+    elif response.undo.SerializeToString() != b"":
+        return WatchTxResponseWrapper(
+            action=WatchTxResponseAction.undo,
+            tx=response.undo,
+        )
+    elif response.idle.SerializeToString() != b"":
+        return WatchTxResponseWrapper(
+            action=WatchTxResponseAction.idle,
+            block_ref=chain.block_ref_to_point(response.idle),
+        )
+    return None
+
+
+RawWatchTxResponse = Tuple[WatchTxResponseAction, Optional[PointType], bytes]
+
+
 class WatchClient(Client[WatchServiceStub], Generic[BlockType, PointType]):
     stub = WatchServiceStub
 
-    async def async_watch_tx(
+    def _watch_tx_request(
         self,
         predicate: Optional[TxPredicate] = None,
         field_mask: Optional[Any] = None,
         intersect: Optional[Any] = None,
-    ) -> AsyncGenerator[WatchTxResponseWrapper[BlockType, PointType], Any]:
-        """Watch for transactions matching the given predicate"""
-        stub = self.get_async_stub()
-
+    ) -> WatchTxRequest:
         request = WatchTxRequest()
         if predicate:
             request.predicate.CopyFrom(predicate)
         if field_mask:
             request.field_mask.CopyFrom(field_mask)
         if intersect:
-            if hasattr(intersect, "__iter__"):
-                # Convert points to block refs if needed
-                request.intersect.extend(
-                    [self.chain.point_to_block_ref(point) for point in intersect]
+            if not hasattr(intersect, "__iter__"):
+                intersect = [intersect]
+            # Chains build sync BlockRefs; watch requests need their own type
+            for point in intersect:
+                block_ref = self.chain.point_to_block_ref(point)
+                request.intersect.add(slot=block_ref.slot, hash=block_ref.hash)
+        return request
+
+    def _raw_watch_tx(self, data: bytes) -> Optional[RawWatchTxResponse[PointType]]:
+        for number, wire_type, value in iter_fields(data):
+            if wire_type != LEN or not value:
+                continue
+            if number in (1, 2):
+                # AnyChainTx.block (2) is only present if the server sends it
+                block = find_field(value, 2)  # type: ignore
+                return (
+                    WatchTxResponseAction.apply
+                    if number == 1
+                    else WatchTxResponseAction.undo,
+                    self.chain.raw_block_to_point(block) if block else None,
+                    value,  # type: ignore
                 )
-            else:
-                request.intersect.append(self.chain.point_to_block_ref(intersect))
+            if number == 3:
+                return (
+                    WatchTxResponseAction.idle,
+                    self.chain.block_ref_to_point(BlockRef.FromString(value)),
+                    value,  # type: ignore
+                )
+        return None
+
+    async def async_watch_tx(
+        self,
+        predicate: Optional[TxPredicate] = None,
+        field_mask: Optional[Any] = None,
+        intersect: Optional[Any] = None,
+    ) -> AsyncGenerator[WatchTxResponseWrapper[BlockType, PointType], Any]:
+        """Watch for transactions matching the given predicate"""
+        request = self._watch_tx_request(predicate, field_mask, intersect)
+        metadata = [(k, v) for k, v in self.metadata.items()]
+        if self.profiler is not None:
+            # Reads raw bytes so that parsing can be timed on its own
+            async for watch_tx_response in profile_stream(
+                self.profiler,
+                "async_watch_tx",
+                self.get_async_raw_stub().WatchTx(request, metadata=metadata),
+                WatchTxResponse.FromString,
+                partial(to_watch_tx_response, self.chain),
+            ):
+                if watch_tx_response is not None:
+                    yield watch_tx_response
+            return
+
+        stub = self.get_async_stub()
+        async for response in stub.WatchTx(request, metadata=metadata):
+            watch_tx_response = to_watch_tx_response(self.chain, response)
+            if watch_tx_response is not None:
+                yield watch_tx_response
+
+    def watch_tx(
+        self,
+        predicate: Optional[TxPredicate] = None,
+        field_mask: Optional[Any] = None,
+        intersect: Optional[Any] = None,
+    ) -> Generator[WatchTxResponseWrapper[BlockType, PointType], Any, None]:
+        """Watch for transactions matching the given predicate synchronously"""
+        stub = self.get_stub()
+        request = self._watch_tx_request(predicate, field_mask, intersect)
+
+        for response in stub.WatchTx(
+            request,
+            metadata=[(k, v) for k, v in self.metadata.items()],
+        ):
+            watch_tx_response = to_watch_tx_response(self.chain, response)
+            if watch_tx_response is not None:
+                yield watch_tx_response
+
+    async def async_watch_tx_raw(
+        self,
+        predicate: Optional[TxPredicate] = None,
+        field_mask: Optional[Any] = None,
+        intersect: Optional[Any] = None,
+    ) -> AsyncGenerator[RawWatchTxResponse[PointType], Any]:
+        """Watch for transactions yielding `(action, point, bytes)` tuples.
+
+        The bytes are the undecoded serialized `AnyChainTx` (or `BlockRef` for
+        idle events), so no protobuf parsing happens on the client.
+        """
+        stub = self.get_async_raw_stub()
+        request = self._watch_tx_request(predicate, field_mask, intersect)
 
         async for response in stub.WatchTx(
             request,
             metadata=[(k, v) for k, v in self.metadata.items()],
         ):
-            if response.apply.SerializeToString() != b"":
-                yield WatchTxResponseWrapper(
-                    action=WatchTxResponseAction.apply,
-                    tx=response.apply,
-                )
-            elif response.undo.SerializeToString() != b"":
-                yield WatchTxResponseWrapper(
-                    action=WatchTxResponseAction.undo,
-                    tx=response.undo,
-                )
-            elif response.idle.SerializeToString() != b"":
-                yield WatchTxResponseWrapper(
-                    action=WatchTxResponseAction.idle,
-                    block_ref=self.chain.block_ref_to_point(response.idle),
-                )
+            raw = self._raw_watch_tx(response)
+            if raw is not None:
+                yield raw
+
+    def _watch_tx_slot(
+        self, response: WatchTxResponseWrapper[BlockType, PointType]
+    ) -> Optional[int]:
+        if response.block_ref is not None:
+            return self._point_slot(response.block_ref)
+        if response.tx is not None and response.tx.HasField("block"):
+            block = self.chain.any_chain_to_block(response.tx.block)
+            if block is not None:
+                return self._point_slot(self.chain.block_to_point(block))
+        return None
+
+    def async_watch_tx_buffered(
+        self,
+        predicate: Optional[TxPredicate] = None,
+        field_mask: Optional[Any] = None,
+        intersect: Optional[Any] = None,
+        maxsize: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.block,
+        size_of: Optional[Callable[[Any], int]] = None,
+    ) -> BufferedStream[WatchTxResponseWrapper[BlockType, PointType]]:
+        """Watch for transactions through a bounded buffer.
+
+        Slot lag is only reported when the server includes the tx's block.
+
+        Use it as an async context manager, or call `aclose()`, so the
+        background reader stops when the consumer is done.
+        """
+        return BufferedStream(
+            self.async_watch_tx(predicate, field_mask, intersect),
+            maxsize=maxsize,
+            overflow=overflow,
+            slot_of=self._watch_tx_slot,
+            size_of=size_of,
+        )
+
+    def watch_hub(
+        self,
+        field_mask: Optional[Any] = None,
+        intersect: Optional[Any] = None,
+        **kwargs: Any,
+    ) -> WatchHub[WatchTxResponseWrapper[BlockType, PointType]]:
+        """Create a `WatchHub` serving many predicates from one WatchTx stream.
+
+        Meant to be used within the async connect context manager.
+        """
+        return WatchHub(self, field_mask=field_mask, intersect=intersect, **kwargs)
@@ -0,0 +1,226 @@
+"""Block headers without bodies, and a chain of them checked link by link.
+
+Tip tracking and confirmation counting only need each block's slot, hash
+and height. `SyncClient.async_follow_headers` follows the tip asking the
+server for headers only, with `HEADER_FIELD_MASK`, and reads the header
+straight out of each message's bytes, so bodies sent by servers that
+ignore the mask are skipped without being decoded.
+
+`HeaderChain` keeps those headers in compact arrays (40 bytes per header)
+and checks that each one extends the previous one: heights follow each
+other, slots increase and, when the caller knows it, the parent hash is
+the previous header's. Undos must remove the tip and resets cut the chain
+back to their point, so a missed or reordered message raises
+`HeaderLinkError` instead of silently corrupting the chain. Intersect
+points sent back by servers may carry no height; after a reset to one, the
+height of the chain is unknown until the next header is applied.
+
+```python
+headers = HeaderChain(max_length=2160)
+async for action, header in client.async_follow_headers([tip], headers=headers):
+    print(headers.confirmations(tx_block_height))
+```
+"""
+
+from array import array
+from typing import Any, Dict, Optional
+
+from google.protobuf.field_mask_pb2 import FieldMask  # type: ignore
+from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import BlockRef  # type: ignore
+
+from utxorpc.generics.memory import track_memory
+
+# Relative to the chain's block message, where servers apply the mask
+HEADER_FIELD_MASK = FieldMask(paths=["header"])
+
+HASH_SIZE = 32
+
+
+class HeaderLinkError(Exception):
+    """A header doesn't extend, or isn't the tip of, the header chain"""
+
+
+class HeaderChain:
+    """Consecutive headers up to the tip, optionally only the last `max_length`.
+
+    Rollbacks deeper than `max_length` can't be checked and raise
+    `HeaderLinkError`, so it should cover the chain's rollback limit.
+    """
+
+    max_length: Optional[int]
+    applied: int
+    undone: int
+    resets: int
+
+    def __init__(
+        self, max_length: Optional[int] = None, hash_size: int = HASH_SIZE
+    ) -> None:
+        if max_length is not None and max_length <= 0:
+            raise ValueError("max_length must be positive")
+        self.max_length = max_length
+        self.hash_size = hash_size
+        self.applied = 0
+        self.undone = 0
+        self.resets = 0
+        self._slots = array("q")
+        self._hashes = bytearray()
+        # Height of the first header kept; heights are consecutive after it
+        self._base = 0
+        # False after a reset to a point without a height, until an append
+        self._base_known = True
+        track_memory("header_chains", self)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _header(self, index: int) -> BlockRef:
+        start = index * self.hash_size
+        return BlockRef(
+            slot=self._slots[index],
+            hash=bytes(self._hashes[start : start + self.hash_size]),
+            height=self._base + index,
+        )
+
+    @property
+    def tip(self) -> Optional[BlockRef]:
+        return self._header(len(self._slots) - 1) if self._slots else None
+
+    @property
+    def height(self) -> Optional[int]:
+        if not self._slots or not self._base_known:
+            return None
+        return self._base + len(self._slots) - 1
+
+    def get(self, height: int) -> Optional[BlockRef]:
+        """The header at `height`, if it is kept"""
+        index = height - self._base
+        if self._base_known and 0 <= index < len(self._slots):
+            return self._header(index)
+        return None
+
+    def _index_of(self, hash: bytes) -> Optional[int]:
+        if len(hash) != self.hash_size:
+            return None
+        end = len(self._hashes)
+        while True:
+            start = self._hashes.rfind(hash, 0, end)
+            if start < 0:
+                return None
+            if start % self.hash_size == 0:
+                return start // self.hash_size
+            end = start + len(hash) - 1
+
+    def height_of(self, hash: bytes) -> Optional[int]:
+        """Height of the header with `hash`, searching from the tip"""
+        index = self._index_of(hash)
+        if index is None or not self._base_known:
+            return None
+        return self._base + index
+
+    def __contains__(self, hash: object) -> bool:
+        return isinstance(hash, bytes) and self._index_of(hash) is not None
+
+    def confirmations(self, height: int) -> Optional[int]:
+        """Headers on top of the one at `height`, itself included"""
+        tip = self.height
+        if tip is None:
+            return None
+        return max(0, tip - height + 1)
+
+    def _push(self, slot: int, hash: bytes) -> None:
+        if len(hash) != self.hash_size:
+            raise ValueError(f"Header hashes must be {self.hash_size} bytes")
+        self._slots.append(slot)
+        self._hashes += hash
+        excess = len(self._slots) - (self.max_length or len(self._slots))
+        # Trim in batches so that deleting from the front stays amortized
+        if excess > 0 and excess >= (self.max_length or 0) // 8:
+            del self._slots[:excess]
+            del self._hashes[: excess * self.hash_size]
+            self._base += excess
+
+    def append(self, header: BlockRef, parent_hash: Optional[bytes] = None) -> None:
+        """Add `header` on top of the tip, checking that it links to it"""
+        if self._slots:
+            tip = self._header(len(self._slots) - 1)
+            if not self._base_known:
+                # The reset point had no height; it is the header's parent
+                if header.slot <= tip.slot:
+                    raise HeaderLinkError(
+                        f"Header {header.height} at slot {header.slot} doesn't "
+                        f"follow slot {tip.slot}"
+                    )
+                tip.height = header.height - 1
+            elif header.height != tip.height + 1 or header.slot <= tip.slot:
+                raise HeaderLinkError(
+                    f"Header {header.height} at slot {header.slot} doesn't follow "
+                    f"{tip.height} at slot {tip.slot}"
+                )
+            if parent_hash is not None and parent_hash != tip.hash:
+                raise HeaderLinkError(
+                    f"Header {header.height} has parent {parent_hash.hex()}, "
+                    f"the tip is {tip.hash.hex()}"
+                )
+            if not self._base_known:
+                self._base = header.height - len(self._slots)
+        else:
+            self._base = header.height
+        self._base_known = True
+        self._push(header.slot, header.hash)
+        self.applied += 1
+
+    def rollback(self, header: BlockRef) -> None:
+        """Remove `header`, which must be the tip"""
+        tip = self.tip
+        if tip is None or tip.hash != header.hash:
+            raise HeaderLinkError(
+                f"Can't undo header {header.height}, it is not the tip"
+            )
+        del self._slots[-1]
+        del self._hashes[-self.hash_size :]
+        self.undone += 1
+
+    def reset(self, point: BlockRef) -> None:
+        """Cut the chain back to `point`, or restart from it if it isn't kept.
+
+        A restart from a point without a height (0) leaves the height
+        unknown until the next header is applied.
+        """
+        index = self._index_of(point.hash)
+        if index is None:
+            del self._slots[:]
+            del self._hashes[:]
+            self._base = point.height
+            self._base_known = point.height > 0
+            self._push(point.slot, point.hash)
+        else:
+            index += 1
+            del self._slots[index:]
+            del self._hashes[index * self.hash_size :]
+        self.resets += 1
+
+    def nbytes(self) -> int:
+        return self._slots.itemsize * len(self._slots) + len(self._hashes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "length": len(self),
+            "height": self.height,
+            "applied": self.applied,
+            "undone": self.undone,
+            "resets": self.resets,
+        }
+
+    def memory_stats(self) -> Dict[str, Any]:
+        return {"headers": len(self), "bytes": self.nbytes()}
+
+    def __repr__(self) -> str:
+        return f"HeaderChain(length={len(self)}, height={self.height})"
+
+
+__all__ = [
+    "HASH_SIZE",
+    "HEADER_FIELD_MASK",
+    "HeaderChain",
+    "HeaderLinkError",
+]
@@ -0,0 +1,555 @@
+"""Share one server stream between many local subscribers.
+
+Each subscriber registers a predicate; the hub evaluates it locally against
+every message of a single server stream and queues matches for that
+subscriber, so the number of server streams stays constant however many
+subscribers there are.
+
+`MempoolHub` reads one `WatchMempool` stream. `WatchHub` merges subscriber
+predicates into a single `any_of` `WatchTx` stream and reopens it, from the
+last fully delivered block, when a subscriber is added.
+
+Server streams that end or fail are logged and reopened, backing off
+exponentially while failures repeat. Errors that retrying can't fix, such
+as `UNAUTHENTICATED`, end every subscription with the error instead.
+
+```python
+async with client.mempool_hub() as hub:
+    payments = hub.subscribe(payment_predicate)
+    async for tx in payments:
+        ...
+```
+"""
+
+import asyncio
+import itertools
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+import grpc
+
+from utxorpc.generics.buffer import BufferOverflowError, OverflowPolicy
+from utxorpc.generics.memory import track_memory
+from utxorpc.generics.tracker import NON_RETRYABLE
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_subscription_ids = itertools.count()
+
+
+class Subscription(Generic[T]):
+    """Queue of the hub messages matching one subscriber's predicate"""
+
+    id: int
+    predicate: Any
+    maxsize: int
+    overflow: OverflowPolicy
+    delivered: int
+    dropped: int
+    max_depth: int
+
+    def __init__(
+        self,
+        hub: Any,
+        predicate: Any,
+        matcher: Optional[Callable[[Any], bool]],
+        maxsize: int,
+        overflow: OverflowPolicy,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        # Unlike `id()`, never reused by a later subscription
+        self.id = next(_subscription_ids)
+        self.predicate = predicate
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.delivered = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self._hub = hub
+        self._matcher = matcher
+        self._queue: Deque[T] = deque()
+        self._condition = asyncio.Condition()
+        self._error: Optional[Exception] = None
+        self._finished = False
+
+    def matches(self, tx: Any) -> bool:
+        return self._matcher is None or (tx is not None and self._matcher(tx))
+
+    async def _put(self, item: T) -> None:
+        async with self._condition:
+            if self._finished:
+                return
+            if len(self._queue) >= self.maxsize:
+                if self.overflow is OverflowPolicy.error:
+                    self._error = BufferOverflowError(
+                        f"Subscription exceeded {self.maxsize} messages"
+                    )
+                    self._finished = True
+                    self._condition.notify_all()
+                    return
+                if self.overflow is OverflowPolicy.drop_oldest:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    await self._condition.wait_for(
+                        lambda: len(self._queue) < self.maxsize or self._finished
+                    )
+                    if self._finished:
+                        return
+            self._queue.append(item)
+            self.delivered += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._condition.notify_all()
+
+    async def _finish(self, error: Optional[Exception] = None) -> None:
+        async with self._condition:
+            if error is not None and self._error is None:
+                self._error = error
+            self._finished = True
+            self._condition.notify_all()
+
+    def __aiter__(self) -> "Subscription[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        async with self._condition:
+            await self._condition.wait_for(lambda: bool(self._queue) or self._finished)
+            if self._queue:
+                item = self._queue.popleft()
+                self._condition.notify_all()
+                return item
+            if self._error is not None:
+                raise self._error
+            raise StopAsyncIteration
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    async def aclose(self) -> None:
+        """Unsubscribe, discarding queued messages"""
+        await self._hub.unsubscribe(self)
+
+
+class _Hub(ABC, Generic[T]):
+    maxsize: int
+    overflow: OverflowPolicy
+    reconnect_delay: float
+    max_backoff: float
+    received: int
+    failures: int
+    reconnects: int
+
+    def __init__(
+        self,
+        client: Any,
+        maxsize: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.drop_oldest,
+        reconnect_delay: float = 1.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.client = client
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.reconnect_delay = reconnect_delay
+        self.max_backoff = max_backoff
+        self.received = 0
+        # Consecutive stream failures, reset by any message
+        self.failures = 0
+        self.reconnects = 0
+        self._subscriptions: Dict[int, Subscription[T]] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+        track_memory("hubs", self)
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def _subscription(
+        self,
+        predicate: Any,
+        maxsize: Optional[int],
+        overflow: Optional[OverflowPolicy],
+        matcher: Optional[Callable[[Any], bool]] = None,
+    ) -> Subscription[T]:
+        if matcher is not None and predicate is not None:
+            raise ValueError("Pass either a predicate or a matcher, not both")
+        if predicate is not None:
+            matcher = self.client.chain.compile_tx_predicate(predicate)
+        return Subscription(
+            self,
+            predicate,
+            matcher,
+            maxsize or self.maxsize,
+            overflow or self.overflow,
+        )
+
+    async def unsubscribe(self, subscription: Subscription[T]) -> None:
+        self._subscriptions.pop(subscription.id, None)
+        subscription._queue.clear()
+        await subscription._finish()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "subscribers": self.subscribers,
+            "failures": self.failures,
+            "reconnects": self.reconnects,
+            "delivered": sum(s.delivered for s in self._subscriptions.values()),
+            "dropped": sum(s.dropped for s in self._subscriptions.values()),
+            "max_depth": max(
+                (s.depth for s in self._subscriptions.values()), default=0
+            ),
+        }
+
+    def memory_stats(self) -> Dict[str, Any]:
+        subscriptions = list(self._subscriptions.values())
+        return {
+            "hub": type(self).__name__,
+            "subscribers": len(subscriptions),
+            "queued": sum(s.depth for s in subscriptions),
+            "max_depth": max((s.max_depth for s in subscriptions), default=0),
+        }
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop the server stream and end every subscription"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in list(self._subscriptions.values()):
+            await subscription._finish()
+        self._subscriptions.clear()
+
+    async def _end(self, error: Optional[Exception]) -> None:
+        for subscription in list(self._subscriptions.values()):
+            await subscription._finish(error)
+
+    async def _backoff(self, error: Optional[Exception]) -> bool:
+        """Wait before reopening a server stream that ended with `error`.
+
+        Returns False, having ended every subscription with it, if `error`
+        can't be fixed by retrying.
+        """
+        name = type(self).__name__
+        if isinstance(error, grpc.RpcError) and error.code() in NON_RETRYABLE:
+            logger.error("%s stream failed, not retrying: %s", name, error)
+            await self._end(error)
+            return False
+        self.failures += 1
+        if error is None:
+            logger.warning("%s stream ended (%d in a row)", name, self.failures)
+        else:
+            logger.warning(
+                "%s stream failed (%d in a row): %s", name, self.failures, error
+            )
+        delay = self.reconnect_delay * 2 ** min(self.failures - 1, 16)
+        await asyncio.sleep(min(self.max_backoff, delay))
+        self.reconnects += 1
+        return True
+
+    @abstractmethod
+    async def _run(self) -> None: ...
+
+
+class MempoolHub(_Hub[T]):
+    """One `WatchMempool` stream shared by many locally filtered subscribers"""
+
+    def __init__(
+        self,
+        client: Any,
+        predicate: Any = None,
+        maxsize: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.drop_oldest,
+        reconnect_delay: float = 1.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        """Create a hub over a connected async `SubmitClient`.
+
+        `predicate`, if given, is applied by the server to the shared stream
+        and should cover every subscriber. `maxsize` and `overflow` are the
+        defaults for subscriber queues; with `OverflowPolicy.block` a slow
+        subscriber holds back delivery to all others. The stream is reopened
+        `reconnect_delay` seconds after it ends, doubling while failures
+        repeat, up to `max_backoff` seconds.
+        """
+        super().__init__(
+            client,
+            maxsize=maxsize,
+            overflow=overflow,
+            reconnect_delay=reconnect_delay,
+            max_backoff=max_backoff,
+        )
+        self.predicate = predicate
+
+    def subscribe(
+        self,
+        predicate: Any = None,
+        maxsize: Optional[int] = None,
+        overflow: Optional[OverflowPolicy] = None,
+        matcher: Optional[Callable[[Any], bool]] = None,
+    ) -> Subscription[T]:
+        """Subscribe to mempool txs matching `predicate` (all if None).
+
+        Instead of a predicate, `matcher` may be any function of the chain's
+        tx, e.g. `AddressIndex.matches`.
+        """
+        subscription = self._subscription(predicate, maxsize, overflow, matcher)
+        self._subscriptions[subscription.id] = subscription
+        self.start()
+        return subscription
+
+    async def _run(self) -> None:
+        chain = self.client.chain
+        while True:
+            error: Optional[Exception] = None
+            try:
+                async for tx in self.client.async_watch_mempool(self.predicate):
+                    self.received += 1
+                    self.failures = 0
+                    chain_tx = chain.any_chain_to_tx(tx)
+                    for subscription in list(self._subscriptions.values()):
+                        if subscription.matches(chain_tx):
+                            await subscription._put(tx)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+            if not await self._backoff(error):
+                return
+
+
+class WatchHub(_Hub[T]):
+    """One `WatchTx` stream shared by many locally filtered subscribers.
+
+    The server stream carries the `any_of` union of the subscribers'
+    predicates. Adding a subscriber reopens it with the new union,
+    intersecting at the last block whose txs were all delivered. Txs of the
+    following block are skipped only for the subscribers they were already
+    dispatched to, so existing subscribers see neither gaps nor duplicates
+    and new ones get the whole block. This relies on
+    the server reporting block refs (idle events or `AnyChainTx.block`);
+    without them the new stream starts at the tip. Removing a subscriber
+    only narrows the union at the next reopen.
+    """
+
+    rotate_interval: float
+
+    def __init__(
+        self,
+        client: Any,
+        field_mask: Any = None,
+        intersect: Any = None,
+        maxsize: int = 1024,
+        overflow: OverflowPolicy = OverflowPolicy.drop_oldest,
+        rotate_interval: float = 0.25,
+        reconnect_delay: float = 1.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        """Create a hub over a connected async `WatchClient`.
+
+        Subscribers added within `rotate_interval` seconds of each other
+        share one reopen of the stream. A stream that ends is reopened from
+        the last delivered block after `reconnect_delay` seconds, doubling
+        while failures repeat, up to `max_backoff` seconds.
+        """
+        super().__init__(
+            client,
+            maxsize=maxsize,
+            overflow=overflow,
+            reconnect_delay=reconnect_delay,
+            max_backoff=max_backoff,
+        )
+        self.field_mask = field_mask
+        self.rotate_interval = rotate_interval
+        self.reopens = 0
+        self._resume = intersect
+        self._block_ref: Any = None
+        # Subscriptions each tx event of the current block was dispatched to
+        self._seen: Dict[Tuple[Any, bytes], Set[int]] = {}
+        self._unfiltered = False
+        self._streamed: Set[bytes] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stream: Optional["asyncio.Task[None]"] = None
+
+    def subscribe(
+        self,
+        predicate: Any = None,
+        maxsize: Optional[int] = None,
+        overflow: Optional[OverflowPolicy] = None,
+        matcher: Optional[Callable[[Any], bool]] = None,
+    ) -> Subscription[T]:
+        """Subscribe to tx events matching `predicate` (all if None).
+
+        Instead of a predicate, `matcher` may be any function of the chain's
+        tx, e.g. `AddressIndex.matches`; the server stream is then left
+        unfiltered. Idle events are delivered to every subscriber.
+        """
+        subscription = self._subscription(predicate, maxsize, overflow, matcher)
+        self._subscriptions[subscription.id] = subscription
+        self.start()
+        # No reopen is needed if the stream already carries everything the
+        # new subscriber may want
+        covered = (
+            self._stream is not None
+            and not self._stream.done()
+            and (
+                self._unfiltered
+                or (
+                    predicate is not None
+                    and predicate.SerializeToString(deterministic=True)
+                    in self._streamed
+                )
+            )
+        )
+        if not covered:
+            assert self._wakeup is not None
+            self._wakeup.set()
+        return subscription
+
+    def _predicate(self) -> Any:
+        predicates: Dict[bytes, Any] = {}
+        for subscription in self._subscriptions.values():
+            if subscription.predicate is None:
+                return None
+            key = subscription.predicate.SerializeToString(deterministic=True)
+            predicates[key] = subscription.predicate
+        self._streamed = set(predicates)
+        if len(predicates) == 1:
+            return next(iter(predicates.values()))
+        union = list(predicates.values())
+        return type(union[0])(any_of=union)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "reopens": self.reopens}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            super().start()
+
+    async def close(self) -> None:
+        await self._stop_stream()
+        await super().close()
+
+    async def unsubscribe(self, subscription: Subscription[T]) -> None:
+        await super().unsubscribe(subscription)
+        for seen in self._seen.values():
+            seen.discard(subscription.id)
+
+    async def _stop_stream(self) -> None:
+        if self._stream is None:
+            return
+        # Dispatch records each delivery as it happens, so the reader may be
+        # cancelled mid-event, even while blocked on a full subscriber
+        self._stream.cancel()
+        try:
+            await self._stream
+        except asyncio.CancelledError:
+            pass
+        self._stream = None
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await asyncio.sleep(self.rotate_interval)
+            await self._reopen()
+
+    async def _reopen(self) -> None:
+        await self._stop_stream()
+        if not self._subscriptions:
+            return
+        self._streamed = set()
+        predicate = self._predicate()
+        self._unfiltered = predicate is None
+        self.reopens += 1
+        self._stream = asyncio.ensure_future(self._run_stream(predicate))
+
+    async def _dispatch(self, response: Any) -> None:
+        chain = self.client.chain
+        if response.tx is None:
+            # Idle: the block at `block_ref` is complete
+            self._resume = response.block_ref
+            self._block_ref = None
+            self._seen.clear()
+            for subscription in list(self._subscriptions.values()):
+                await subscription._put(response)
+            return
+
+        block = None
+        if response.tx.HasField("block"):
+            block = chain.any_chain_to_block(response.tx.block)
+        chain_tx = chain.any_chain_to_tx(response.tx)
+        key = None
+        seen: Set[int] = set()
+        if block is not None:
+            point = chain.block_to_point(block)
+            block_ref = chain.point_to_block_ref(point)
+            if block_ref != self._block_ref:
+                if self._block_ref is not None:
+                    self._resume = chain.block_ref_to_point(self._block_ref)
+                self._block_ref = block_ref
+                self._seen.clear()
+            if chain_tx is not None:
+                key = (response.action, chain_tx.SerializeToString(deterministic=True))
+                seen = self._seen.setdefault(key, set())
+
+        for subscription_id, subscription in list(self._subscriptions.items()):
+            if subscription_id not in seen and subscription.matches(chain_tx):
+                await subscription._put(response)
+            seen.add(subscription_id)
+
+    async def _run_stream(self, predicate: Any) -> None:
+        while True:
+            error: Optional[Exception] = None
+            try:
+                async for response in self.client.async_watch_tx(
+                    predicate, self.field_mask, self._resume
+                ):
+                    self.received += 1
+                    self.failures = 0
+                    await self._dispatch(response)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+            if not await self._backoff(error):
+                return
+
+
+__all__ = [
+    "Subscription",
+    "MempoolHub",
+    "WatchHub",
+]
@@ -0,0 +1,204 @@
+"""Find where a local chain history meets the server's chain.
+
+After downtime, the last points a follower saw may have been rolled back.
+Passing only the last point then fails, and falling back to an old one
+replays everything since. `intersect_points` picks a few points of the
+history instead, exponentially spaced back from its tip (the tip, then 1,
+2, 4, 8, ... points back, and the oldest one), and `find_intersect` looks
+for the most recent point of the history still on the chain:
+
+1. All the candidates go in one `FollowTipRequest.intersect`. The server
+   resets the stream to the most recent one it knows, which bounds the
+   intersection between that candidate and the next more recent one.
+2. The gap between those two is bisected with `FetchBlock`, one block per
+   probe, down to the exact point. Servers that don't start streams with a
+   reset are probed the same way from the tip.
+
+A rollback `d` points deep is found with about `2 * log2(d)` round trips,
+and nothing before the intersection is replayed.
+
+```python
+intersection = await client.async_find_intersect(points)
+async for response in client.async_follow_tip(intersect=[intersection.point]):
+    ...
+```
+
+The history is any sequence of points in chain order, oldest first, such
+as a list of checkpoints or a `utxorpc.points.PointArray` of every block.
+"""
+
+from typing import Any, Generic, List, Optional, Protocol, Tuple
+
+import grpc
+from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import (  # type: ignore
+    BlockRef,
+    FollowTipRequest,
+)
+
+from utxorpc.generics import PointType
+from utxorpc.generics.wire import LEN, iter_fields
+
+# Candidates sent to FollowTip; 64 reach back 2**62 points
+MAX_POINTS = 64
+
+
+class History(Protocol[PointType]):  # type: ignore[misc]
+    """Points in chain order, oldest first"""
+
+    def __len__(self) -> int: ...
+
+    def __getitem__(self, index: int) -> PointType: ...
+
+
+class Intersection(Generic[PointType]):
+    point: Optional[PointType]
+    index: Optional[int]
+    rolled_back: int
+    round_trips: int
+
+    def __init__(
+        self,
+        point: Optional[PointType],
+        index: Optional[int],
+        rolled_back: int,
+        round_trips: int,
+    ) -> None:
+        """
+        `point` is the most recent point of the history on the chain, found
+        at `index`, or `None` if none is. `rolled_back` points of the history
+        come after it, and finding it took `round_trips` calls.
+        """
+        self.point = point
+        self.index = index
+        self.rolled_back = rolled_back
+        self.round_trips = round_trips
+
+    def __repr__(self) -> str:
+        return (
+            f"Intersection(point={self.point!r}, index={self.index}, "
+            f"rolled_back={self.rolled_back}, round_trips={self.round_trips})"
+        )
+
+
+def exponential_offsets(length: int, max_points: int = MAX_POINTS) -> List[int]:
+    """Indices into a history of `length` points, newest first: the tip,
+    then 1, 2, 4, ... points back, and the oldest point"""
+    indices: List[int] = []
+    offset = 0
+    while offset < length and len(indices) < max_points - 1:
+        indices.append(length - 1 - offset)
+        offset = offset * 2 if offset else 1
+    if length and indices[-1] != 0:
+        indices.append(0)
+    return indices
+
+
+def intersect_points(
+    history: History[PointType], max_points: int = MAX_POINTS
+) -> List[PointType]:
+    """Exponentially spaced points of `history` for `FollowTipRequest.intersect`"""
+    return [history[index] for index in exponential_offsets(len(history), max_points)]
+
+
+async def _announced_intersect(
+    client: Any, candidates: List[PointType]
+) -> Tuple[bool, Optional[bytes]]:
+    """`(answered, hash)` of the candidate FollowTip resets the stream to.
+
+    `(True, None)` means none of the candidates is on the chain, and
+    `(False, None)` that the server didn't say.
+    """
+    call = client.get_async_raw_stub().FollowTip(
+        FollowTipRequest(
+            intersect=[client.chain.point_to_block_ref(point) for point in candidates]
+        ),
+        metadata=[(k, v) for k, v in client.metadata.items()],
+    )
+    try:
+        async for data in call:
+            for number, wire_type, value in iter_fields(data):
+                if number == 3 and wire_type == LEN:
+                    return True, BlockRef.FromString(value).hash
+            # Anything else first means the server doesn't announce resets
+            return False, None
+    except grpc.RpcError as error:
+        if error.code() == grpc.StatusCode.NOT_FOUND:
+            return True, None
+        raise
+    finally:
+        call.cancel()
+    return False, None
+
+
+async def _on_chain(client: Any, point: PointType) -> bool:
+    try:
+        return await client.async_fetch_block_raw([point]) is not None
+    except grpc.RpcError as error:
+        if error.code() == grpc.StatusCode.NOT_FOUND:
+            return False
+        raise
+
+
+async def find_intersect(
+    client: Any,
+    history: History[PointType],
+    max_points: int = MAX_POINTS,
+    follow_tip: bool = True,
+) -> Intersection[PointType]:
+    """Find the most recent point of `history` on the chain of an async
+    `SyncClient`'s server.
+
+    With `follow_tip=False` the candidates are probed with `FetchBlock`
+    only, for servers known not to announce the intersection.
+    """
+    length = len(history)
+    offsets = exponential_offsets(length, max_points)
+    round_trips = 0
+    # Bisection bounds: `found` is on the chain, `missing` is not
+    found, missing = -1, length
+
+    answered = False
+    if follow_tip and offsets:
+        candidates = [history[index] for index in offsets]
+        round_trips += 1
+        answered, announced = await _announced_intersect(client, candidates)
+        if announced is not None:
+            hashes = [client.chain.point_to_block_ref(p).hash for p in candidates]
+            if announced in hashes:
+                position = hashes.index(announced)
+                found = offsets[position]
+                missing = offsets[position - 1] if position else length
+            else:
+                # Not one of ours after all; find it the slow way
+                answered = False
+
+    if not answered:
+        for index in offsets:
+            round_trips += 1
+            if await _on_chain(client, history[index]):
+                found = index
+                break
+            missing = index
+
+    if found >= 0:
+        while missing - found > 1:
+            middle = (found + missing) // 2
+            round_trips += 1
+            if await _on_chain(client, history[middle]):
+                found = middle
+            else:
+                missing = middle
+
+    if found < 0:
+        return Intersection(None, None, length, round_trips)
+    return Intersection(history[found], found, length - 1 - found, round_trips)
+
+
+__all__ = [
+    "MAX_POINTS",
+    "History",
+    "Intersection",
+    "exponential_offsets",
+    "find_intersect",
+    "intersect_points",
+]
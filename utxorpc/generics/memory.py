@@ -0,0 +1,200 @@
+"""Memory accounting for long-running streams, buffers and caches.
+
+The SDK's stateful components register themselves here when they are
+created: buffered streams, hubs, tx trackers, submit clients and the
+`InMemoryMetrics` of `Metrics` interceptors (bytes received per method).
+`memory_stats()` reports what each live one currently holds, along with
+its high-water marks, the sizes of module-level caches and the process RSS.
+Components are held weakly, so registering never keeps them alive.
+
+```python
+print(memory_stats()["buffers"])
+```
+
+For allocations, `start_tracing()` enables `tracemalloc` and
+`allocation_stats()` groups the traced memory, and its growth since tracing
+started, by subsystem (`utxorpc`, `grpc`, `protobuf`, ...). Tracing slows
+the whole process down, so it is meant for diagnosing, not for always-on
+use. Messages parsed by protobuf's C implementation live outside the Python
+allocator and are not traced; the `buffers` and `streams` byte counts cover
+those.
+"""
+
+import os
+import sys
+import threading
+import tracemalloc
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_lock = threading.Lock()
+# kind -> live components with a `memory_stats()` method
+_components: Dict[str, "weakref.WeakSet[Any]"] = {}
+_caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+# Top-level packages reported as their own subsystem by `allocation_stats`
+SUBSYSTEMS = {
+    "utxorpc": "utxorpc",
+    "utxorpc_spec": "protobuf",
+    "google": "protobuf",
+    "grpc": "grpc",
+    "asyncio": "asyncio",
+}
+
+
+def track_memory(kind: str, component: Any) -> None:
+    """Report `component.memory_stats()` under `kind` while it is alive"""
+    with _lock:
+        components = _components.get(kind)
+        if components is None:
+            components = _components[kind] = weakref.WeakSet()
+        components.add(component)
+
+
+def register_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """Report `stats()` of a module-level cache under `caches`"""
+    with _lock:
+        _caches[name] = stats
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """Current and peak resident set size in bytes, where the OS reports them"""
+    rss = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    max_rss = None
+    try:
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        max_rss = max_rss if sys.platform == "darwin" else max_rss * 1024
+    except ImportError:  # pragma: no cover
+        pass
+    return {"rss_bytes": rss, "max_rss_bytes": max_rss}
+
+
+def memory_stats() -> Dict[str, Any]:
+    """Memory held by every live registered component, grouped by kind"""
+    with _lock:
+        components = {kind: list(live) for kind, live in _components.items()}
+        caches = dict(_caches)
+    stats: Dict[str, Any] = {
+        "process": process_memory(),
+        "caches": {name: cache() for name, cache in caches.items()},
+    }
+    for kind, live in components.items():
+        stats[kind] = [component.memory_stats() for component in live]
+    if tracemalloc.is_tracing():
+        stats["allocations"] = allocation_stats()
+    return stats
+
+
+def start_tracing(frames: int = 1) -> None:
+    """Start `tracemalloc` (if needed) and take the baseline for growth"""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    _baseline = tracemalloc.take_snapshot()
+
+
+def stop_tracing() -> None:
+    global _baseline
+    tracemalloc.stop()
+    _baseline = None
+
+
+_subsystem_of: Dict[str, str] = {}
+
+
+def _subsystem(filename: str) -> str:
+    name = _subsystem_of.get(filename)
+    if name is None:
+        # The longest sys.path entry containing the file tells its package
+        roots = [
+            p for p in sys.path if p and filename.startswith(p.rstrip(os.sep) + os.sep)
+        ]
+        name = "other"
+        if roots:
+            relative = filename[len(max(roots, key=len).rstrip(os.sep)) + 1 :]
+            name = SUBSYSTEMS.get(relative.split(os.sep, 1)[0], "other")
+        _subsystem_of[filename] = name
+    return name
+
+
+def allocation_stats(top: int = 10) -> Dict[str, Any]:
+    """Traced memory by subsystem, and the lines that grew most since tracing
+    started (or since the last `start_tracing`)"""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("Call start_tracing() first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    )
+    subsystems: Dict[str, Dict[str, int]] = {}
+    for stat in snapshot.statistics("filename"):
+        name = _subsystem(stat.traceback[0].filename)
+        totals = subsystems.setdefault(
+            name, {"bytes": 0, "blocks": 0, "growth_bytes": 0}
+        )
+        totals["bytes"] += stat.size
+        totals["blocks"] += stat.count
+
+    growth: List[Tuple[str, int, int]] = []
+    if _baseline is not None:
+        for diff in snapshot.compare_to(_baseline, "filename"):
+            name = _subsystem(diff.traceback[0].filename)
+            subsystems.setdefault(name, {"bytes": 0, "blocks": 0, "growth_bytes": 0})
+            subsystems[name]["growth_bytes"] += diff.size_diff
+        for diff in snapshot.compare_to(_baseline, "lineno")[:top]:
+            frame = diff.traceback[0]
+            growth.append(
+                (f"{frame.filename}:{frame.lineno}", diff.size_diff, diff.size)
+            )
+
+    return {
+        "traced_bytes": tracemalloc.get_traced_memory()[0],
+        "peak_traced_bytes": tracemalloc.get_traced_memory()[1],
+        "subsystems": subsystems,
+        "top_growth": [
+            {"location": location, "growth_bytes": size_diff, "bytes": size}
+            for location, size_diff, size in growth
+        ],
+    }
+
+
+def message_size(message: Any) -> int:
+    """Serialized size of a message, raw bytes or client wrapper.
+
+    Wrappers are measured by the message they carry (`block` or `tx`);
+    anything else counts as 0.
+    """
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return len(message)
+    byte_size = getattr(message, "ByteSize", None)
+    if byte_size is not None:
+        return byte_size()
+    if isinstance(message, tuple):
+        # Raw responses: (action, point, bytes)
+        return sum(len(item) for item in message if isinstance(item, bytes))
+    for name in ("block", "tx"):
+        inner = getattr(message, name, None)
+        if inner is not None and hasattr(inner, "ByteSize"):
+            return inner.ByteSize()
+    return 0
+
+
+__all__ = [
+    "SUBSYSTEMS",
+    "allocation_stats",
+    "memory_stats",
+    "message_size",
+    "process_memory",
+    "register_cache",
+    "start_tracing",
+    "stop_tracing",
+    "track_memory",
+]
@@ -0,0 +1,491 @@
+"""Client telemetry through gRPC interceptors and a pluggable backend.
+
+`Metrics` provides interceptors that time every call a client makes and
+count its status codes, request and response bytes and streamed messages.
+What happens to the numbers is up to its `MetricsBackend`:
+`InMemoryMetrics` (the default) keeps histograms and rates that can be read
+with `stats()`, while `PrometheusMetrics` and `OpenTelemetryMetrics` export
+them through those libraries.
+
+```python
+metrics = Metrics()
+client = CardanoSyncClient(uri, interceptors=metrics.interceptors)
+async with client.async_connect():
+    async for response in client.async_follow_tip(intersect=[]):
+        ...
+print(metrics.backend.stats()["SyncService/FollowTip"])
+```
+
+Methods are named `Service/Method`, e.g. `SyncService/FollowTip`.
+"""
+
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Sequence
+
+import grpc
+
+from utxorpc.generics.memory import track_memory
+from utxorpc.generics.stats import DEFAULT_BUCKETS, Histogram, RateMeter
+
+
+def _method_label(method: Any) -> str:
+    if isinstance(method, bytes):
+        method = method.decode()
+    service, _, name = method.strip("/").rpartition("/")
+    return f"{service.rsplit('.', 1)[-1]}/{name}"
+
+
+def _size(message: Any) -> int:
+    # Raw stubs hand over bytes
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return len(message)
+    return message.ByteSize()
+
+
+class MetricsBackend:
+    """Receives the measurements of `Metrics`; every hook defaults to a no-op.
+
+    Hooks are called from gRPC threads as well as the caller's, so
+    implementations must be thread safe.
+    """
+
+    def call_started(self, method: str, request_bytes: int) -> None:
+        pass
+
+    def message_received(self, method: str, size: int) -> None:
+        """One response message; unary calls get exactly one if they succeed"""
+
+    def call_ended(self, method: str, code: grpc.StatusCode, seconds: float) -> None:
+        pass
+
+
+class MethodMetrics:
+    """What `InMemoryMetrics` keeps for one method"""
+
+    calls: int
+    in_flight: int
+    max_in_flight: int
+    codes: Dict[str, int]
+    latency: Histogram
+    request_bytes: int
+    response_bytes: int
+    max_message_bytes: int
+    messages: RateMeter
+    bytes: RateMeter
+
+    def __init__(self, buckets: Sequence[float], half_life: float) -> None:
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.codes = {}
+        self.latency = Histogram(buckets)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.max_message_bytes = 0
+        self.messages = RateMeter(half_life)
+        self.bytes = RateMeter(half_life)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "codes": dict(self.codes),
+            "latency": self.latency.summary(),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "max_message_bytes": self.max_message_bytes,
+            "messages": self.messages.count,
+            "messages_per_second": self.messages.rate,
+            "bytes_per_second": self.bytes.rate,
+        }
+
+
+class InMemoryMetrics(MetricsBackend):
+    """Keeps per-method histograms, counters and rates in the process.
+
+    `buckets` are the latency histogram bounds in seconds; `half_life` sets
+    how fast the messages and bytes per second rates forget old activity.
+    """
+
+    methods: Dict[str, MethodMetrics]
+
+    def __init__(
+        self, buckets: Sequence[float] = DEFAULT_BUCKETS, half_life: float = 5.0
+    ) -> None:
+        self.buckets = buckets
+        self.half_life = half_life
+        self.methods = {}
+        self._lock = threading.Lock()
+        track_memory("streams", self)
+
+    def _method(self, method: str) -> MethodMetrics:
+        metrics = self.methods.get(method)
+        if metrics is None:
+            metrics = self.methods[method] = MethodMetrics(self.buckets, self.half_life)
+        return metrics
+
+    def call_started(self, method: str, request_bytes: int) -> None:
+        with self._lock:
+            metrics = self._method(method)
+            metrics.calls += 1
+            metrics.in_flight += 1
+            metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+            metrics.request_bytes += request_bytes
+
+    def message_received(self, method: str, size: int) -> None:
+        with self._lock:
+            metrics = self._method(method)
+            metrics.response_bytes += size
+            metrics.max_message_bytes = max(metrics.max_message_bytes, size)
+            metrics.messages.mark()
+            metrics.bytes.mark(size)
+
+    def call_ended(self, method: str, code: grpc.StatusCode, seconds: float) -> None:
+        with self._lock:
+            metrics = self._method(method)
+            metrics.in_flight -= 1
+            metrics.codes[code.name] = metrics.codes.get(code.name, 0) + 1
+            metrics.latency.observe(seconds)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: m.stats() for name, m in self.methods.items()}
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Bytes received and high-water marks per method"""
+        with self._lock:
+            return {
+                name: {
+                    "in_flight": m.in_flight,
+                    "max_in_flight": m.max_in_flight,
+                    "messages": m.messages.count,
+                    "response_bytes": m.response_bytes,
+                    "max_message_bytes": m.max_message_bytes,
+                }
+                for name, m in self.methods.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.methods = {}
+
+
+class PrometheusMetrics(MetricsBackend):
+    """Exports through `prometheus_client`, labelled by `service` and `method`.
+
+    Messages and bytes per second are left to PromQL's `rate()` over the
+    `*_total` counters.
+    """
+
+    def __init__(
+        self,
+        registry: Any = None,
+        prefix: str = "utxorpc_client",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        try:
+            import prometheus_client  # type: ignore
+        except ImportError as e:  # pragma: no cover
+            raise ImportError(
+                "PrometheusMetrics requires prometheus-client. Install it with "
+                "`pip install utxorpc[prometheus]`"
+            ) from e
+
+        registry = registry or prometheus_client.REGISTRY
+        labels = ["service", "method"]
+        self._latency = prometheus_client.Histogram(
+            f"{prefix}_call_duration_seconds",
+            "Duration of calls, until the last message of streams",
+            labels,
+            buckets=list(buckets),
+            registry=registry,
+        )
+        self._in_flight = prometheus_client.Gauge(
+            f"{prefix}_calls_in_flight",
+            "Calls started and not yet ended",
+            labels,
+            registry=registry,
+        )
+        self._calls = prometheus_client.Counter(
+            f"{prefix}_calls",
+            "Ended calls by status code",
+            labels + ["code"],
+            registry=registry,
+        )
+        self._request_bytes = prometheus_client.Counter(
+            f"{prefix}_request_bytes",
+            "Serialized request bytes",
+            labels,
+            registry=registry,
+        )
+        self._messages = prometheus_client.Counter(
+            f"{prefix}_response_messages",
+            "Response messages received",
+            labels,
+            registry=registry,
+        )
+        self._response_bytes = prometheus_client.Counter(
+            f"{prefix}_response_bytes",
+            "Serialized response bytes received",
+            labels,
+            registry=registry,
+        )
+
+    def call_started(self, method: str, request_bytes: int) -> None:
+        labels = method.split("/", 1)
+        self._in_flight.labels(*labels).inc()
+        self._request_bytes.labels(*labels).inc(request_bytes)
+
+    def message_received(self, method: str, size: int) -> None:
+        labels = method.split("/", 1)
+        self._messages.labels(*labels).inc()
+        self._response_bytes.labels(*labels).inc(size)
+
+    def call_ended(self, method: str, code: grpc.StatusCode, seconds: float) -> None:
+        labels = method.split("/", 1)
+        self._in_flight.labels(*labels).dec()
+        self._calls.labels(*labels, code.name).inc()
+        self._latency.labels(*labels).observe(seconds)
+
+
+class OpenTelemetryMetrics(MetricsBackend):
+    """Exports through an OpenTelemetry `Meter`, with `rpc.*` attributes.
+
+    Without a `meter`, one named `utxorpc` is taken from the global meter
+    provider, so the application's SDK setup decides where metrics go.
+    """
+
+    def __init__(self, meter: Any = None) -> None:
+        try:
+            from opentelemetry import metrics  # type: ignore
+        except ImportError as e:  # pragma: no cover
+            raise ImportError(
+                "OpenTelemetryMetrics requires opentelemetry-api. Install it "
+                "with `pip install utxorpc[opentelemetry]`"
+            ) from e
+
+        meter = meter or metrics.get_meter("utxorpc")
+        self._latency = meter.create_histogram(
+            "rpc.client.duration",
+            unit="s",
+            description="Duration of calls, until the last message of streams",
+        )
+        self._in_flight = meter.create_up_down_counter(
+            "rpc.client.active_calls", description="Calls started and not yet ended"
+        )
+        self._request_bytes = meter.create_counter(
+            "rpc.client.request.bytes", unit="By"
+        )
+        self._messages = meter.create_counter(
+            "rpc.client.responses", description="Response messages received"
+        )
+        self._response_bytes = meter.create_counter(
+            "rpc.client.response.bytes", unit="By"
+        )
+        self._attributes: Dict[str, Dict[str, str]] = {}
+
+    def _attributes_of(self, method: str) -> Dict[str, str]:
+        attributes = self._attributes.get(method)
+        if attributes is None:
+            service, name = method.split("/", 1)
+            attributes = self._attributes[method] = {
+                "rpc.system": "grpc",
+                "rpc.service": service,
+                "rpc.method": name,
+            }
+        return attributes
+
+    def call_started(self, method: str, request_bytes: int) -> None:
+        attributes = self._attributes_of(method)
+        self._in_flight.add(1, attributes)
+        self._request_bytes.add(request_bytes, attributes)
+
+    def message_received(self, method: str, size: int) -> None:
+        attributes = self._attributes_of(method)
+        self._messages.add(1, attributes)
+        self._response_bytes.add(size, attributes)
+
+    def call_ended(self, method: str, code: grpc.StatusCode, seconds: float) -> None:
+        attributes = self._attributes_of(method)
+        self._in_flight.add(-1, attributes)
+        self._latency.record(
+            seconds, {**attributes, "rpc.grpc.status_code": code.value[0]}
+        )
+
+
+class _Call:
+    """One measured call; `end` reports it once, whichever path gets there first"""
+
+    def __init__(self, metrics: "Metrics", method: Any, request: Any) -> None:
+        self.backend = metrics.backend
+        self.sizes = metrics.sizes
+        self.method = _method_label(method)
+        self.started = time.perf_counter()
+        self._ended = False
+        self._lock = threading.Lock()
+        self.backend.call_started(self.method, _size(request) if self.sizes else 0)
+
+    def message(self, message: Any) -> None:
+        self.backend.message_received(self.method, _size(message) if self.sizes else 0)
+
+    def end(self, code: Optional[grpc.StatusCode]) -> None:
+        with self._lock:
+            if self._ended:
+                return
+            self._ended = True
+        seconds = time.perf_counter() - self.started
+        self.backend.call_ended(self.method, code or grpc.StatusCode.UNKNOWN, seconds)
+
+    def end_with_error(self, error: BaseException) -> None:
+        if isinstance(error, grpc.Call):
+            self.end(error.code())
+        elif isinstance(error, grpc.FutureCancelledError):
+            self.end(grpc.StatusCode.CANCELLED)
+        else:
+            self.end(grpc.StatusCode.UNKNOWN)
+
+
+class Metrics:
+    """Interceptors reporting every call of a client to `backend`.
+
+    Pass `interceptors` to a client; they work on both blocking and asyncio
+    channels. With `sizes=False`, request and response bytes are not
+    measured, which saves computing the size of every message.
+    """
+
+    backend: MetricsBackend
+    sizes: bool
+
+    def __init__(
+        self, backend: Optional[MetricsBackend] = None, sizes: bool = True
+    ) -> None:
+        self.backend = backend if backend is not None else InMemoryMetrics()
+        self.sizes = sizes
+        # grpc.aio files each interceptor under a single call kind, so the
+        # asyncio side needs one per kind
+        self.interceptors = [
+            _MetricsInterceptor(self),
+            _AsyncUnaryUnaryMetrics(self),
+            _AsyncUnaryStreamMetrics(self),
+        ]
+
+
+class _MeasuredStream:
+    """Response iterator of a blocking streaming call that counts messages"""
+
+    def __init__(self, call: Any, measured: _Call) -> None:
+        self._call = call
+        self._measured = measured
+
+    def __iter__(self) -> "_MeasuredStream":
+        return self
+
+    def __next__(self) -> Any:
+        message = next(self._call)
+        self._measured.message(message)
+        return message
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._call, name)
+
+
+def _on_termination(call: Any, callback: Callable[[], None]) -> None:
+    # `add_callback` refuses (returns False) once the call has terminated
+    if not call.add_callback(callback):
+        callback()
+
+
+class _MetricsInterceptor(
+    grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor
+):
+    def __init__(self, metrics: Metrics) -> None:
+        self._metrics = metrics
+
+    @staticmethod
+    def _finish(measured: _Call, future: Any) -> None:
+        if future.cancelled():
+            measured.end(grpc.StatusCode.CANCELLED)
+            return
+        error = future.exception()
+        if error is not None:
+            measured.end_with_error(error)
+            return
+        measured.message(future.result())
+        measured.end(grpc.StatusCode.OK)
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        measured = _Call(self._metrics, client_call_details.method, request)
+        outcome = continuation(client_call_details, request)
+        outcome.add_done_callback(lambda future: self._finish(measured, future))
+        return outcome
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        measured = _Call(self._metrics, client_call_details.method, request)
+        call = continuation(client_call_details, request)
+        # Also fires for streams that are cancelled or abandoned
+        _on_termination(call, lambda: measured.end(call.code()))
+        return _MeasuredStream(call, measured)
+
+
+class _AsyncMetricsInterceptor:
+    def __init__(self, metrics: Metrics) -> None:
+        self._metrics = metrics
+
+
+class _AsyncUnaryUnaryMetrics(
+    _AsyncMetricsInterceptor, grpc.aio.UnaryUnaryClientInterceptor
+):
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        measured = _Call(self._metrics, client_call_details.method, request)
+        try:
+            call = await continuation(client_call_details, request)
+            response = await call
+        except grpc.RpcError as error:
+            measured.end_with_error(error)
+            raise
+        except BaseException:
+            measured.end(grpc.StatusCode.CANCELLED)
+            raise
+        measured.message(response)
+        measured.end(grpc.StatusCode.OK)
+        # Awaiting the finished call again returns the response
+        return call
+
+
+class _AsyncUnaryStreamMetrics(
+    _AsyncMetricsInterceptor, grpc.aio.UnaryStreamClientInterceptor
+):
+    async def _measure(self, call: Any, measured: _Call) -> AsyncIterator[Any]:
+        try:
+            async for message in call:
+                measured.message(message)
+                yield message
+        except grpc.RpcError as error:
+            measured.end_with_error(error)
+            raise
+        except BaseException:
+            # Closed early by the consumer (or the loop, if abandoned)
+            measured.end(grpc.StatusCode.CANCELLED)
+            raise
+        measured.end(grpc.StatusCode.OK)
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        measured = _Call(self._metrics, client_call_details.method, request)
+        try:
+            call = await continuation(client_call_details, request)
+        except BaseException as error:
+            measured.end_with_error(error)
+            raise
+        return self._measure(call, measured)
+
+
+__all__ = [
+    "InMemoryMetrics",
+    "MethodMetrics",
+    "Metrics",
+    "MetricsBackend",
+    "OpenTelemetryMetrics",
+    "PrometheusMetrics",
+]
@@ -0,0 +1,160 @@
+"""Process-pool decoding of raw serialized messages.
+
+The raw client methods hand back undecoded bytes; `ProcessPipeline` ships
+them to worker processes in batches so that protobuf parsing, chain
+conversion and a user supplied transform run on every core while the event
+loop keeps reading from the network. Results come back in input order.
+
+Functions passed to `map` are pickled, so they must be defined at module
+level (or be `functools.partial`s of such functions). Decoded protobuf
+objects are pickled back to the parent too, so transforms that reduce a
+block to the few values the caller needs give the best throughput.
+"""
+
+import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    Callable,
+    Deque,
+    List,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def decode_batch(fn: Callable[[bytes], Optional[R]], batch: List[bytes]) -> List[R]:
+    """Apply `fn` to a batch in a worker, dropping `None` results"""
+    results = []
+    for data in batch:
+        result = fn(data)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def decode_and_transform(
+    decoder: Callable[[bytes], Optional[T]],
+    transform: Optional[Callable[[T], R]],
+    data: bytes,
+) -> Any:
+    """Decode one message and apply `transform` to it, if given"""
+    decoded = decoder(data)
+    if decoded is None or transform is None:
+        return decoded
+    return transform(decoded)
+
+
+class ProcessPipeline:
+    executor: Executor
+    batch_size: int
+    max_pending: int
+    flush_interval: float
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        batch_size: int = 64,
+        max_pending: Optional[int] = None,
+        flush_interval: float = 0.05,
+    ) -> None:
+        """Create a pipeline.
+
+        If no `executor` is given a `ProcessPoolExecutor` with `max_workers`
+        processes is created and owned by the pipeline. It uses the `spawn`
+        start method, since forking a process with live gRPC channels is not
+        supported by gRPC.
+
+        At most `max_pending` batches are in flight (two per worker by
+        default); once reached, reads from the source pause until the oldest
+        batch is done. Partial batches are flushed when the source is idle
+        for `flush_interval` seconds.
+        """
+        self._owns_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        workers = getattr(self.executor, "_max_workers", None) or 1
+        self.batch_size = batch_size
+        self.max_pending = max_pending or 2 * workers
+        self.flush_interval = flush_interval
+
+    def __enter__(self) -> "ProcessPipeline":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown()
+
+    async def map(
+        self, fn: Callable[[bytes], Optional[R]], source: AsyncIterable[bytes]
+    ) -> AsyncGenerator[R, Any]:
+        """Apply `fn` to every message of `source` in worker processes"""
+        loop = asyncio.get_running_loop()
+        pending: Deque["asyncio.Future[List[R]]"] = deque()
+        batch: List[bytes] = []
+
+        def submit() -> None:
+            nonlocal batch
+            pending.append(loop.run_in_executor(self.executor, decode_batch, fn, batch))
+            batch = []
+
+        iterator = source.__aiter__()
+        next_item: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if next_item is None:
+                    next_item = asyncio.ensure_future(iterator.__anext__())
+
+                # Wait for the next message or the oldest batch, flushing a
+                # partial batch if the source goes quiet so followers near
+                # the tip aren't delayed.
+                waiting = [next_item, pending[0]] if pending else [next_item]
+                timeout = self.flush_interval if batch else None
+                done, _ = await asyncio.wait(
+                    waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    submit()
+                elif next_item in done:
+                    received, next_item = next_item, None
+                    try:
+                        batch.append(received.result())
+                    except StopAsyncIteration:
+                        break
+                    if len(batch) >= self.batch_size:
+                        submit()
+
+                while pending and (
+                    pending[0].done() or len(pending) >= self.max_pending
+                ):
+                    for result in await pending.popleft():
+                        yield result
+            if batch:
+                submit()
+            while pending:
+                for result in await pending.popleft():
+                    yield result
+        finally:
+            if next_item is not None:
+                next_item.cancel()
+            for future in pending:
+                future.cancel()
+
+
+__all__ = [
+    "ProcessPipeline",
+    "decode_batch",
+    "decode_and_transform",
+]
@@ -0,0 +1,144 @@
+"""Where the time of each streamed message goes.
+
+A `StageProfiler` attached to a client splits the time of every message of
+`async_follow_tip` and `async_watch_tx` into four stages:
+
+- `network`: waiting for the message to arrive
+- `parse`: decoding its protobuf bytes
+- `convert`: building the client's wrapper (`FollowTipResponse`, ...)
+- `consumer`: the consumer's own work, until it asks for the next message
+
+```python
+profiler = StageProfiler()
+client = CardanoSyncClient(uri, profiler=profiler)
+async with client.async_connect():
+    async for response in client.async_follow_tip(intersect=[]):
+        ...
+print(profiler.report())
+```
+
+Streams opened while a profiler is attached can be profiled at any time:
+`disable()` and `enable()` take effect from the next message.
+"""
+
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Optional, Sequence
+
+from utxorpc.generics.stats import Histogram, exponential_buckets
+
+STAGES = ("network", "parse", "convert", "consumer")
+
+# 1us .. ~67s, doubling; parsing a small message takes microseconds
+PROFILE_BUCKETS = exponential_buckets(0.000001, 2, 27)
+
+
+class StageProfiler:
+    """Per-method histograms of the time spent in each stage, in seconds"""
+
+    enabled: bool
+    histograms: Dict[str, Dict[str, Histogram]]
+
+    def __init__(
+        self, enabled: bool = True, buckets: Sequence[float] = PROFILE_BUCKETS
+    ) -> None:
+        self.enabled = enabled
+        self.buckets = buckets
+        self.histograms = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.histograms = {}
+
+    def record(
+        self,
+        method: str,
+        network: float,
+        parse: float,
+        convert: float,
+        consumer: float,
+    ) -> None:
+        histograms = self.histograms.get(method)
+        if histograms is None:
+            histograms = self.histograms[method] = {
+                stage: Histogram(self.buckets) for stage in STAGES
+            }
+        histograms["network"].observe(network)
+        histograms["parse"].observe(parse)
+        histograms["convert"].observe(convert)
+        histograms["consumer"].observe(consumer)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """method -> stage -> histogram summary and `share` of the total time"""
+        stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for method, histograms in self.histograms.items():
+            total = sum(h.sum for h in histograms.values())
+            stats[method] = {
+                stage: {
+                    **histogram.summary(),
+                    "share": histogram.sum / total if total else None,
+                }
+                for stage, histogram in histograms.items()
+            }
+        return stats
+
+    def report(self) -> str:
+        """The stats as a table, times in microseconds"""
+        lines = [
+            f"{'method':<20}{'stage':<10}{'count':>9}{'mean':>10}"
+            f"{'p50':>10}{'p99':>10}{'max':>10}{'share':>8}"
+        ]
+
+        def us(value: Optional[float]) -> str:
+            return f"{value * 1e6:.1f}" if value is not None else "-"
+
+        for method, stages in self.stats().items():
+            for stage, s in stages.items():
+                share = f"{s['share'] * 100:.1f}%" if s["share"] is not None else "-"
+                lines.append(
+                    f"{method:<20}{stage:<10}{s['count']:>9}{us(s['mean']):>10}"
+                    f"{us(s['p50']):>10}{us(s['p99']):>10}{us(s['max']):>10}"
+                    f"{share:>8}"
+                )
+        return "\n".join(lines)
+
+
+async def profile_stream(
+    profiler: StageProfiler,
+    method: str,
+    stream: AsyncIterable[bytes],
+    parse: Callable[[bytes], Any],
+    convert: Callable[[Any], Optional[Any]],
+) -> AsyncIterator[Optional[Any]]:
+    """Yield `convert(parse(data))` for each message of a raw `stream`.
+
+    Messages that convert to `None` are yielded but not recorded, so the
+    caller can still react to them.
+    """
+    clock = time.perf_counter
+    resumed = clock()
+    async for data in stream:
+        received = clock()
+        message = parse(data)
+        parsed = clock()
+        converted = convert(message)
+        done = clock()
+        yield converted
+        now = clock()
+        if converted is not None and profiler.enabled:
+            profiler.record(
+                method, received - resumed, parsed - received, done - parsed, now - done
+            )
+        resumed = now
+
+
+__all__ = [
+    "PROFILE_BUCKETS",
+    "STAGES",
+    "StageProfiler",
+    "profile_stream",
+]
@@ -0,0 +1,561 @@
+"""Record gRPC responses to a file and replay them into the clients offline.
+
+`Recorder` provides interceptors that write every response of the calls a
+client makes, with its arrival time, to a file. `Recording` loads the file
+and stands in for the channel of an existing client, so the same client
+code runs against the captured traffic without a network, either at the
+recorded pace or as fast as possible.
+
+```python
+with Recorder("mainnet.rec") as recorder:
+    client = CardanoSyncClient(uri, interceptors=recorder.interceptors)
+    with client.connect():
+        for response in itertools.islice(client.follow_tip(intersect=[]), 10_000):
+            ...
+
+recording = Recording.load("mainnet.rec")
+with recording.connect(client, speed=None):
+    for response in client.follow_tip(intersect=[]):
+        ...
+```
+
+The file is a header (`MAGIC`) followed by records of `RECORD_HEADER`
+(kind, call id, nanoseconds since the recording started, payload size) and
+the payload: the method path and serialized request for `CALL`, one
+serialized response for `MESSAGE` and the status code and details for
+`END`. Streams the consumer stops reading early have no `END` and replay
+as if they ended after their last message.
+"""
+
+import asyncio
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+)
+
+import grpc
+
+MAGIC = b"URPCREC1"
+RECORD_HEADER = struct.Struct("<BIQI")
+
+CALL = 1
+MESSAGE = 2
+END = 3
+
+_STATUS_CODES = {code.value[0]: code for code in grpc.StatusCode}
+
+
+def _serialize(message: Any) -> bytes:
+    # Raw stubs already hand over bytes
+    if isinstance(message, (bytes, bytearray, memoryview)):
+        return bytes(message)
+    return message.SerializeToString()
+
+
+def _method_name(method: Any) -> str:
+    if isinstance(method, bytes):
+        method = method.decode()
+    return method.rsplit("/", 1)[-1]
+
+
+class Recorder:
+    """Write the responses of intercepted calls to `path`.
+
+    Pass `interceptors` to a client; they work on both blocking and asyncio
+    channels. `methods` limits recording to those method names, e.g.
+    `{"FollowTip", "WatchTx"}`.
+    """
+
+    calls: int
+    messages: int
+    bytes_written: int
+
+    def __init__(self, path: str, methods: Optional[Iterable[str]] = None) -> None:
+        self.methods = set(methods) if methods is not None else None
+        self.calls = 0
+        self.messages = 0
+        self.bytes_written = 0
+        self._file: Optional[BinaryIO] = open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._started = time.monotonic_ns()
+        # grpc.aio files each interceptor under a single call kind, so the
+        # asyncio side needs one per kind
+        self.interceptors = [
+            _RecordingInterceptor(self),
+            _AsyncUnaryUnaryRecorder(self),
+            _AsyncUnaryStreamRecorder(self),
+        ]
+
+    def _write(self, kind: int, call_id: int, payload: bytes) -> None:
+        offset = time.monotonic_ns() - self._started
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(RECORD_HEADER.pack(kind, call_id, offset, len(payload)))
+            self._file.write(payload)
+            self.bytes_written += RECORD_HEADER.size + len(payload)
+
+    def start_call(self, method: Any, request: Any) -> Optional[int]:
+        """Record a new call, returning its id, or `None` if it is filtered out"""
+        if isinstance(method, bytes):
+            method = method.decode()
+        if self.methods is not None and _method_name(method) not in self.methods:
+            return None
+        with self._lock:
+            self.calls += 1
+            call_id = self.calls
+        encoded = method.encode()
+        payload = struct.pack("<H", len(encoded)) + encoded + _serialize(request)
+        self._write(CALL, call_id, payload)
+        return call_id
+
+    def message(self, call_id: int, message: Any) -> None:
+        self.messages += 1
+        self._write(MESSAGE, call_id, _serialize(message))
+
+    def end(self, call_id: int, code: grpc.StatusCode, details: Optional[str]) -> None:
+        payload = struct.pack("<H", code.value[0]) + (details or "").encode()
+        self._write(END, call_id, payload)
+
+    def end_with_error(self, call_id: int, error: BaseException) -> None:
+        if isinstance(error, grpc.Call):
+            self.end(call_id, error.code(), error.details())
+        else:
+            self.end(call_id, grpc.StatusCode.UNKNOWN, str(error))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class _RecordingStream:
+    """Response iterator of a blocking streaming call that records messages"""
+
+    def __init__(self, call: Any, recorder: Recorder, call_id: int) -> None:
+        self._call = call
+        self._recorder = recorder
+        self._call_id = call_id
+
+    def __iter__(self) -> "_RecordingStream":
+        return self
+
+    def __next__(self) -> Any:
+        try:
+            message = next(self._call)
+        except StopIteration:
+            self._recorder.end(self._call_id, grpc.StatusCode.OK, None)
+            raise
+        except grpc.RpcError as error:
+            self._recorder.end_with_error(self._call_id, error)
+            raise
+        self._recorder.message(self._call_id, message)
+        return message
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._call, name)
+
+
+class _RecordingInterceptor(
+    grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor
+):
+    def __init__(self, recorder: Recorder) -> None:
+        self._recorder = recorder
+
+    def _finish(self, call_id: int, future: Any) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._recorder.end_with_error(call_id, error)
+            return
+        self._recorder.message(call_id, future.result())
+        self._recorder.end(call_id, grpc.StatusCode.OK, None)
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        call_id = self._recorder.start_call(client_call_details.method, request)
+        outcome = continuation(client_call_details, request)
+        if call_id is not None:
+            outcome.add_done_callback(lambda future: self._finish(call_id, future))
+        return outcome
+
+    def intercept_unary_stream(self, continuation, client_call_details, request):
+        call_id = self._recorder.start_call(client_call_details.method, request)
+        call = continuation(client_call_details, request)
+        if call_id is None:
+            return call
+        return _RecordingStream(call, self._recorder, call_id)
+
+
+class _AsyncRecordingInterceptor:
+    def __init__(self, recorder: Recorder) -> None:
+        self._recorder = recorder
+
+
+class _AsyncUnaryUnaryRecorder(
+    _AsyncRecordingInterceptor, grpc.aio.UnaryUnaryClientInterceptor
+):
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        call_id = self._recorder.start_call(client_call_details.method, request)
+        call = await continuation(client_call_details, request)
+        if call_id is None:
+            return call
+        try:
+            response = await call
+        except grpc.RpcError as error:
+            self._recorder.end_with_error(call_id, error)
+        else:
+            self._recorder.message(call_id, response)
+            self._recorder.end(call_id, grpc.StatusCode.OK, None)
+        # Awaiting the finished call again returns the response (or raises)
+        return call
+
+
+class _AsyncUnaryStreamRecorder(
+    _AsyncRecordingInterceptor, grpc.aio.UnaryStreamClientInterceptor
+):
+    async def _record(self, call: Any, call_id: int) -> AsyncIterator[Any]:
+        try:
+            async for message in call:
+                self._recorder.message(call_id, message)
+                yield message
+        except grpc.RpcError as error:
+            self._recorder.end_with_error(call_id, error)
+            raise
+        self._recorder.end(call_id, grpc.StatusCode.OK, None)
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        call_id = self._recorder.start_call(client_call_details.method, request)
+        call = await continuation(client_call_details, request)
+        if call_id is None:
+            return call
+        return self._record(call, call_id)
+
+
+class RecordedCall:
+    """One call of a recording; message offsets are relative to its start"""
+
+    method: str
+    request: bytes
+    messages: List[Tuple[int, bytes]]
+    code: grpc.StatusCode
+    details: str
+
+    def __init__(self, method: str, request: bytes) -> None:
+        self.method = method
+        self.request = request
+        self.messages = []
+        self.code = grpc.StatusCode.OK
+        self.details = ""
+
+    def __repr__(self) -> str:
+        return (
+            f"RecordedCall({_method_name(self.method)}, "
+            f"{len(self.messages)} messages, {self.code.name})"
+        )
+
+
+class ReplayError(grpc.RpcError, grpc.Call):  # type: ignore[misc]
+    """A recorded error status, raised where the original call failed"""
+
+    def __init__(self, code: grpc.StatusCode, details: str) -> None:
+        super().__init__(f"{code.name}: {details}")
+        self._code = code
+        self._details = details
+
+    def code(self) -> grpc.StatusCode:
+        return self._code
+
+    def details(self) -> str:
+        return self._details
+
+    def initial_metadata(self) -> Any:
+        return ()
+
+    def trailing_metadata(self) -> Any:
+        return ()
+
+    def is_active(self) -> bool:
+        return False
+
+    def time_remaining(self) -> Optional[float]:  # type: ignore[override]
+        return None
+
+    def cancel(self) -> bool:
+        return False
+
+    def add_callback(self, callback: Callable[[], None]) -> bool:
+        return False
+
+
+class Recording:
+    """Calls loaded from a `Recorder` file, replayable into clients"""
+
+    calls: List[RecordedCall]
+
+    def __init__(self, calls: List[RecordedCall]) -> None:
+        self.calls = calls
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path} is not a recording")
+
+        calls: Dict[int, RecordedCall] = {}
+        started: Dict[int, int] = {}
+        offset = len(MAGIC)
+        while offset + RECORD_HEADER.size <= len(data):
+            kind, call_id, at, size = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            payload = data[offset : offset + size]
+            offset += size
+            if len(payload) < size:
+                # Truncated by a crash while recording
+                break
+            if kind == CALL:
+                (length,) = struct.unpack_from("<H", payload)
+                method = payload[2 : 2 + length].decode()
+                calls[call_id] = RecordedCall(method, payload[2 + length :])
+                started[call_id] = at
+            elif call_id not in calls:
+                raise ValueError(f"Record for unknown call {call_id} at {offset}")
+            elif kind == MESSAGE:
+                calls[call_id].messages.append((at - started[call_id], payload))
+            elif kind == END:
+                (code,) = struct.unpack_from("<H", payload)
+                calls[call_id].code = _STATUS_CODES[code]
+                calls[call_id].details = payload[2:].decode()
+            else:
+                raise ValueError(f"Unknown record kind {kind} at {offset}")
+        return cls(list(calls.values()))
+
+    def __len__(self) -> int:
+        return len(self.calls)
+
+    def __iter__(self) -> Iterator[RecordedCall]:
+        return iter(self.calls)
+
+    @contextmanager
+    def connect(self, client: Any, speed: Optional[float] = 1.0, loop: bool = False):
+        """Replace `client`'s channel with this recording.
+
+        `speed` scales the recorded pace (`2.0` is twice as fast); `None`
+        replays as fast as possible. With `loop`, calls are reused once all
+        recorded calls of a method have been replayed.
+        """
+        previous = getattr(client, "channel", None)
+        client.channel = ReplayChannel(_Replayer(self, speed, loop))
+        try:
+            yield client
+        finally:
+            client.channel = previous
+
+    @asynccontextmanager
+    async def async_connect(
+        self, client: Any, speed: Optional[float] = 1.0, loop: bool = False
+    ):
+        """Replace `client`'s asyncio channel with this recording, see `connect`"""
+        previous = getattr(client, "async_channel", None)
+        client.async_channel = AsyncReplayChannel(_Replayer(self, speed, loop))
+        try:
+            yield client
+        finally:
+            client.async_channel = previous
+
+
+class _Replayer:
+    """Hands out recorded calls by method, preferring identical requests"""
+
+    def __init__(
+        self, recording: Recording, speed: Optional[float], loop: bool
+    ) -> None:
+        self.speed = speed
+        self.loop = loop
+        self._pending: Dict[str, Deque[RecordedCall]] = {}
+        for call in recording.calls:
+            self._pending.setdefault(call.method, deque()).append(call)
+        self._lock = threading.Lock()
+
+    def take(self, method: Any, request: bytes) -> RecordedCall:
+        if isinstance(method, bytes):
+            method = method.decode()
+        with self._lock:
+            pending = self._pending.get(method)
+            if not pending:
+                raise ReplayError(
+                    grpc.StatusCode.UNIMPLEMENTED, f"No recorded call left for {method}"
+                )
+            call = next((c for c in pending if c.request == request), pending[0])
+            pending.remove(call)
+            if self.loop:
+                pending.append(call)
+            return call
+
+    def delay(self, started: float, offset_ns: int) -> float:
+        """Seconds to wait before a message recorded `offset_ns` into its call"""
+        if not self.speed:
+            return 0.0
+        return started + offset_ns / 1e9 / self.speed - time.monotonic()
+
+
+def _decode(deserializer: Optional[Callable[[bytes], Any]], payload: bytes) -> Any:
+    return deserializer(payload) if deserializer is not None else payload
+
+
+class _UnaryUnary:
+    def __init__(self, replayer: _Replayer, method: str, serializer, deserializer):
+        self._replayer = replayer
+        self._method = method
+        self._serializer = serializer or _serialize
+        self._deserializer = deserializer
+
+    def _respond(self, request: Any) -> Tuple[int, Any]:
+        """The recorded `(offset, response)` of the call matching `request`"""
+        call = self._replayer.take(self._method, self._serializer(request))
+        if call.code != grpc.StatusCode.OK:
+            raise ReplayError(call.code, call.details)
+        if not call.messages:
+            raise ReplayError(grpc.StatusCode.UNKNOWN, "Recorded call has no response")
+        offset, payload = call.messages[0]
+        return offset, _decode(self._deserializer, payload)
+
+    def __call__(self, request: Any, **kwargs: Any) -> Any:
+        started = time.monotonic()
+        offset, response = self._respond(request)
+        delay = self._replayer.delay(started, offset)
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    def future(self, request: Any, **kwargs: Any) -> "Future[Any]":
+        future: "Future[Any]" = Future()
+        try:
+            future.set_result(self(request))
+        except grpc.RpcError as error:
+            future.set_exception(error)
+        return future
+
+
+class _UnaryStream(_UnaryUnary):
+    def _stream(self, call: RecordedCall) -> Iterator[Any]:
+        started = time.monotonic()
+        for offset, payload in call.messages:
+            delay = self._replayer.delay(started, offset)
+            if delay > 0:
+                time.sleep(delay)
+            yield _decode(self._deserializer, payload)
+        if call.code != grpc.StatusCode.OK:
+            raise ReplayError(call.code, call.details)
+
+    def __call__(self, request: Any, **kwargs: Any) -> Iterator[Any]:  # type: ignore[override]
+        return self._stream(
+            self._replayer.take(self._method, self._serializer(request))
+        )
+
+
+class _AsyncUnaryUnary(_UnaryUnary):
+    async def _call(self, request: Any) -> Any:
+        started = time.monotonic()
+        offset, response = self._respond(request)
+        delay = self._replayer.delay(started, offset)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return response
+
+    def __call__(self, request: Any, **kwargs: Any) -> Any:
+        return self._call(request)
+
+
+class _AsyncUnaryStream(_UnaryUnary):
+    async def _stream(self, call: RecordedCall) -> AsyncIterator[Any]:
+        started = time.monotonic()
+        for offset, payload in call.messages:
+            delay = self._replayer.delay(started, offset)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield _decode(self._deserializer, payload)
+        if call.code != grpc.StatusCode.OK:
+            raise ReplayError(call.code, call.details)
+
+    def __call__(self, request: Any, **kwargs: Any) -> AsyncIterator[Any]:  # type: ignore[override]
+        return self._stream(
+            self._replayer.take(self._method, self._serializer(request))
+        )
+
+
+class ReplayChannel:
+    """Blocking channel answering calls from a recording"""
+
+    unary_unary_class: Type[_UnaryUnary] = _UnaryUnary
+    unary_stream_class: Type[_UnaryUnary] = _UnaryStream
+
+    def __init__(self, replayer: _Replayer) -> None:
+        self._replayer = replayer
+
+    def unary_unary(
+        self, method: str, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return self.unary_unary_class(
+            self._replayer, method, request_serializer, response_deserializer
+        )
+
+    def unary_stream(
+        self, method: str, request_serializer=None, response_deserializer=None, **kwargs
+    ):
+        return self.unary_stream_class(
+            self._replayer, method, request_serializer, response_deserializer
+        )
+
+    def stream_unary(self, method: str, *args: Any, **kwargs: Any):
+        raise NotImplementedError("Client streaming calls are not recorded")
+
+    def stream_stream(self, method: str, *args: Any, **kwargs: Any):
+        raise NotImplementedError("Client streaming calls are not recorded")
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncReplayChannel(ReplayChannel):
+    """Asyncio channel answering calls from a recording"""
+
+    unary_unary_class = _AsyncUnaryUnary
+    unary_stream_class = _AsyncUnaryStream
+
+
+__all__ = [
+    "MAGIC",
+    "RECORD_HEADER",
+    "AsyncReplayChannel",
+    "RecordedCall",
+    "Recorder",
+    "Recording",
+    "ReplayChannel",
+    "ReplayError",
+]
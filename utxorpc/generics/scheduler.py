@@ -0,0 +1,281 @@
+"""Submit chains of dependent transactions in order, at a bounded rate.
+
+Transactions form a DAG: an edge A -> B exists when B spends an output of A
+(inferred from the tx inputs) or when declared with `depends_on`. A tx is
+only submitted once every parent has reached `stage` (the mempool by
+default), so the node never sees a child before its parent. Independent
+chains progress in parallel, and every submission, retries included, takes
+a token from a token bucket. Submissions failing with a `TRANSIENT` status
+are retried; any other error, such as a tx rejected as invalid, fails the
+tx and its dependents at once.
+
+```python
+async with client.async_connect():
+    scheduler = client.tx_scheduler(rate=20)
+    for tx in payout_txs:
+        scheduler.add(tx)
+    results = await scheduler.run()
+```
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import grpc
+from utxorpc_spec.utxorpc.v1alpha.submit.submit_pb2 import Stage  # type: ignore
+
+from utxorpc.generics.tracker import TxTracker
+
+# Status codes worth resubmitting a tx after; others mean it was rejected
+TRANSIENT = frozenset(
+    {
+        grpc.StatusCode.UNAVAILABLE,
+        grpc.StatusCode.DEADLINE_EXCEEDED,
+        grpc.StatusCode.RESOURCE_EXHAUSTED,
+        grpc.StatusCode.ABORTED,
+    }
+)
+
+
+class SubmitResult:
+    """Outcome of one transaction of a bulk submission"""
+
+    tx_hash: bytes
+    ref: Optional[bytes]
+    error: Optional[Exception]
+
+    def __init__(
+        self,
+        tx_hash: bytes,
+        ref: Optional[bytes] = None,
+        error: Optional[Exception] = None,
+    ) -> None:
+        self.tx_hash = tx_hash
+        self.ref = ref
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"SubmitResult({self.tx_hash.hex()}, error={self.error!r})"
+        return f"SubmitResult({self.tx_hash.hex()}, ok)"
+
+
+class DependencyError(Exception):
+    """A tx was not submitted because one of its parents failed"""
+
+
+class TokenBucket:
+    """Allow `rate` operations per second with bursts of up to `burst`"""
+
+    rate: float
+    burst: float
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst is not None and burst <= 0:
+            raise ValueError("burst must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class _Node:
+    def __init__(self, tx_bytes: bytes, tx_hash: bytes) -> None:
+        self.tx_bytes = tx_bytes
+        self.tx_hash = tx_hash
+        self.parents: Set[bytes] = set()
+        self.children: Set[bytes] = set()
+
+
+class SubmitScheduler:
+    stage: int
+    max_concurrency: int
+    max_retries: int
+    retry_delay: float
+    stage_timeout: Optional[float]
+
+    def __init__(
+        self,
+        client,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        stage: int = Stage.STAGE_MEMPOOL,
+        max_concurrency: int = 16,
+        max_retries: int = 2,
+        retry_delay: float = 1.0,
+        stage_timeout: Optional[float] = None,
+        tracker: Optional[TxTracker] = None,
+    ) -> None:
+        """Create a scheduler over a connected async `SubmitClient`.
+
+        `rate` limits submissions per second (unlimited if None). A tx whose
+        submission fails with a `TRANSIENT` status is resubmitted up to
+        `max_retries` times, `retry_delay` seconds apart. A parent that does
+        not reach `stage` within `stage_timeout` seconds fails its
+        dependents. Parents are followed through `tracker`, or a private
+        `TxTracker` opened for the duration of `run`.
+        """
+        self.client = client
+        self.bucket = TokenBucket(rate, burst) if rate is not None else None
+        self.stage = stage
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.stage_timeout = stage_timeout
+        self.tracker = tracker
+        self._nodes: Dict[bytes, _Node] = {}
+        self._declared: Dict[bytes, Set[bytes]] = {}
+
+    def add(self, tx_bytes: bytes, depends_on: Iterable[bytes] = ()) -> bytes:
+        """Schedule a tx, returning its hash.
+
+        Parents are inferred from the tx inputs; `depends_on` adds tx hashes
+        that must reach the mempool first regardless. Parents not added to
+        this scheduler are assumed to be on chain already.
+        """
+        tx_hash = self.client.chain.tx_hash(tx_bytes)
+        if tx_hash not in self._nodes:
+            self._nodes[tx_hash] = _Node(tx_bytes, tx_hash)
+        self._declared.setdefault(tx_hash, set()).update(depends_on)
+        return tx_hash
+
+    def _link(self) -> List[bytes]:
+        """Resolve edges and return the hashes in topological order"""
+        chain = self.client.chain
+        for node in self._nodes.values():
+            spent = {tx_hash for tx_hash, _ in chain.tx_inputs(node.tx_bytes)}
+            for parent in spent | self._declared.get(node.tx_hash, set()):
+                if parent in self._nodes and parent != node.tx_hash:
+                    node.parents.add(parent)
+                    self._nodes[parent].children.add(node.tx_hash)
+
+        waiting = {tx_hash: len(node.parents) for tx_hash, node in self._nodes.items()}
+        order = [tx_hash for tx_hash, count in waiting.items() if count == 0]
+        for tx_hash in order:
+            for child in self._nodes[tx_hash].children:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    order.append(child)
+        if len(order) != len(self._nodes):
+            raise ValueError("Transaction dependencies contain a cycle")
+        return order
+
+    async def _submit(self, node: _Node) -> SubmitResult:
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                await self.bucket.acquire()
+            try:
+                ref = await self.client.async_submit_tx(node.tx_bytes)
+                return SubmitResult(node.tx_hash, ref=ref)
+            except asyncio.CancelledError:
+                raise
+            except grpc.RpcError as error:
+                if error.code() not in TRANSIENT or attempt >= self.max_retries:
+                    return SubmitResult(node.tx_hash, error=error)
+            except Exception as error:
+                return SubmitResult(node.tx_hash, error=error)
+            attempt += 1
+            await asyncio.sleep(self.retry_delay)
+
+    async def run(self) -> Dict[bytes, SubmitResult]:
+        """Submit every scheduled tx and return the results by tx hash.
+
+        A tx whose parent failed, or never reached the stage, is not
+        submitted; its result carries a `DependencyError`, caused by the
+        parent's error if there was one.
+        """
+        order = self._link()
+        results: Dict[bytes, SubmitResult] = {}
+        reached: Dict[bytes, "asyncio.Future[bool]"] = {
+            tx_hash: asyncio.get_running_loop().create_future() for tx_hash in order
+        }
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tracker = self.tracker or TxTracker(self.client)
+
+        # Why a tx didn't reach the stage, passed on to its dependents
+        errors: Dict[bytes, Optional[BaseException]] = {}
+
+        async def follow(node: _Node) -> None:
+            for parent in node.parents:
+                if not await reached[parent]:
+                    error = DependencyError(f"Parent {parent.hex()} failed")
+                    error.__cause__ = errors.get(parent)
+                    results[node.tx_hash] = SubmitResult(node.tx_hash, error=error)
+                    return
+
+            async with semaphore:
+                result = await self._submit(node)
+            results[node.tx_hash] = result
+            errors[node.tx_hash] = result.error
+            if not node.children or result.ref is None:
+                reached[node.tx_hash].set_result(result.ok)
+                return
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(tracker.track(result.ref, stage=self.stage)),
+                    self.stage_timeout,
+                )
+            except asyncio.TimeoutError as error:
+                tracker.untrack(result.ref)
+                errors[node.tx_hash] = error
+                return
+            reached[node.tx_hash].set_result(True)
+
+        async def process(node: _Node) -> None:
+            try:
+                await follow(node)
+            except Exception as error:
+                # e.g. the tracker failing; the tx itself may be submitted
+                errors[node.tx_hash] = error
+                results.setdefault(
+                    node.tx_hash, SubmitResult(node.tx_hash, error=error)
+                )
+            finally:
+                if not reached[node.tx_hash].done():
+                    reached[node.tx_hash].set_result(False)
+
+        tasks = [asyncio.ensure_future(process(self._nodes[h])) for h in order]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # Never close the tracker under tasks still following it
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.tracker is None:
+                await tracker.close()
+        self._nodes.clear()
+        self._declared.clear()
+        return results
+
+
+__all__ = [
+    "DependencyError",
+    "SubmitResult",
+    "SubmitScheduler",
+    "TRANSIENT",
+    "TokenBucket",
+]
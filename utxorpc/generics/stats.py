@@ -0,0 +1,121 @@
+"""Small, dependency free instruments used by the SDK's stats APIs."""
+
+import bisect
+import math
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+class RateMeter:
+    """Exponentially weighted events-per-second meter.
+
+    `half_life` controls how quickly old activity is forgotten; the rate of a
+    stream that stops decays towards zero instead of freezing at its last
+    value.
+    """
+
+    half_life: float
+    count: int
+
+    def __init__(self, half_life: float = 5.0) -> None:
+        self.half_life = half_life
+        self.count = 0
+        self._rate = 0.0
+        self._last: Optional[float] = None
+
+    def _decay(self, now: float) -> None:
+        if self._last is not None:
+            elapsed = now - self._last
+            self._rate *= math.exp(-elapsed * math.log(2) / self.half_life)
+        self._last = now
+
+    def mark(self, n: int = 1) -> None:
+        now = time.monotonic()
+        self._decay(now)
+        self.count += n
+        self._rate += n * math.log(2) / self.half_life
+
+    @property
+    def rate(self) -> float:
+        self._decay(time.monotonic())
+        return self._rate
+
+
+def exponential_buckets(start: float, factor: float, count: int) -> List[float]:
+    """Upper bounds `start, start * factor, ...` for `count` buckets"""
+    return [start * factor**i for i in range(count)]
+
+
+# 100us .. ~1.7min, doubling
+DEFAULT_BUCKETS = exponential_buckets(0.0001, 2, 21)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values, typically seconds.
+
+    Values above the last bound land in an overflow bucket. Percentiles are
+    estimated by interpolating within the bucket that contains them.
+    """
+
+    bounds: List[float]
+    counts: List[int]
+    count: int
+    sum: float
+    min: Optional[float]
+    max: Optional[float]
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = sorted(bounds)
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimate the `q`-th percentile, with `q` in [0, 100]"""
+        if self.min is None or self.max is None:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else self.min
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                fraction = (rank - seen) / bucket_count
+                return lower + (upper - lower) * fraction
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+__all__ = [
+    "RateMeter",
+    "Histogram",
+    "exponential_buckets",
+]
@@ -0,0 +1,353 @@
+"""Keep the chain tip in memory from a single `FollowTip` stream.
+
+`TipTracker` follows the tip from where it is when the tracker starts and
+applies every apply, undo and reset to a short history of block headers,
+so rollbacks move the tip back. Only block headers are read from the
+stream; bodies are never parsed. `read_tip()` is answered locally as long
+as the tip was confirmed, by a stream message or a ReadTip call, within
+`max_staleness` seconds, and waiters such as `wait_for_slot` are woken as
+the tip advances.
+
+```python
+async with client.tip_tracker() as tracker:
+    tip = await tracker.read_tip()
+    await tracker.wait_for_slot(tip.slot + 100)
+    depth = tracker.confirmations(tx_block_height)
+```
+
+The stream is reopened after errors, with exponential backoff, from the most
+recent header still on the chain among exponentially spaced ones of the
+history. A reset to a point without a height, as servers may send, leaves
+the height unknown until the next block is applied. Errors that
+retrying can't fix, such as `UNAUTHENTICATED`, and unexpected ones are
+logged and fail pending waiters, and the tracker stops until restarted.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Generic, List, Optional, Tuple
+
+import grpc
+from utxorpc_spec.utxorpc.v1alpha.sync.sync_pb2 import (  # type: ignore
+    BlockRef,
+    FollowTipRequest,
+    ReadTipRequest,
+)
+
+from utxorpc.generics import PointType
+from utxorpc.generics.intersect import exponential_offsets
+from utxorpc.generics.tracker import NON_RETRYABLE
+from utxorpc.generics.wire import LEN, iter_fields
+
+logger = logging.getLogger(__name__)
+
+_Waiter = Tuple[int, int, "asyncio.Future[Any]"]
+
+
+class TipTracker(Generic[PointType]):
+    max_staleness: float
+    history: int
+    reconnect_delay: float
+    max_backoff: float
+    messages: int
+    rollbacks: int
+    failures: int
+    reconnects: int
+    local_reads: int
+    remote_reads: int
+
+    def __init__(
+        self,
+        client: Any,
+        max_staleness: float = 30.0,
+        history: int = 128,
+        field_mask: Any = None,
+        reconnect_delay: float = 1.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        """Create a tracker over a connected async `SyncClient`.
+
+        `history` headers are kept to step back through rollbacks; deeper
+        rollbacks leave the tip unknown until the next block is applied.
+        `field_mask` is passed on to `FollowTipRequest`. A failed stream is
+        reopened after `reconnect_delay` seconds, doubling while failures
+        repeat, up to `max_backoff` seconds.
+        """
+        self.client = client
+        self.max_staleness = max_staleness
+        self.history = history
+        self.field_mask = field_mask
+        self.reconnect_delay = reconnect_delay
+        self.max_backoff = max_backoff
+        self.messages = 0
+        self.rollbacks = 0
+        # Consecutive stream failures, reset by any message
+        self.failures = 0
+        self.reconnects = 0
+        self.local_reads = 0
+        self.remote_reads = 0
+        self._headers: Deque[BlockRef] = deque(maxlen=history)
+        # False while the tip is a reset point that came without a height
+        self._height_known = True
+        self._server_tip: Optional[BlockRef] = None
+        self._confirmed_at: Optional[float] = None
+        self._slot_waiters: List[_Waiter] = []
+        self._height_waiters: List[_Waiter] = []
+        self._order = itertools.count()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._error: Optional[Exception] = None
+
+    async def __aenter__(self) -> "TipTracker[PointType]":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._error = None
+            self._task = asyncio.ensure_future(self._run())
+
+    async def close(self) -> None:
+        """Stop following the tip and cancel pending waiters"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, _, future in self._slot_waiters + self._height_waiters:
+            future.cancel()
+        self._slot_waiters.clear()
+        self._height_waiters.clear()
+
+    @property
+    def _tip(self) -> Optional[BlockRef]:
+        return self._headers[-1] if self._headers else None
+
+    @property
+    def tip(self) -> Optional[PointType]:
+        """The local tip, however stale; `None` until it is known"""
+        tip = self._tip
+        return self.client.chain.block_ref_to_point(tip) if tip is not None else None
+
+    @property
+    def height(self) -> Optional[int]:
+        tip = self._tip
+        return tip.height if tip is not None and self._height_known else None
+
+    @property
+    def slot(self) -> Optional[int]:
+        tip = self._tip
+        return tip.slot if tip is not None else None
+
+    @property
+    def staleness(self) -> float:
+        """Seconds since the local tip was last confirmed"""
+        if self._confirmed_at is None:
+            return float("inf")
+        return time.monotonic() - self._confirmed_at
+
+    @property
+    def behind(self) -> Optional[int]:
+        """Blocks between the local tip and the server's, while catching up"""
+        height = self.height
+        if self._server_tip is None or height is None:
+            return None
+        return max(0, self._server_tip.height - height)
+
+    def confirmations(self, height: int) -> Optional[int]:
+        """Blocks on top of the block at `height`, itself included"""
+        tip = self.height
+        if tip is None:
+            return None
+        return max(0, tip - height + 1)
+
+    async def read_tip(
+        self, max_staleness: Optional[float] = None
+    ) -> Optional[PointType]:
+        """The tip, from memory if confirmed within `max_staleness` seconds.
+
+        Otherwise it is read from the server. A server tip equal to the
+        local one confirms it, so quiet chains cost one ReadTip per
+        `max_staleness` at most.
+        """
+        bound = self.max_staleness if max_staleness is None else max_staleness
+        if self._tip is not None and self.staleness <= bound:
+            self.local_reads += 1
+            return self.tip
+
+        self.remote_reads += 1
+        tip = await self._read_remote_tip()
+        local = self._tip
+        if local is not None and local.hash == tip.hash:
+            self._confirmed_at = time.monotonic()
+        return self.client.chain.block_ref_to_point(tip)
+
+    async def wait_for_slot(self, slot: int) -> PointType:
+        """Wait until the tip reaches `slot` and return it"""
+        return await self._wait(self._slot_waiters, self.slot, slot)
+
+    async def wait_for_height(self, height: int) -> PointType:
+        """Wait until the tip reaches `height` and return it"""
+        return await self._wait(self._height_waiters, self.height, height)
+
+    async def _wait(
+        self, waiters: List[_Waiter], current: Optional[int], target: int
+    ) -> PointType:
+        if self._error is not None:
+            raise self._error
+        if self._task is None:
+            raise RuntimeError("Call start() or use the tracker with async with first")
+        if current is not None and current >= target:
+            return self.tip  # type: ignore[return-value]
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(waiters, (target, next(self._order), future))
+        return await future
+
+    def _wake(self) -> None:
+        tip = self._tip
+        if tip is None:
+            return
+        point = None
+        for waiters, current in (
+            (self._slot_waiters, tip.slot),
+            (self._height_waiters, self.height),
+        ):
+            while current is not None and waiters and waiters[0][0] <= current:
+                _, _, future = heapq.heappop(waiters)
+                if not future.done():
+                    if point is None:
+                        point = self.client.chain.block_ref_to_point(tip)
+                    future.set_result(point)
+
+    def _fail(self, error: Exception) -> None:
+        self._error = error
+        for _, _, future in self._slot_waiters + self._height_waiters:
+            if not future.done():
+                future.set_exception(error)
+        self._slot_waiters.clear()
+        self._height_waiters.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slot": self.slot,
+            "height": self.height,
+            "behind": self.behind,
+            "staleness": self.staleness,
+            "messages": self.messages,
+            "rollbacks": self.rollbacks,
+            "failures": self.failures,
+            "reconnects": self.reconnects,
+            "local_reads": self.local_reads,
+            "remote_reads": self.remote_reads,
+            "waiters": len(self._slot_waiters) + len(self._height_waiters),
+        }
+
+    async def _read_remote_tip(self) -> BlockRef:
+        response = await self.client.get_async_stub().ReadTip(
+            ReadTipRequest(),
+            metadata=[(k, v) for k, v in self.client.metadata.items()],
+        )
+        return response.tip
+
+    def _apply(self, block: bytes) -> None:
+        block_ref = self.client.chain.raw_block_ref(block)
+        if block_ref is None:
+            return
+        if not self._height_known:
+            if self._headers:
+                # The reset point had no height; it is this block's parent
+                self._headers[-1].height = block_ref.height - 1
+            self._height_known = True
+        self._headers.append(block_ref)
+
+    def _undo(self, block: bytes) -> None:
+        block_ref = self.client.chain.raw_block_ref(block)
+        if block_ref is None:
+            return
+        self.rollbacks += 1
+        if self._headers and self._headers[-1].hash == block_ref.hash:
+            self._headers.pop()
+
+    def _reset(self, block_ref: BlockRef) -> None:
+        while self._headers and self._headers[-1].hash != block_ref.hash:
+            self._headers.pop()
+        if not self._headers:
+            # Proto3 can't tell an unset height from 0, as in `HeaderChain`
+            self._headers.append(block_ref)
+            self._height_known = block_ref.height > 0
+
+    def _handle(self, data: bytes) -> None:
+        for number, wire_type, value in iter_fields(data):
+            if wire_type != LEN:
+                continue
+            if number == 1:
+                self._apply(value)  # type: ignore[arg-type]
+            elif number == 2:
+                self._undo(value)  # type: ignore[arg-type]
+            elif number == 3:
+                self._reset(BlockRef.FromString(value))
+            elif number == 4:
+                self._server_tip = BlockRef.FromString(value)
+        self.messages += 1
+        self.failures = 0
+        self._confirmed_at = time.monotonic()
+        self._wake()
+
+    def _request(self, intersect: List[BlockRef]) -> FollowTipRequest:
+        request = FollowTipRequest(intersect=intersect)
+        if self.field_mask is not None:
+            request.field_mask.CopyFrom(self.field_mask)
+        return request
+
+    async def _follow(self, intersect: List[BlockRef]) -> None:
+        stub = self.client.get_async_raw_stub()
+        async for data in stub.FollowTip(
+            self._request(intersect),
+            metadata=[(k, v) for k, v in self.client.metadata.items()],
+        ):
+            self._handle(data)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self._headers:
+                    self._reset(await self._read_remote_tip())
+                    self._confirmed_at = time.monotonic()
+                    self._wake()
+                headers = self._headers
+                await self._follow(
+                    [
+                        BlockRef(slot=headers[index].slot, hash=headers[index].hash)
+                        for index in exponential_offsets(len(headers))
+                    ]
+                )
+            except grpc.RpcError as error:
+                if error.code() in NON_RETRYABLE:
+                    logger.error("TipTracker stream failed, not retrying: %s", error)
+                    self._fail(error)
+                    return
+                if error.code() == grpc.StatusCode.NOT_FOUND:
+                    # None of the recent headers is on the chain anymore
+                    self._headers.clear()
+                logger.warning("TipTracker stream failed, reconnecting: %s", error)
+            except Exception as error:
+                logger.exception("TipTracker stream failed")
+                self._fail(error)
+                return
+            self.failures += 1
+            delay = self.reconnect_delay * 2 ** min(self.failures - 1, 16)
+            await asyncio.sleep(min(self.max_backoff, delay))
+            self.reconnects += 1
+
+
+__all__ = [
+    "TipTracker",
+]
@@ -0,0 +1,354 @@
+"""Track many pending transactions over a few `WaitForTx` streams.
+
+`async_wait_for_tx` opens one stream per transaction. `TxTracker` instead
+packs up to `max_refs_per_stream` refs into each stream. Newly tracked refs
+are added by rotating a stream: a replacement carrying the old refs plus
+the new ones is opened, and the old stream is cancelled once the
+replacement has answered (or after `overlap` seconds). Stage updates are
+routed back to per-transaction futures and callbacks.
+
+Streams that fail are logged and their refs resubscribed, backing off
+exponentially while failures repeat. Errors that retrying can't fix, such
+as `UNAUTHENTICATED` or `INVALID_ARGUMENT`, fail the futures of the
+stream's transactions instead.
+
+```python
+async with client.tx_tracker() as tracker:
+    ref = await client.async_submit_tx(tx_bytes)
+    stage = await tracker.track(ref, stage=Stage.STAGE_CONFIRMED)
+```
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import grpc
+from utxorpc_spec.utxorpc.v1alpha.submit.submit_pb2 import (  # type: ignore
+    Stage,
+    WaitForTxRequest,
+)
+
+from utxorpc.generics.memory import track_memory
+from utxorpc.generics.stats import Histogram
+
+logger = logging.getLogger(__name__)
+
+StageCallback = Callable[[bytes, int], Any]
+
+# Status codes that fail the tracked txs instead of being retried
+NON_RETRYABLE = frozenset(
+    {
+        grpc.StatusCode.INVALID_ARGUMENT,
+        grpc.StatusCode.UNAUTHENTICATED,
+        grpc.StatusCode.PERMISSION_DENIED,
+        grpc.StatusCode.UNIMPLEMENTED,
+    }
+)
+
+
+class _TrackedTx:
+    def __init__(self) -> None:
+        # One future per stage the tx is tracked until
+        self.futures: Dict[int, "asyncio.Future[int]"] = {}
+        self.callbacks: List[StageCallback] = []
+        self.stage = Stage.STAGE_UNSPECIFIED
+        self.started = time.monotonic()
+
+
+class _Stream:
+    def __init__(self, refs: Set[bytes]) -> None:
+        self.refs = refs
+        self.remaining = set(refs)
+        self.ready = asyncio.Event()
+        self.task: Optional["asyncio.Task[None]"] = None
+
+
+class TxTracker:
+    max_refs_per_stream: int
+    rotate_interval: float
+    overlap: float
+    max_backoff: float
+    failures: int
+    histograms: Dict[int, Histogram]
+
+    def __init__(
+        self,
+        client: Any,
+        max_refs_per_stream: int = 1000,
+        rotate_interval: float = 0.25,
+        overlap: float = 5.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        """Create a tracker over a connected async `SubmitClient`.
+
+        Refs tracked within `rotate_interval` seconds of each other are
+        added to the streams together, bounding the rotation rate. After
+        failed streams, resubscribing waits twice as long per consecutive
+        failure, up to `max_backoff` seconds.
+        """
+        self.client = client
+        self.max_refs_per_stream = max_refs_per_stream
+        self.rotate_interval = rotate_interval
+        self.overlap = overlap
+        self.max_backoff = max_backoff
+        # Consecutive stream failures, reset by any stage update
+        self.failures = 0
+        self.histograms = {
+            stage: Histogram()
+            for stage in (
+                Stage.STAGE_ACKNOWLEDGED,
+                Stage.STAGE_MEMPOOL,
+                Stage.STAGE_NETWORK,
+                Stage.STAGE_CONFIRMED,
+            )
+        }
+
+        self._txs: Dict[bytes, _TrackedTx] = {}
+        self._streams: Dict[int, _Stream] = {}
+        self._stream_ids = itertools.count()
+        self._unassigned: Set[bytes] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._manager: Optional["asyncio.Task[None]"] = None
+        self._retiring: Set["asyncio.Task[None]"] = set()
+        track_memory("trackers", self)
+
+    async def __aenter__(self) -> "TxTracker":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._manager is None:
+            self._wakeup = asyncio.Event()
+            self._manager = asyncio.ensure_future(self._manage())
+
+    async def close(self) -> None:
+        """Close all streams and cancel futures of unresolved transactions"""
+        tasks = [stream.task for stream in self._streams.values() if stream.task]
+        tasks.extend(self._retiring)
+        if self._manager is not None:
+            tasks.append(self._manager)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._streams.clear()
+        self._retiring.clear()
+        self._manager = None
+        for tx in self._txs.values():
+            for future in tx.futures.values():
+                future.cancel()
+        self._txs.clear()
+        self._unassigned.clear()
+
+    def track(
+        self,
+        ref: bytes,
+        stage: int = Stage.STAGE_CONFIRMED,
+        callback: Optional[StageCallback] = None,
+    ) -> "asyncio.Future[int]":
+        """Track `ref` until it reaches `stage`.
+
+        Returns a future resolving to the first stage at or past `stage`.
+        `callback(ref, stage)` is called on every stage the tx advances to.
+        Tracking an already tracked ref shares its stream, and returns the
+        existing future if it is tracked until the same `stage`.
+        """
+        self.start()
+        tx = self._txs.get(ref)
+        if tx is None:
+            tx = _TrackedTx()
+            self._txs[ref] = tx
+            self._unassigned.add(ref)
+            assert self._wakeup is not None
+            self._wakeup.set()
+        if callback is not None:
+            tx.callbacks.append(callback)
+        future = tx.futures.get(stage)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            if tx.stage >= stage:
+                future.set_result(tx.stage)
+            else:
+                tx.futures[stage] = future
+        return future
+
+    def untrack(self, ref: bytes) -> None:
+        tx = self._txs.pop(ref, None)
+        if tx is not None:
+            for future in tx.futures.values():
+                future.cancel()
+        self._unassigned.discard(ref)
+
+    @property
+    def pending(self) -> int:
+        return len(self._txs)
+
+    def pending_by_stage(self) -> Dict[int, int]:
+        counts: Dict[int, int] = {}
+        for tx in self._txs.values():
+            counts[tx.stage] = counts.get(tx.stage, 0) + 1
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "pending_by_stage": {
+                Stage.Name(stage): count
+                for stage, count in self.pending_by_stage().items()
+            },
+            "streams": len(self._streams),
+            "failures": self.failures,
+            "time_to_stage": {
+                Stage.Name(stage): histogram.summary()
+                for stage, histogram in self.histograms.items()
+            },
+        }
+
+    def memory_stats(self) -> Dict[str, Any]:
+        return {
+            "txs": len(self._txs),
+            "unassigned": len(self._unassigned),
+            "streams": len(self._streams),
+            "stream_refs": sum(len(s.refs) for s in self._streams.values()),
+            "callbacks": sum(len(tx.callbacks) for tx in self._txs.values()),
+        }
+
+    def _on_stage(self, ref: bytes, stage: int) -> None:
+        tx = self._txs.get(ref)
+        # Overlapping streams during rotation may repeat updates; only
+        # forward progress counts.
+        if tx is None or stage <= tx.stage:
+            return
+        elapsed = time.monotonic() - tx.started
+        for reached in range(tx.stage + 1, stage + 1):
+            if reached in self.histograms:
+                self.histograms[reached].observe(elapsed)
+        tx.stage = stage
+        for callback in tx.callbacks:
+            try:
+                callback(ref, stage)
+            except Exception:
+                # A failing callback must not take the shared stream down
+                logger.exception("TxTracker callback failed for %s", ref.hex())
+        for target, future in list(tx.futures.items()):
+            if stage >= target:
+                del tx.futures[target]
+                if not future.done():
+                    future.set_result(stage)
+        if not tx.futures:
+            del self._txs[ref]
+
+    async def _run_stream(self, stream_id: int, stream: _Stream) -> None:
+        stub = self.client.get_async_stub()
+        try:
+            async for response in stub.WaitForTx(
+                WaitForTxRequest(ref=list(stream.refs)),
+                metadata=[(k, v) for k, v in self.client.metadata.items()],
+            ):
+                stream.ready.set()
+                self.failures = 0
+                self._on_stage(response.ref, response.stage)
+                if response.ref not in self._txs:
+                    stream.remaining.discard(response.ref)
+                    if not stream.remaining:
+                        break
+        except asyncio.CancelledError:
+            raise
+        except grpc.RpcError as error:
+            if error.code() in NON_RETRYABLE:
+                logger.error("WaitForTx failed, not retrying: %s", error)
+                self._fail(stream, error)
+            else:
+                # Unresolved refs are resubscribed on the next rotation
+                self.failures += 1
+                logger.warning(
+                    "WaitForTx failed (%d in a row): %s", self.failures, error
+                )
+        except Exception:
+            self.failures += 1
+            logger.exception("WaitForTx stream failed (%d in a row)", self.failures)
+        finally:
+            stream.ready.set()
+            if self._streams.get(stream_id) is stream:
+                del self._streams[stream_id]
+                self._unassigned.update(ref for ref in stream.refs if ref in self._txs)
+                if self._unassigned and self._wakeup is not None:
+                    self._wakeup.set()
+
+    def _fail(self, stream: _Stream, error: Exception) -> None:
+        for ref in stream.refs:
+            tx = self._txs.pop(ref, None)
+            if tx is None:
+                continue
+            for future in tx.futures.values():
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _retire(self, stream: _Stream, replacement: _Stream) -> None:
+        try:
+            await asyncio.wait_for(replacement.ready.wait(), self.overlap)
+        except asyncio.TimeoutError:
+            pass
+        if stream.task is not None:
+            stream.task.cancel()
+
+    def _open(self, refs: Set[bytes]) -> _Stream:
+        stream_id = next(self._stream_ids)
+        stream = _Stream(refs)
+        self._streams[stream_id] = stream
+        stream.task = asyncio.ensure_future(self._run_stream(stream_id, stream))
+        return stream
+
+    def _rotate(self) -> None:
+        new_refs = [ref for ref in self._unassigned if ref in self._txs]
+        self._unassigned.clear()
+
+        while new_refs:
+            # Top up the least loaded stream, dropping refs that already
+            # resolved, or open a fresh one if every stream is full.
+            candidates = [
+                (len(live), stream_id, live)
+                for stream_id, stream in self._streams.items()
+                for live in [{ref for ref in stream.refs if ref in self._txs}]
+                if len(live) < self.max_refs_per_stream
+            ]
+            if candidates:
+                _, stream_id, refs = min(candidates, key=lambda c: c[0])
+                old = self._streams.pop(stream_id)
+            else:
+                refs, old = set(), None
+
+            room = self.max_refs_per_stream - len(refs)
+            refs.update(new_refs[:room])
+            new_refs = new_refs[room:]
+            replacement = self._open(refs)
+            if old is not None:
+                task = asyncio.ensure_future(self._retire(old, replacement))
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
+
+    async def _manage(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Let refs tracked in quick succession share one rotation, and
+            # back off while streams keep failing
+            delay = self.rotate_interval
+            if self.failures:
+                delay = min(self.max_backoff, delay * 2 ** min(self.failures, 16))
+            await asyncio.sleep(delay)
+            self._rotate()
+            if self._unassigned:
+                self._wakeup.set()
+
+
+__all__ = [
+    "NON_RETRYABLE",
+    "TxTracker",
+]
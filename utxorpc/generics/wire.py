@@ -0,0 +1,91 @@
+"""Minimal protobuf wire-format reader.
+
+Used by the raw passthrough APIs to locate nested fields inside serialized
+messages without paying for a full protobuf decode.
+"""
+
+from typing import Iterator, Optional, Tuple, Union
+
+VARINT = 0
+I64 = 1
+LEN = 2
+I32 = 5
+
+
+def read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Read a varint at `offset`, returning `(value, next_offset)`"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def iter_fields(data: bytes) -> Iterator[Tuple[int, int, Union[int, bytes]]]:
+    """Iterate the top-level fields of a serialized message.
+
+    Yields `(field_number, wire_type, value)`, where `value` is an int for
+    varint and fixed-width fields and the raw payload for length-delimited
+    ones. Nested messages are left undecoded.
+    """
+    offset = 0
+    end = len(data)
+    while offset < end:
+        tag, offset = read_varint(data, offset)
+        field_number, wire_type = tag >> 3, tag & 0x7
+        if wire_type == VARINT:
+            value, offset = read_varint(data, offset)
+            yield field_number, wire_type, value
+        elif wire_type == LEN:
+            length, offset = read_varint(data, offset)
+            yield field_number, wire_type, data[offset : offset + length]
+            offset += length
+        elif wire_type == I64:
+            yield (
+                field_number,
+                wire_type,
+                int.from_bytes(data[offset : offset + 8], "little"),
+            )
+            offset += 8
+        elif wire_type == I32:
+            yield (
+                field_number,
+                wire_type,
+                int.from_bytes(data[offset : offset + 4], "little"),
+            )
+            offset += 4
+        else:
+            raise ValueError(
+                f"Unsupported wire type {wire_type} in field {field_number}"
+            )
+
+
+def find_field(data: bytes, field_number: int) -> Optional[bytes]:
+    """Return the payload of the last length-delimited `field_number`, if any"""
+    found = None
+    for number, wire_type, value in iter_fields(data):
+        if number == field_number and wire_type == LEN:
+            found = value
+    return found  # type: ignore
+
+
+def find_path(data: bytes, *path: int) -> Optional[bytes]:
+    """Follow a chain of nested length-delimited fields"""
+    current: Optional[bytes] = data
+    for field_number in path:
+        if current is None:
+            return None
+        current = find_field(current, field_number)
+    return current
+
+
+__all__ = [
+    "read_varint",
+    "iter_fields",
+    "find_field",
+    "find_path",
+]
@@ -0,0 +1,152 @@
+"""Compact storage for long runs of Cardano points.
+
+A list of `CardanoPoint`s costs well over 100 bytes per point in object
+headers. `PointArray` keeps slots in an `int64` array and hashes packed in
+one buffer, 40 bytes per point, and materializes points only on access.
+Points are kept in slot order so lookups by slot are binary searches.
+
+```python
+points = PointArray()
+async for response in client.async_follow_tip(intersect=[tip]):
+    if response.action == FollowTipResponseAction.apply:
+        points.append(CardanoChain.block_to_point(response.block))
+    elif response.action == FollowTipResponseAction.undo:
+        points.truncate(response.block.header.slot - 1)
+```
+"""
+
+import bisect
+from array import array
+from typing import Iterable, Iterator, Optional, Union, overload
+
+from utxorpc.cardano import CardanoPoint
+
+HASH_SIZE = 32
+
+
+class PointArray:
+    """Slot-ordered sequence of points backed by an `int64` array and a buffer"""
+
+    def __init__(self, points: Iterable[CardanoPoint] = ()) -> None:
+        self._slots = array("q")
+        self._hashes = bytearray()
+        self.extend(points)
+
+    def append(self, point: CardanoPoint) -> None:
+        """Add a point after the last one; slots must not decrease"""
+        if len(point.hash) != HASH_SIZE:
+            raise ValueError(f"Point hashes must be {HASH_SIZE} bytes")
+        if self._slots and point.slot < self._slots[-1]:
+            raise ValueError(
+                f"Slot {point.slot} is before the last point ({self._slots[-1]})"
+            )
+        self._slots.append(point.slot)
+        self._hashes += point.hash
+
+    def extend(self, points: Iterable[CardanoPoint]) -> None:
+        for point in points:
+            self.append(point)
+
+    def truncate(self, slot: int) -> None:
+        """Drop every point after `slot`, e.g. on a rollback"""
+        index = bisect.bisect_right(self._slots, slot)
+        del self._slots[index:]
+        del self._hashes[index * HASH_SIZE :]
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _point(self, index: int) -> CardanoPoint:
+        start = index * HASH_SIZE
+        return CardanoPoint(
+            self._slots[index], bytes(self._hashes[start : start + HASH_SIZE])
+        )
+
+    @overload
+    def __getitem__(self, index: int) -> CardanoPoint: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "PointArray": ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[CardanoPoint, "PointArray"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("PointArray slices must be contiguous")
+            result = PointArray()
+            result._slots = self._slots[start:stop]
+            result._hashes = self._hashes[start * HASH_SIZE : stop * HASH_SIZE]
+            return result
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PointArray index out of range")
+        return self._point(index)
+
+    def __iter__(self) -> Iterator[CardanoPoint]:
+        for index in range(len(self)):
+            yield self._point(index)
+
+    def __contains__(self, point: object) -> bool:
+        if not isinstance(point, CardanoPoint):
+            return False
+        return self.index(point) is not None
+
+    def index(self, point: CardanoPoint) -> Optional[int]:
+        """Position of `point`, or `None` if absent"""
+        index = bisect.bisect_left(self._slots, point.slot)
+        while index < len(self._slots) and self._slots[index] == point.slot:
+            start = index * HASH_SIZE
+            if self._hashes[start : start + HASH_SIZE] == point.hash:
+                return index
+            index += 1
+        return None
+
+    def find(self, slot: int) -> Optional[CardanoPoint]:
+        """The point at `slot`, if any"""
+        index = bisect.bisect_left(self._slots, slot)
+        if index < len(self._slots) and self._slots[index] == slot:
+            return self._point(index)
+        return None
+
+    def floor(self, slot: int) -> Optional[CardanoPoint]:
+        """The last point at or before `slot`"""
+        index = bisect.bisect_right(self._slots, slot)
+        return self._point(index - 1) if index else None
+
+    def ceiling(self, slot: int) -> Optional[CardanoPoint]:
+        """The first point at or after `slot`"""
+        index = bisect.bisect_left(self._slots, slot)
+        return self._point(index) if index < len(self._slots) else None
+
+    @property
+    def slots(self) -> memoryview:
+        """Zero-copy view of the slots, e.g. for `numpy.frombuffer(..., "<i8")`.
+
+        The array cannot grow or shrink while a view is alive.
+        """
+        return memoryview(self._slots)
+
+    @property
+    def hashes(self) -> memoryview:
+        """Zero-copy view of the packed hashes, pinned like `slots`"""
+        return memoryview(self._hashes)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._slots) * self._slots.itemsize + len(self._hashes)
+
+    def __repr__(self) -> str:
+        if not self._slots:
+            return "PointArray([])"
+        return (
+            f"PointArray({len(self)} points, slots {self._slots[0]}..{self._slots[-1]})"
+        )
+
+
+__all__ = [
+    "HASH_SIZE",
+    "PointArray",
+]
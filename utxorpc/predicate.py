@@ -0,0 +1,527 @@
+"""Local evaluation of UTxO RPC predicates against Cardano transactions.
+
+Mirrors how servers apply `TxPredicate`s so streams can be filtered on the
+client: a predicate matches when its `match` pattern (if any) matches, none
+of its `not` predicates match, all of its `all_of` predicates match and, if
+`any_of` is non-empty, at least one of those matches. Within a pattern every
+field that is set must match; an empty pattern matches everything.
+
+`tx_matches` and `utxo_matches` interpret a predicate directly and define
+the reference semantics. `compile_tx_predicate` and
+`compile_utxo_predicate` turn a predicate into a matcher function once:
+byte values to compare against are extracted up front, each tx's
+addresses, credentials and assets are collected into sets at most once,
+and `any_of`/`not` children that test a single indexable field (an
+address, a credential, a policy or an asset) collapse into one set
+intersection however many there are.
+
+```python
+matches = compile_tx_predicate(predicate)
+for tx in block.body.tx:
+    if matches(tx):
+        ...
+```
+"""
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from utxorpc_spec.utxorpc.v1alpha.cardano.cardano_pb2 import (  # type: ignore
+    AddressPattern,
+    AssetPattern,
+    Tx,
+    TxOutput,
+    TxOutputPattern,
+    TxPattern,
+)
+
+# Shelley address header types (high nibble of the first byte)
+BASE_ADDRESS_TYPES = range(0, 4)
+PAYMENT_ADDRESS_TYPES = range(0, 8)
+REWARD_ADDRESS_TYPES = (14, 15)
+CREDENTIAL_SIZE = 28
+
+
+def payment_part(address: bytes) -> Optional[bytes]:
+    """Payment credential of a Shelley address, if it has one"""
+    if address and address[0] >> 4 in PAYMENT_ADDRESS_TYPES:
+        return address[1 : 1 + CREDENTIAL_SIZE]
+    return None
+
+
+def delegation_part(address: bytes) -> Optional[bytes]:
+    """Stake credential of a base or reward address, if it has one"""
+    if not address:
+        return None
+    kind = address[0] >> 4
+    if kind in BASE_ADDRESS_TYPES:
+        return address[1 + CREDENTIAL_SIZE : 1 + 2 * CREDENTIAL_SIZE]
+    if kind in REWARD_ADDRESS_TYPES:
+        return address[1 : 1 + CREDENTIAL_SIZE]
+    return None
+
+
+def address_matches(pattern: AddressPattern, address: bytes) -> bool:
+    if pattern.exact_address and pattern.exact_address != address:
+        return False
+    if pattern.payment_part and pattern.payment_part != payment_part(address):
+        return False
+    if pattern.delegation_part and pattern.delegation_part != delegation_part(address):
+        return False
+    return True
+
+
+def asset_matches(pattern: AssetPattern, policy_id: bytes, name: bytes) -> bool:
+    if pattern.policy_id and pattern.policy_id != policy_id:
+        return False
+    if pattern.asset_name and pattern.asset_name != name:
+        return False
+    return True
+
+
+def output_matches(pattern: TxOutputPattern, output: TxOutput) -> bool:
+    if pattern.HasField("address") and not address_matches(
+        pattern.address, output.address
+    ):
+        return False
+    if pattern.HasField("asset") and not any(
+        asset_matches(pattern.asset, multiasset.policy_id, asset.name)
+        for multiasset in output.assets
+        for asset in multiasset.assets
+    ):
+        return False
+    return True
+
+
+def _consumed(tx: Tx) -> Iterator[TxOutput]:
+    # Inputs only carry their output once resolved by the server
+    for tx_input in tx.inputs:
+        if tx_input.HasField("as_output"):
+            yield tx_input.as_output
+
+
+def _involved(tx: Tx) -> Iterator[TxOutput]:
+    yield from _consumed(tx)
+    yield from tx.outputs
+
+
+def tx_pattern_matches(pattern: TxPattern, tx: Tx) -> bool:
+    if pattern.HasField("has_certificate"):
+        raise ValueError("Certificate patterns are not supported for local matching")
+    if pattern.HasField("consumes") and not any(
+        output_matches(pattern.consumes, output) for output in _consumed(tx)
+    ):
+        return False
+    if pattern.HasField("produces") and not any(
+        output_matches(pattern.produces, output) for output in tx.outputs
+    ):
+        return False
+    if pattern.HasField("has_address") and not any(
+        address_matches(pattern.has_address, output.address) for output in _involved(tx)
+    ):
+        return False
+    if pattern.HasField("moves_asset") and not any(
+        asset_matches(pattern.moves_asset, multiasset.policy_id, asset.name)
+        for output in _involved(tx)
+        for multiasset in output.assets
+        for asset in multiasset.assets
+    ):
+        return False
+    if pattern.HasField("mints_asset") and not any(
+        asset_matches(pattern.mints_asset, multiasset.policy_id, asset.name)
+        for multiasset in tx.mint
+        for asset in multiasset.assets
+    ):
+        return False
+    return True
+
+
+def tx_matches(predicate, tx: Tx) -> bool:
+    """Evaluate a submit or watch `TxPredicate` against a Cardano tx"""
+    if predicate.HasField("match") and not tx_pattern_matches(
+        predicate.match.cardano, tx
+    ):
+        return False
+    if any(tx_matches(child, tx) for child in getattr(predicate, "not")):
+        return False
+    if not all(tx_matches(child, tx) for child in predicate.all_of):
+        return False
+    if predicate.any_of and not any(
+        tx_matches(child, tx) for child in predicate.any_of
+    ):
+        return False
+    return True
+
+
+def utxo_matches(predicate, output: TxOutput) -> bool:
+    """Evaluate a `UtxoPredicate` against a Cardano tx output"""
+    if predicate.HasField("match") and not output_matches(
+        predicate.match.cardano, output
+    ):
+        return False
+    if any(utxo_matches(child, output) for child in getattr(predicate, "not")):
+        return False
+    if not all(utxo_matches(child, output) for child in predicate.all_of):
+        return False
+    if predicate.any_of and not any(
+        utxo_matches(child, output) for child in predicate.any_of
+    ):
+        return False
+    return True
+
+
+Matcher = Callable[[Any], bool]
+IndexKey = Tuple[str, Any]
+
+
+class _TxView:
+    """Sets of what a tx touches, each computed on first use"""
+
+    __slots__ = (
+        "tx",
+        "_involved",
+        "_addresses",
+        "_payment_parts",
+        "_delegation_parts",
+        "_moved",
+        "_moved_policies",
+        "_minted",
+        "_minted_policies",
+    )
+
+    def __init__(self, tx: Tx) -> None:
+        self.tx = tx
+        self._involved: Optional[List[TxOutput]] = None
+        self._addresses: Optional[Set[bytes]] = None
+        self._payment_parts: Optional[Set[Optional[bytes]]] = None
+        self._delegation_parts: Optional[Set[Optional[bytes]]] = None
+        self._moved: Optional[Set[Tuple[bytes, bytes]]] = None
+        self._moved_policies: Optional[Set[bytes]] = None
+        self._minted: Optional[Set[Tuple[bytes, bytes]]] = None
+        self._minted_policies: Optional[Set[bytes]] = None
+
+    @property
+    def involved(self) -> List[TxOutput]:
+        if self._involved is None:
+            self._involved = list(_involved(self.tx))
+        return self._involved
+
+    @property
+    def addresses(self) -> Set[bytes]:
+        if self._addresses is None:
+            self._addresses = {output.address for output in self.involved}
+        return self._addresses
+
+    @property
+    def payment_parts(self) -> Set[Optional[bytes]]:
+        if self._payment_parts is None:
+            self._payment_parts = {payment_part(a) for a in self.addresses}
+        return self._payment_parts
+
+    @property
+    def delegation_parts(self) -> Set[Optional[bytes]]:
+        if self._delegation_parts is None:
+            self._delegation_parts = {delegation_part(a) for a in self.addresses}
+        return self._delegation_parts
+
+    @property
+    def moved(self) -> Set[Tuple[bytes, bytes]]:
+        if self._moved is None:
+            self._moved = {
+                (multiasset.policy_id, asset.name)
+                for output in self.involved
+                for multiasset in output.assets
+                for asset in multiasset.assets
+            }
+        return self._moved
+
+    @property
+    def moved_policies(self) -> Set[bytes]:
+        if self._moved_policies is None:
+            self._moved_policies = {policy_id for policy_id, _ in self.moved}
+        return self._moved_policies
+
+    @property
+    def minted(self) -> Set[Tuple[bytes, bytes]]:
+        if self._minted is None:
+            self._minted = {
+                (multiasset.policy_id, asset.name)
+                for multiasset in self.tx.mint
+                for asset in multiasset.assets
+            }
+        return self._minted
+
+    @property
+    def minted_policies(self) -> Set[bytes]:
+        if self._minted_policies is None:
+            self._minted_policies = {policy_id for policy_id, _ in self.minted}
+        return self._minted_policies
+
+
+class _OutputView:
+    """The same sets as `_TxView`, for a single output"""
+
+    __slots__ = ("output", "addresses", "_moved")
+
+    def __init__(self, output: TxOutput) -> None:
+        self.output = output
+        self.addresses = (output.address,)
+        self._moved: Optional[Set[Tuple[bytes, bytes]]] = None
+
+    @property
+    def payment_parts(self) -> Tuple[Optional[bytes]]:
+        return (payment_part(self.output.address),)
+
+    @property
+    def delegation_parts(self) -> Tuple[Optional[bytes]]:
+        return (delegation_part(self.output.address),)
+
+    @property
+    def moved(self) -> Set[Tuple[bytes, bytes]]:
+        if self._moved is None:
+            self._moved = {
+                (multiasset.policy_id, asset.name)
+                for multiasset in self.output.assets
+                for asset in multiasset.assets
+            }
+        return self._moved
+
+    @property
+    def moved_policies(self) -> Set[bytes]:
+        return {policy_id for policy_id, _ in self.moved}
+
+
+def _always(value: Any) -> bool:
+    return True
+
+
+def _all(checks: List[Matcher]) -> Matcher:
+    if not checks:
+        return _always
+    if len(checks) == 1:
+        return checks[0]
+    checks_ = tuple(checks)
+
+    def match(value: Any) -> bool:
+        for check in checks_:
+            if not check(value):
+                return False
+        return True
+
+    return match
+
+
+def _compile_address(pattern: AddressPattern) -> Matcher:
+    checks: List[Matcher] = []
+    exact, payment, delegation = (
+        pattern.exact_address,
+        pattern.payment_part,
+        pattern.delegation_part,
+    )
+    if exact:
+        checks.append(lambda address: address == exact)
+    if payment:
+        checks.append(lambda address: payment_part(address) == payment)
+    if delegation:
+        checks.append(lambda address: delegation_part(address) == delegation)
+    return _all(checks)
+
+
+def _address_key(pattern: AddressPattern) -> Optional[IndexKey]:
+    fields = pattern.ListFields()
+    if len(fields) != 1:
+        return None
+    field, value = fields[0]
+    return {
+        "exact_address": "addresses",
+        "payment_part": "payment_parts",
+        "delegation_part": "delegation_parts",
+    }[field.name], value
+
+
+def _asset_key(pattern: AssetPattern, pairs: str, policies: str) -> Optional[IndexKey]:
+    if pattern.policy_id and pattern.asset_name:
+        return pairs, (pattern.policy_id, pattern.asset_name)
+    if pattern.policy_id:
+        return policies, pattern.policy_id
+    return None
+
+
+def _compile_assets(pattern: AssetPattern, pairs: str, policies: str) -> Matcher:
+    """Match views having an asset like `pattern` in their `pairs` set"""
+    key = _asset_key(pattern, pairs, policies)
+    if key is not None:
+        attribute, value = key
+        return lambda view: value in getattr(view, attribute)
+    name = pattern.asset_name
+    if name:
+        return lambda view: any(n == name for _, n in getattr(view, pairs))
+    return lambda view: bool(getattr(view, pairs))
+
+
+def _compile_output(pattern: TxOutputPattern) -> Matcher:
+    """Compile a pattern matching raw `TxOutput`s"""
+    checks: List[Matcher] = []
+    if pattern.HasField("address"):
+        address = _compile_address(pattern.address)
+        checks.append(lambda output: address(output.address))
+    if pattern.HasField("asset"):
+        asset = pattern.asset
+        policy_id, name = asset.policy_id, asset.asset_name
+        checks.append(
+            lambda output: any(
+                (not policy_id or multiasset.policy_id == policy_id)
+                and (not name or item.name == name)
+                for multiasset in output.assets
+                for item in multiasset.assets
+            )
+        )
+    return _all(checks)
+
+
+def _compile_tx_pattern(pattern: TxPattern) -> Matcher:
+    if pattern.HasField("has_certificate"):
+        raise ValueError("Certificate patterns are not supported for local matching")
+    checks: List[Matcher] = []
+    if pattern.HasField("has_address"):
+        key = _address_key(pattern.has_address)
+        if key is not None:
+            attribute, value = key
+            checks.append(lambda view: value in getattr(view, attribute))
+        else:
+            address = _compile_address(pattern.has_address)
+            checks.append(lambda view: any(address(a) for a in view.addresses))
+    if pattern.HasField("moves_asset"):
+        checks.append(_compile_assets(pattern.moves_asset, "moved", "moved_policies"))
+    if pattern.HasField("mints_asset"):
+        checks.append(_compile_assets(pattern.mints_asset, "minted", "minted_policies"))
+    if pattern.HasField("produces"):
+        produces = _compile_output(pattern.produces)
+        checks.append(lambda view: any(produces(o) for o in view.tx.outputs))
+    if pattern.HasField("consumes"):
+        consumes = _compile_output(pattern.consumes)
+        checks.append(lambda view: any(consumes(o) for o in _consumed(view.tx)))
+    return _all(checks)
+
+
+def _tx_pattern_key(pattern: TxPattern) -> Optional[IndexKey]:
+    fields = pattern.ListFields()
+    if len(fields) != 1:
+        return None
+    field, value = fields[0]
+    if field.name == "has_address":
+        return _address_key(value)
+    if field.name == "moves_asset":
+        return _asset_key(value, "moved", "moved_policies")
+    if field.name == "mints_asset":
+        return _asset_key(value, "minted", "minted_policies")
+    return None
+
+
+def _compile_output_pattern(pattern: TxOutputPattern) -> Matcher:
+    output = _compile_output(pattern)
+    return lambda view: output(view.output)
+
+
+def _output_pattern_key(pattern: TxOutputPattern) -> Optional[IndexKey]:
+    fields = pattern.ListFields()
+    if len(fields) != 1:
+        return None
+    field, value = fields[0]
+    if field.name == "address":
+        return _address_key(value)
+    return _asset_key(value, "moved", "moved_policies")
+
+
+class _Compiler:
+    def __init__(
+        self,
+        compile_pattern: Callable[[Any], Matcher],
+        pattern_key: Callable[[Any], Optional[IndexKey]],
+    ) -> None:
+        self.compile_pattern = compile_pattern
+        self.pattern_key = pattern_key
+
+    def key(self, predicate: Any) -> Optional[IndexKey]:
+        """Index key of a predicate that is just a single-field pattern"""
+        fields = predicate.ListFields()
+        if len(fields) != 1 or fields[0][0].name != "match":
+            return None
+        return self.pattern_key(predicate.match.cardano)
+
+    def any_of(self, predicates: Any) -> Matcher:
+        indexed: Dict[str, Set[Any]] = {}
+        others: List[Matcher] = []
+        for predicate in predicates:
+            key = self.key(predicate)
+            if key is None:
+                others.append(self.compile(predicate))
+            else:
+                indexed.setdefault(key[0], set()).add(key[1])
+        groups: Tuple[Tuple[str, FrozenSet[Any]], ...] = tuple(
+            (attribute, frozenset(values)) for attribute, values in indexed.items()
+        )
+        others_ = tuple(others)
+
+        def match(view: Any) -> bool:
+            for attribute, values in groups:
+                if not values.isdisjoint(getattr(view, attribute)):
+                    return True
+            for other in others_:
+                if other(view):
+                    return True
+            return False
+
+        return match
+
+    def compile(self, predicate: Any) -> Matcher:
+        checks: List[Matcher] = []
+        if predicate.HasField("match"):
+            checks.append(self.compile_pattern(predicate.match.cardano))
+        excluded = getattr(predicate, "not")
+        if excluded:
+            any_excluded = self.any_of(excluded)
+            checks.append(lambda view: not any_excluded(view))
+        checks.extend(self.compile(child) for child in predicate.all_of)
+        if predicate.any_of:
+            checks.append(self.any_of(predicate.any_of))
+        return _all(checks)
+
+
+_tx_compiler = _Compiler(_compile_tx_pattern, _tx_pattern_key)
+_utxo_compiler = _Compiler(_compile_output_pattern, _output_pattern_key)
+
+
+def compile_tx_predicate(predicate) -> Callable[[Tx], bool]:
+    """Compile a submit or watch `TxPredicate` into a Cardano tx matcher"""
+    matcher = _tx_compiler.compile(predicate)
+    return lambda tx: matcher(_TxView(tx))
+
+
+def compile_utxo_predicate(predicate) -> Callable[[TxOutput], bool]:
+    """Compile a `UtxoPredicate` into a Cardano tx output matcher"""
+    matcher = _utxo_compiler.compile(predicate)
+    return lambda output: matcher(_OutputView(output))
+
+
+__all__ = [
+    "payment_part",
+    "delegation_part",
+    "address_matches",
+    "asset_matches",
+    "output_matches",
+    "tx_pattern_matches",
+    "tx_matches",
+    "utxo_matches",
+    "compile_tx_predicate",
+    "compile_utxo_predicate",
+]
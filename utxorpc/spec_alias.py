@@ -0,0 +1,52 @@
+"""Resolve the `utxorpc.v1alpha.*` imports of the generated spec modules.
+
+The `*_pb2` modules shipped in `utxorpc-spec` import their dependencies as
+`utxorpc.v1alpha...` while the package installs them under
+`utxorpc_spec.utxorpc.v1alpha...`. `SpecAliasFinder` answers imports of the
+former with the latter on demand, so only the spec modules actually used
+are loaded. `install` is called when `utxorpc` is imported.
+"""
+
+import importlib
+import importlib.abc
+import importlib.machinery
+import sys
+from types import ModuleType
+from typing import Optional, Sequence
+
+ALIAS_PREFIX = "utxorpc.v1alpha"
+TARGET_PREFIX = "utxorpc_spec."
+
+
+class _AliasLoader(importlib.abc.Loader):
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> ModuleType:
+        # The real module is returned as is; import machinery registers it
+        # under the alias name as well
+        return importlib.import_module(TARGET_PREFIX + spec.name)
+
+    def exec_module(self, module: ModuleType) -> None:
+        pass
+
+
+class SpecAliasFinder(importlib.abc.MetaPathFinder):
+    def find_spec(
+        self,
+        fullname: str,
+        path: Optional[Sequence[str]] = None,
+        target: Optional[ModuleType] = None,
+    ) -> Optional[importlib.machinery.ModuleSpec]:
+        if fullname != ALIAS_PREFIX and not fullname.startswith(ALIAS_PREFIX + "."):
+            return None
+        return importlib.machinery.ModuleSpec(fullname, _AliasLoader())
+
+
+def install() -> None:
+    """Add the finder to `sys.meta_path` once"""
+    if not any(isinstance(finder, SpecAliasFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, SpecAliasFinder())
+
+
+__all__ = [
+    "SpecAliasFinder",
+    "install",
+]
@@ -1,4 +1,4 @@
-from utxorpc.sync import CardanoBlock, CardanoPoint, CardanoChain
+from utxorpc.cardano import CardanoBlock, CardanoPoint, CardanoChain
 from utxorpc.generics.clients.watch import WatchClient
 
 